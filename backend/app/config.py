@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -17,17 +18,85 @@ class Settings(BaseSettings):
 
     # OpenAI
     openai_api_key: str = ""
+    llm_model: str = "gpt-4"
+    llm_temperature: float = 0.3
+    llm_context_tokens: int = 8192  # context window of llm_model
+    llm_output_tokens: int = 1000  # headroom reserved for the completion
+    llm_requests_per_minute: int = 0  # account limits, shared by all workers through redis_url (0 = no limit)
+    llm_tokens_per_minute: int = 0
+
+    # LLM gateway (pooled client, per-call deadlines and hedging)
+    openai_base_url: Optional[str] = None  # OpenAI-compatible endpoint, e.g. a local fake server; None means OpenAI
+    llm_max_connections: int = 16  # pooled keep-alive connections per worker process
+    llm_call_timeout: float = 120.0  # deadline of one call in seconds, retries included (0 = none)
+    llm_max_retries: int = 2  # client retries of failed or rate-limited requests
+    llm_hedge_enabled: bool = False  # resend calls slower than llm_hedge_quantile; use the first response
+    llm_hedge_quantile: float = 0.95
+    llm_hedge_min_samples: int = 20  # observed calls before hedging starts
+    llm_hedge_min_delay: float = 1.0  # never hedge calls younger than this (seconds)
+
+    # Summarization
+    chunk_max_tokens: int = 6000  # token budget for one chunk sent to the map prompt
+    chunk_overlap_ratio: float = 0.02  # overlap as a fraction of the chunk size
+    chunk_max_overlap_tokens: int = 200
+    map_max_concurrency: int = 8  # max chunk summaries in flight at once
+    map_chunk_retries: int = 1  # extra attempts for chunks that failed
+    map_wait_timeout: int = 1800  # seconds the reduce stage waits for missing chunk summaries
+    map_wait_max_interval: int = 30  # longest pause between checks for missing chunk summaries (seconds)
+    reduce_max_input_tokens: int = 6000  # token budget for one reduce prompt
+    map_summary_tokens: int = 400  # expected length of one section summary, for planning
+
+    # Scheduling (upload preflight and priority lanes)
+    preflight_sample_pages: int = 8  # pages extracted at upload to estimate the cost of a PDF
+    preflight_min_page_chars: int = 20  # sampled pages with less text count as having no text layer
+    priority_standard_max_calls: int = 10  # documents estimated above this many LLM calls go to the bulk lane
+    priority_max_user_penalty: int = 3  # max priority steps lost for a user's other jobs in flight
+
+    # LLM response cache (chunk summaries)
+    llm_cache_enabled: bool = True
+    llm_cache_redis: bool = True  # share entries across workers through redis_url
+    llm_cache_ttl: int = 7 * 24 * 3600  # seconds
+    llm_cache_memory_bytes: int = 64 * 1024 * 1024  # in-process LRU size
+    llm_cache_max_entry_bytes: int = 256 * 1024
+
+    # Progress events (Redis pub/sub, streamed to clients over SSE)
+    progress_events_enabled: bool = True
+    progress_event_ttl: int = 3600  # seconds the latest event of a document is kept for late subscribers
+    progress_keepalive: int = 15  # seconds between SSE keep-alive comments
 
     # SendGrid
     sendgrid_api_key: str = ""
+    sendgrid_api_url: str = "https://api.sendgrid.com"  # point at a stub server in tests
     from_email: str = "noreply@pdfsummarizer.com"
+    email_timeout: float = 10.0  # seconds per SendGrid request
+    email_max_connections: int = 10  # pooled connections per worker process
+    email_max_retries: int = 3  # attempts after a rate-limited or failed request
 
     # Frontend
     frontend_url: str = "http://localhost:5173"
 
+    # PDF extraction
+    pdf_engine: str = "auto"  # "pymupdf", "pypdf" or "auto" (fastest installed)
+    pdf_engine_fallback: bool = False  # retry pages one engine finds empty with the other
+    extraction_workers: int = 0  # processes for parallel extraction (0 = one per CPU), kept per worker process
+    # Smaller PDFs are extracted in-process; PyMuPDF extracts a page 3-7x faster
+    # than pypdf (bench_engines), so the pool only pays off on longer PDFs
+    parallel_extraction_min_pages: int = 64  # with pypdf
+    parallel_extraction_min_pages_pymupdf: int = 256
+    text_compression_level: int = 3  # zstd level of the stored full text (zlib without zstandard)
+
     # File storage
     upload_dir: str = "uploads"
     max_file_size: int = 10 * 1024 * 1024  # 10MB
+    upload_block_size: int = 1024 * 1024  # uploads are written to disk in blocks of this size
+    storage_backend: str = "local"  # "local" (shared upload_dir) or "s3" (any S3-compatible store)
+    storage_block_size: int = 1024 * 1024  # block size for streamed reads
+    s3_endpoint_url: Optional[str] = None  # e.g. http://minio:9000; None means AWS
+    s3_bucket: str = "pdf-summarizer"
+    s3_prefix: str = "uploads/"
+    s3_region: Optional[str] = None
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
 
     class Config:
         env_file = ".env"
@@ -8,6 +8,8 @@ from app.database import create_db_and_tables
 from app.routers.auth import router as auth_router, users_router
 from app.routers.pdf import router as pdf_router
 from app.routers.summary import router as summary_router
+from app.services.llm_cache import get_llm_cache
+from app.services.rate_limiter import get_rate_limiter
 
 settings = get_settings()
 
@@ -38,6 +40,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -59,3 +62,19 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/health/llm-cache")
+async def llm_cache_stats():
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@app.get("/health/llm-rate-limit")
+async def llm_rate_limit_stats():
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return {"enabled": False}
+    return {"enabled": True, **limiter.stats()}
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import String, Text, ForeignKey, DateTime, Integer, Enum
+from sqlalchemy import String, Text, ForeignKey, DateTime, Integer, Enum, JSON, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID
 import enum
@@ -15,6 +15,13 @@ class TaskStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+class DeliveryStatus(str, enum.Enum):
+    QUEUED = "queued"
+    SENT = "sent"
+    FAILED = "failed"
+    SKIPPED = "skipped"  # email is not configured
+
+
 class User(SQLAlchemyBaseUserTableUUID, Base):
     __tablename__ = "users"
 
@@ -27,35 +34,141 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
 
 class PDFDocument(Base):
     __tablename__ = "pdf_documents"
+    __table_args__ = (
+        # Per-user listings, newest first (keyset pagination on created_at, id)
+        Index("ix_pdf_documents_user_created", "user_id", "created_at", "id"),
+        Index("ix_pdf_documents_user_status", "user_id", "status"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
     original_filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    # Storage key (see app.services.storage); older rows hold a local path
     file_path: Mapped[str] = mapped_column(String(500), nullable=False)
     file_size: Mapped[int] = mapped_column(Integer, nullable=False)
     page_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    title: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    author: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     status: Mapped[str] = mapped_column(String(20), default=TaskStatus.PENDING.value)
+    # Upload preflight estimate (see app.services.preflight) and the Celery priority it gave the job
+    estimated_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    estimated_llm_calls: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    priority: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    task_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # Set while this upload waits on an identical document that is already processing
+    duplicate_of_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("pdf_documents.id", ondelete="SET NULL"), nullable=True, index=True
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user: Mapped["User"] = relationship(back_populates="pdf_documents")
     summary: Mapped[Optional["Summary"]] = relationship(back_populates="pdf_document", uselist=False, cascade="all, delete-orphan")
+    checkpoints: Mapped[list["ProcessingCheckpoint"]] = relationship(back_populates="pdf_document", cascade="all, delete-orphan")
+    # Deleted by the database (ON DELETE CASCADE) rather than loaded first
+    pages: Mapped[list["DocumentPage"]] = relationship(
+        back_populates="pdf_document", cascade="all, delete-orphan", passive_deletes=True
+    )
 
 
 class Summary(Base):
     __tablename__ = "summaries"
+    # user_id duplicates the document's owner so per-user listings are served by one index
+    __table_args__ = (Index("ix_summaries_user_created", "user_id", "created_at", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     pdf_document_id: Mapped[int] = mapped_column(ForeignKey("pdf_documents.id"), nullable=False, unique=True)
-    content: Mapped[str] = mapped_column(Text, nullable=False)
-    extracted_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    user_id: Mapped[Optional[str]] = mapped_column(ForeignKey("users.id"), nullable=True)
+    # Large text columns are only loaded on access (or with undefer()), so listings stay small
+    content: Mapped[str] = mapped_column(Text, nullable=False, deferred=True)
+    # First 50k characters of the text, only set on older rows; see DocumentPage
+    extracted_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)
     word_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     processing_time: Mapped[Optional[float]] = mapped_column(nullable=True)
+    stage_timings: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    strategy: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    input_tokens: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    estimated_llm_calls: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    prompt_version: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    model: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     email_sent: Mapped[bool] = mapped_column(default=False)
     email_sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
     pdf_document: Mapped["PDFDocument"] = relationship(back_populates="summary")
+    deliveries: Mapped[list["EmailDelivery"]] = relationship(
+        back_populates="summary", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+    def copy_for(self, pdf_document_id: int, user_id: str) -> "Summary":
+        """Return an unsaved copy of this summary for another (identical) document of ``user_id``."""
+        return Summary(
+            pdf_document_id=pdf_document_id,
+            user_id=user_id,
+            content=self.content,
+            extracted_text=self.extracted_text,
+            word_count=self.word_count,
+            processing_time=0.0,
+            strategy=self.strategy,
+            input_tokens=self.input_tokens,
+            estimated_llm_calls=self.estimated_llm_calls,
+            prompt_version=self.prompt_version,
+            model=self.model,
+        )
+
+
+class ProcessingCheckpoint(Base):
+    """Output of a completed processing step, so a retried task can resume after it."""
+
+    __tablename__ = "processing_checkpoints"
+    __table_args__ = (UniqueConstraint("pdf_document_id", "stage", "key"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    pdf_document_id: Mapped[int] = mapped_column(ForeignKey("pdf_documents.id", ondelete="CASCADE"), nullable=False)
+    stage: Mapped[str] = mapped_column(String(20), nullable=False)
+    key: Mapped[str] = mapped_column(String(64), nullable=False, default="")
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    pdf_document: Mapped["PDFDocument"] = relationship(back_populates="checkpoints")
+
+
+class DocumentPage(Base):
+    """Full extracted text of one PDF page, compressed (see app.services.document_text)."""
+
+    __tablename__ = "document_pages"
+    __table_args__ = (UniqueConstraint("pdf_document_id", "page_number"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    pdf_document_id: Mapped[int] = mapped_column(ForeignKey("pdf_documents.id", ondelete="CASCADE"), nullable=False)
+    page_number: Mapped[int] = mapped_column(Integer, nullable=False)  # 1-based
+    codec: Mapped[str] = mapped_column(String(10), nullable=False)
+    char_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    # Relationships
+    pdf_document: Mapped["PDFDocument"] = relationship(back_populates="pages")
+
+
+class EmailDelivery(Base):
+    """One email of a summary: the pipeline's email or a resend, with its delivery status."""
+
+    __tablename__ = "email_deliveries"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    summary_id: Mapped[int] = mapped_column(ForeignKey("summaries.id", ondelete="CASCADE"), nullable=False, index=True)
+    to_email: Mapped[str] = mapped_column(String(320), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default=DeliveryStatus.QUEUED.value)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    provider_message_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    # Relationships
+    summary: Mapped["Summary"] = relationship(back_populates="deliveries")
@@ -1,109 +1,322 @@
+import asyncio
+import json
 import os
 import uuid
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import exists, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
+from starlette.concurrency import run_in_threadpool
 
 from app.auth import current_active_user
 from app.config import get_settings
 from app.database import get_async_session
 from app.models import PDFDocument, Summary, TaskStatus, User
-from app.schemas import PDFDocumentListResponse, PDFDocumentResponse, UploadResponse
-from app.tasks.worker import process_pdf_task
+from app.schemas import (
+    DocumentPageText,
+    DocumentTextResponse,
+    PDFDocumentListResponse,
+    PDFDocumentResponse,
+    UploadResponse,
+)
+from app.services.document_text import (
+    decompress_page,
+    move_pages_statement,
+    page_range_query,
+    text_heir_query,
+    text_source_query,
+)
+from app.services.pagination import InvalidCursor, next_cursor, paginate
+from app.services.preflight import PreflightError, job_priority, preflight_pdf
+from app.services.progress import COMPLETED, FAILED, QUEUED, TERMINAL_STAGES, get_progress_hub, make_event
+from app.services.storage import get_storage
+from app.services.summarizer import PROMPT_VERSION
+from app.services.uploads import UploadError, receive_upload
+from app.tasks.worker import process_pdf_task, send_summary_email_task
 
 router = APIRouter(prefix="/pdf", tags=["pdf"])
 settings = get_settings()
 
+IN_FLIGHT_STATUSES = [TaskStatus.PENDING.value, TaskStatus.PROCESSING.value]
+MAX_TEXT_PAGES = 50  # pages returned per text request
 
-@router.post("/upload", response_model=UploadResponse, status_code=status.HTTP_201_CREATED)
+
+async def find_cached_summary(session: AsyncSession, content_hash: str) -> Optional[Summary]:
+    """Find a completed summary of identical content made with the current prompts and model."""
+    result = await session.execute(
+        select(Summary)
+        .join(PDFDocument)
+        .where(
+            PDFDocument.content_hash == content_hash,
+            PDFDocument.status == TaskStatus.COMPLETED.value,
+            Summary.prompt_version == PROMPT_VERSION,
+            Summary.model == settings.llm_model,
+        )
+        .order_by(Summary.created_at.desc())
+        .limit(1)
+        .options(selectinload(Summary.pdf_document), undefer(Summary.content), undefer(Summary.extracted_text))
+    )
+    return result.scalar_one_or_none()
+
+
+async def find_in_flight_document(session: AsyncSession, content_hash: str) -> Optional[PDFDocument]:
+    """Find the document currently being processed for identical content, if any."""
+    result = await session.execute(
+        select(PDFDocument)
+        .where(
+            PDFDocument.content_hash == content_hash,
+            PDFDocument.status.in_(IN_FLIGHT_STATUSES),
+            PDFDocument.duplicate_of_id.is_(None),
+            PDFDocument.task_id.is_not(None),
+        )
+        .order_by(PDFDocument.created_at)
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def promote_duplicate(session: AsyncSession, leader: PDFDocument) -> Optional[PDFDocument]:
+    """
+    Hand the processing of an in-flight document that is being deleted to an upload waiting on it.
+
+    The oldest waiting upload gets its own task (in the leader's priority
+    lane) and the other waiting uploads are attached to it, so none of them
+    is left pending once the leader is gone. The caller commits.
+
+    Returns:
+        The promoted document, or None if no upload was waiting
+    """
+    result = await session.execute(
+        select(PDFDocument)
+        .where(PDFDocument.duplicate_of_id == leader.id, PDFDocument.status.in_(IN_FLIGHT_STATUSES))
+        .order_by(PDFDocument.created_at)
+        .options(selectinload(PDFDocument.user))
+    )
+    waiting = list(result.scalars().all())
+    if not waiting:
+        return None
+
+    successor = waiting[0]
+    task = process_pdf_task.apply_async((successor.id, str(successor.user.email)), priority=leader.priority)
+    successor.duplicate_of_id = None
+    successor.task_id = task.id
+    successor.priority = leader.priority
+    for duplicate in waiting[1:]:
+        duplicate.duplicate_of_id = successor.id
+        duplicate.task_id = task.id
+    return successor
+
+
+async def reuse_summary(
+    session: AsyncSession, pdf_document: PDFDocument, cached: Summary, user_email: str
+) -> str:
+    """Complete ``pdf_document`` with a copy of ``cached`` and queue its email. Returns the task ID."""
+    summary = cached.copy_for(pdf_document.id, pdf_document.user_id)
+    session.add(summary)
+    pdf_document.page_count = cached.pdf_document.page_count
+    pdf_document.title = cached.pdf_document.title
+    pdf_document.author = cached.pdf_document.author
+    pdf_document.status = TaskStatus.COMPLETED.value
+    await session.commit()
+
+    task = send_summary_email_task.delay(summary.id, user_email)
+    return task.id
+
+
+@router.post(
+    "/upload",
+    response_model=UploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                }
+            },
+        }
+    },
+)
 async def upload_pdf(
-    file: UploadFile = File(...),
+    request: Request,
     user: User = Depends(current_active_user),
     session: AsyncSession = Depends(get_async_session),
 ):
-    """Upload a PDF file for summarization."""
-    # Validate file type
-    if not file.filename.lower().endswith(".pdf"):
+    """Upload a PDF file (multipart field ``file``) for summarization."""
+    # Stream the file to disk, validating type and size and hashing as it arrives
+    try:
+        upload = await receive_upload(request)
+    except UploadError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only PDF files are allowed",
+            detail=str(e),
         )
 
-    # Validate file size
-    content = await file.read()
-    if len(content) > settings.max_file_size:
+    content_hash = upload.content_hash
+
+    # Estimate the cost from the page tree and a few sampled pages; PDFs
+    # without a text layer are rejected before anything is stored or queued
+    try:
+        estimate = await run_in_threadpool(preflight_pdf, upload.temp_path, filename=upload.filename)
+        if not estimate.has_text_layer:
+            raise PreflightError("The PDF has no text layer (e.g. scanned pages); only PDFs with text can be summarized")
+    except PreflightError as e:
+        os.remove(upload.temp_path)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File size exceeds maximum allowed ({settings.max_file_size // (1024 * 1024)}MB)",
+            detail=str(e),
         )
+    estimate_fields = {
+        "page_count": estimate.page_count,
+        "estimated_tokens": estimate.estimated_tokens,
+        "estimated_llm_calls": estimate.plan.estimated_calls,
+    }
 
-    # Create upload directory if it doesn't exist
-    os.makedirs(settings.upload_dir, exist_ok=True)
-
-    # Generate unique filename
-    unique_filename = f"{uuid.uuid4()}_{file.filename}"
-    file_path = os.path.join(settings.upload_dir, unique_filename)
-
-    # Save file
-    with open(file_path, "wb") as f:
-        f.write(content)
+    # Generate unique filename and move the upload into storage
+    unique_filename = f"{uuid.uuid4()}_{upload.filename}"
+    try:
+        await run_in_threadpool(get_storage().put_file, upload.temp_path, unique_filename)
+    except Exception:
+        if os.path.exists(upload.temp_path):
+            os.remove(upload.temp_path)
+        raise
 
     # Create database record
     pdf_document = PDFDocument(
         user_id=str(user.id),
         filename=unique_filename,
-        original_filename=file.filename,
-        file_path=file_path,
-        file_size=len(content),
+        original_filename=upload.filename,
+        file_path=unique_filename,
+        file_size=upload.size,
+        content_hash=content_hash,
         status=TaskStatus.PENDING.value,
+        **estimate_fields,
     )
     session.add(pdf_document)
     await session.commit()
     await session.refresh(pdf_document)
 
-    # Trigger Celery task
-    task = process_pdf_task.delay(pdf_document.id, str(user.email))
+    # Identical document already summarized: reuse the result
+    cached = await find_cached_summary(session, content_hash)
+    if cached:
+        task_id = await reuse_summary(session, pdf_document, cached, str(user.email))
+        return UploadResponse(
+            document_id=pdf_document.id,
+            task_id=task_id,
+            message="PDF uploaded successfully. An identical document was already summarized.",
+            **estimate_fields,
+        )
+
+    # Identical document being processed: attach to that task instead of starting another
+    in_flight = await find_in_flight_document(session, content_hash)
+    if in_flight:
+        pdf_document.duplicate_of_id = in_flight.id
+        pdf_document.task_id = in_flight.task_id
+        await session.commit()
+
+        # The task may have finished before we attached; if so, resolve it here
+        await session.refresh(in_flight)
+        await session.refresh(pdf_document)
+        if pdf_document.status in IN_FLIGHT_STATUSES and in_flight.status not in IN_FLIGHT_STATUSES:
+            cached = await find_cached_summary(session, content_hash)
+            if cached:
+                try:
+                    await reuse_summary(session, pdf_document, cached, str(user.email))
+                except IntegrityError:
+                    # The worker completed this duplicate concurrently
+                    await session.rollback()
+            else:
+                # The identical document failed; process this upload on its own
+                pdf_document.duplicate_of_id = None
+                in_flight = None
+
+        if in_flight:
+            return UploadResponse(
+                document_id=pdf_document.id,
+                task_id=pdf_document.task_id,
+                message="PDF uploaded successfully. Attached to processing of an identical document.",
+                **estimate_fields,
+            )
+
+    # Queue in the lane of the document's size, behind the user's own backlog
+    in_flight_jobs = await session.scalar(
+        select(func.count())
+        .select_from(PDFDocument)
+        .where(
+            PDFDocument.user_id == str(user.id),
+            PDFDocument.status.in_(IN_FLIGHT_STATUSES),
+            PDFDocument.duplicate_of_id.is_(None),
+            PDFDocument.id != pdf_document.id,
+        )
+    )
+    priority = job_priority(estimate.plan.estimated_calls, in_flight_jobs)
+
+    # Trigger Celery task; the pipeline stages it starts inherit its priority
+    task = process_pdf_task.apply_async((pdf_document.id, str(user.email)), priority=priority)
+    pdf_document.task_id = task.id
+    pdf_document.priority = priority
+    await session.commit()
 
     return UploadResponse(
         document_id=pdf_document.id,
         task_id=task.id,
         message="PDF uploaded successfully. Processing started.",
+        priority=priority,
+        **estimate_fields,
     )
 
 
 @router.get("/documents", response_model=List[PDFDocumentListResponse])
 async def list_documents(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     user: User = Depends(current_active_user),
     session: AsyncSession = Depends(get_async_session),
 ):
-    """List all PDF documents for the current user."""
-    result = await session.execute(
-        select(PDFDocument)
-        .where(PDFDocument.user_id == str(user.id))
-        .order_by(PDFDocument.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .options(selectinload(PDFDocument.summary))
+    """
+    List all PDF documents for the current user, newest first.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to get the
+    next page; ``skip`` is still supported but slows down on deep pages.
+    """
+    columns = select(
+        PDFDocument.id,
+        PDFDocument.original_filename,
+        PDFDocument.file_size,
+        PDFDocument.page_count,
+        PDFDocument.status,
+        PDFDocument.created_at,
+        exists().where(Summary.pdf_document_id == PDFDocument.id).label("has_summary"),
     )
-    documents = result.scalars().all()
-
-    return [
-        PDFDocumentListResponse(
-            id=doc.id,
-            original_filename=doc.original_filename,
-            file_size=doc.file_size,
-            page_count=doc.page_count,
-            status=doc.status,
-            created_at=doc.created_at,
-            has_summary=doc.summary is not None,
+    try:
+        query = paginate(
+            columns.where(PDFDocument.user_id == str(user.id)),
+            PDFDocument.created_at,
+            PDFDocument.id,
+            limit,
+            skip,
+            cursor,
         )
-        for doc in documents
-    ]
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    result = await session.execute(query)
+    rows, cursor = next_cursor(result.all(), limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
+    return [PDFDocumentListResponse.model_validate(row._mapping) for row in rows]
 
 
 @router.get("/documents/{document_id}", response_model=PDFDocumentResponse)
@@ -116,7 +329,7 @@ async def get_document(
     result = await session.execute(
         select(PDFDocument)
         .where(PDFDocument.id == document_id, PDFDocument.user_id == str(user.id))
-        .options(selectinload(PDFDocument.summary))
+        .options(selectinload(PDFDocument.summary).undefer(Summary.content))
     )
     document = result.scalar_one_or_none()
 
@@ -129,6 +342,134 @@ async def get_document(
     return document
 
 
+@router.get("/documents/{document_id}/text", response_model=DocumentTextResponse)
+async def get_document_text(
+    document_id: int,
+    start: int = 1,
+    end: Optional[int] = None,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get the extracted text of pages ``start`` to ``end`` (1-based, inclusive) of a document.
+
+    At most MAX_TEXT_PAGES pages are returned; only those pages are read and
+    decompressed.
+    """
+    result = await session.execute(
+        select(PDFDocument)
+        .where(PDFDocument.id == document_id, PDFDocument.user_id == str(user.id))
+    )
+    document = result.scalar_one_or_none()
+
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found",
+        )
+
+    # Identical uploads share the text stored with the one that was extracted
+    source_id = None
+    if document.content_hash:
+        result = await session.execute(text_source_query(document.content_hash))
+        source_id = result.scalar_one_or_none()
+    if source_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No extracted text stored for this document",
+        )
+
+    start = max(start, 1)
+    end = min(end or start + MAX_TEXT_PAGES - 1, start + MAX_TEXT_PAGES - 1)
+    result = await session.execute(page_range_query(source_id, start, end))
+    rows = result.all()
+    pages = await run_in_threadpool(
+        lambda: [DocumentPageText(page_number=number, text=decompress_page(codec, data)) for number, codec, data in rows]
+    )
+
+    return DocumentTextResponse(document_id=document.id, page_count=document.page_count, pages=pages)
+
+
+@router.get("/documents/{document_id}/events")
+async def document_events(
+    document_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Stream the processing progress of a document as server-sent events.
+
+    Every ``data:`` line is a JSON event with the ``stage`` (queued,
+    extracting, mapping, summarizing, reducing, emailing, completed or
+    failed), ``current``/``total`` units of the stage and the overall
+    ``percent``. The first event is the current state; the stream ends
+    after ``completed`` or ``failed``. Replaces polling the document.
+    """
+    result = await session.execute(
+        select(PDFDocument.status, PDFDocument.duplicate_of_id)
+        .where(PDFDocument.id == document_id, PDFDocument.user_id == str(user.id))
+    )
+    document = result.one_or_none()
+
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found",
+        )
+    # The stream can last minutes; don't hold a database connection for it
+    await session.close()
+
+    # An upload waiting on identical content shows the progress of that document
+    watched = [document_id] + ([document.duplicate_of_id] if document.duplicate_of_id else [])
+
+    def relabel(event: dict) -> Optional[dict]:
+        if event["document_id"] == document_id:
+            return event
+        if event["stage"] in TERMINAL_STAGES:
+            return None  # the waiting upload completes (or fails) with its own event
+        return {**event, "document_id": document_id}
+
+    async def event_stream():
+        if document.status == TaskStatus.COMPLETED.value:
+            yield f"data: {json.dumps(make_event(document_id, COMPLETED))}\n\n"
+            return
+        if document.status == TaskStatus.FAILED.value:
+            yield f"data: {json.dumps(make_event(document_id, FAILED))}\n\n"
+            return
+
+        hub = get_progress_hub()
+        async with hub.subscribe(watched) as queue:
+            # Read after subscribing, so no event falls between the two
+            event = await hub.last_event(document_id)
+            if event is None and document.duplicate_of_id:
+                event = await hub.last_event(document.duplicate_of_id)
+                event = event and relabel(event)
+            event = event or make_event(document_id, QUEUED)
+
+            while True:
+                yield f"data: {json.dumps(event)}\n\n"
+                if event["stage"] in TERMINAL_STAGES:
+                    return
+                event = None
+                while event is None:
+                    try:
+                        event = relabel(await asyncio.wait_for(queue.get(), settings.progress_keepalive))
+                    except asyncio.TimeoutError:
+                        # Events published before the hub's subscription was up are not
+                        # received; the stored latest event still ends the stream
+                        latest = await hub.last_event(document_id)
+                        if latest and latest["stage"] in TERMINAL_STAGES:
+                            event = latest
+                        else:
+                            yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/documents/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(
     document_id: int,
@@ -148,9 +489,19 @@ async def delete_document(
             detail="Document not found",
         )
 
-    # Delete file from disk
-    if os.path.exists(document.file_path):
-        os.remove(document.file_path)
+    # Delete file from storage
+    await run_in_threadpool(get_storage().delete, document.file_path)
+
+    # Uploads attached to this document while it processes would otherwise wait forever
+    if document.status in IN_FLIGHT_STATUSES and document.duplicate_of_id is None:
+        await promote_duplicate(session, document)
+
+    # Identical uploads read the text stored with this document; hand it to one of them
+    if document.content_hash:
+        result = await session.execute(text_heir_query(document.id, document.content_hash))
+        heir_id = result.scalar_one_or_none()
+        if heir_id is not None:
+            await session.execute(move_pages_statement(document.id, heir_id))
 
     await session.delete(document)
     await session.commit()
@@ -1,38 +1,70 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 
 from app.auth import current_active_user
 from app.database import get_async_session
-from app.models import PDFDocument, Summary, User
-from app.schemas import SummaryDetailResponse, SummaryResponse
-from app.services.email import send_summary_email
+from app.models import EmailDelivery, PDFDocument, Summary, User
+from app.schemas import EmailDeliveryResponse, SummaryDetailResponse, SummaryListResponse
+from app.services.pagination import InvalidCursor, next_cursor, paginate
+from app.tasks.worker import send_summary_email_task
 
 router = APIRouter(prefix="/summaries", tags=["summaries"])
 
+# Characters of each summary returned by the listing
+PREVIEW_LENGTH = 300
 
-@router.get("", response_model=List[SummaryDetailResponse])
+
+@router.get("", response_model=List[SummaryListResponse])
 async def list_summaries(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     user: User = Depends(current_active_user),
     session: AsyncSession = Depends(get_async_session),
 ):
-    """List all summaries for the current user."""
-    result = await session.execute(
-        select(Summary)
-        .join(PDFDocument)
-        .where(PDFDocument.user_id == str(user.id))
-        .order_by(Summary.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .options(selectinload(Summary.pdf_document))
-    )
-    summaries = result.scalars().all()
-    return summaries
+    """
+    List all summaries for the current user, newest first.
+
+    Only the listed columns are selected, with the content cut down to a
+    preview by the database; fetch ``/summaries/{id}`` for the full text.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to get the
+    next page; ``skip`` is still supported but slows down on deep pages.
+    """
+    columns = select(
+        Summary.id,
+        Summary.pdf_document_id,
+        PDFDocument.original_filename,
+        func.substr(Summary.content, 1, PREVIEW_LENGTH).label("preview"),
+        Summary.word_count,
+        Summary.processing_time,
+        Summary.strategy,
+        Summary.email_sent,
+        Summary.email_sent_at,
+        Summary.created_at,
+    ).join(PDFDocument, PDFDocument.id == Summary.pdf_document_id)
+    try:
+        query = paginate(
+            columns.where(Summary.user_id == str(user.id)),
+            Summary.created_at,
+            Summary.id,
+            limit,
+            skip,
+            cursor,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    result = await session.execute(query)
+    rows, cursor = next_cursor(result.all(), limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+    return [SummaryListResponse.model_validate(row._mapping) for row in rows]
 
 
 @router.get("/{summary_id}", response_model=SummaryDetailResponse)
@@ -46,7 +78,7 @@ async def get_summary(
         select(Summary)
         .join(PDFDocument)
         .where(Summary.id == summary_id, PDFDocument.user_id == str(user.id))
-        .options(selectinload(Summary.pdf_document))
+        .options(selectinload(Summary.pdf_document), undefer(Summary.content))
     )
     summary = result.scalar_one_or_none()
 
@@ -59,38 +91,83 @@ async def get_summary(
     return summary
 
 
-@router.post("/{summary_id}/resend-email", response_model=dict)
+@router.post(
+    "/{summary_id}/resend-email",
+    response_model=EmailDeliveryResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def resend_summary_email(
     summary_id: int,
     user: User = Depends(current_active_user),
     session: AsyncSession = Depends(get_async_session),
 ):
-    """Resend the summary email."""
+    """
+    Queue the summary email again.
+
+    The email is sent by the notify workers; the response is the queued
+    delivery, whose status can be followed at
+    ``/summaries/{summary_id}/email-deliveries/{id}``.
+    """
     result = await session.execute(
-        select(Summary)
+        select(Summary.id)
         .join(PDFDocument)
         .where(Summary.id == summary_id, PDFDocument.user_id == str(user.id))
-        .options(selectinload(Summary.pdf_document))
     )
-    summary = result.scalar_one_or_none()
-
-    if not summary:
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Summary not found",
         )
 
-    # Send email
-    success = await send_summary_email(
-        to_email=str(user.email),
-        filename=summary.pdf_document.original_filename,
-        summary_content=summary.content,
+    delivery = EmailDelivery(summary_id=summary_id, to_email=str(user.email))
+    session.add(delivery)
+    await session.commit()
+
+    send_summary_email_task.delay(summary_id, str(user.email), delivery.id)
+    return delivery
+
+
+@router.get("/{summary_id}/email-deliveries", response_model=List[EmailDeliveryResponse])
+async def list_email_deliveries(
+    summary_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """List the emails of a summary, newest first."""
+    result = await session.execute(
+        select(EmailDelivery)
+        .join(Summary)
+        .join(PDFDocument)
+        .where(EmailDelivery.summary_id == summary_id, PDFDocument.user_id == str(user.id))
+        .order_by(EmailDelivery.created_at.desc(), EmailDelivery.id.desc())
     )
+    return result.scalars().all()
+
 
-    if not success:
+@router.get("/{summary_id}/email-deliveries/{delivery_id}", response_model=EmailDeliveryResponse)
+async def get_email_delivery(
+    summary_id: int,
+    delivery_id: int,
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Get the delivery status of one email of a summary."""
+    result = await session.execute(
+        select(EmailDelivery)
+        .join(Summary)
+        .join(PDFDocument)
+        .where(
+            EmailDelivery.id == delivery_id,
+            EmailDelivery.summary_id == summary_id,
+            PDFDocument.user_id == str(user.id),
+        )
+    )
+    delivery = result.scalar_one_or_none()
+
+    if not delivery:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to send email",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email delivery not found",
         )
 
-    return {"message": "Email sent successfully"}
+    return delivery
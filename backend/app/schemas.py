@@ -40,7 +40,12 @@ class PDFDocumentResponse(BaseModel):
     original_filename: str
     file_size: int
     page_count: Optional[int]
+    title: Optional[str] = None
+    author: Optional[str] = None
     status: str
+    estimated_tokens: Optional[int] = None
+    estimated_llm_calls: Optional[int] = None
+    priority: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     summary: Optional["SummaryResponse"] = None
@@ -62,6 +67,17 @@ class PDFDocumentListResponse(BaseModel):
         from_attributes = True
 
 
+class DocumentPageText(BaseModel):
+    page_number: int
+    text: str
+
+
+class DocumentTextResponse(BaseModel):
+    document_id: int
+    page_count: Optional[int]
+    pages: list[DocumentPageText]
+
+
 # Summary Schemas
 class SummaryBase(BaseModel):
     content: str
@@ -79,6 +95,9 @@ class SummaryResponse(BaseModel):
     content: str
     word_count: Optional[int]
     processing_time: Optional[float]
+    strategy: Optional[str] = None
+    input_tokens: Optional[int] = None
+    estimated_llm_calls: Optional[int] = None
     email_sent: bool
     email_sent_at: Optional[datetime]
     created_at: datetime
@@ -94,6 +113,35 @@ class SummaryDetailResponse(SummaryResponse):
         from_attributes = True
 
 
+class SummaryListResponse(BaseModel):
+    id: int
+    pdf_document_id: int
+    original_filename: str
+    preview: str  # first characters of the content
+    word_count: Optional[int]
+    processing_time: Optional[float]
+    strategy: Optional[str] = None
+    email_sent: bool
+    email_sent_at: Optional[datetime]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class EmailDeliveryResponse(BaseModel):
+    id: int
+    summary_id: int
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Task Response
 class TaskResponse(BaseModel):
     task_id: str
@@ -106,3 +154,7 @@ class UploadResponse(BaseModel):
     document_id: int
     task_id: str
     message: str
+    page_count: Optional[int] = None
+    estimated_tokens: Optional[int] = None
+    estimated_llm_calls: Optional[int] = None
+    priority: Optional[int] = None
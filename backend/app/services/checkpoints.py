@@ -0,0 +1,85 @@
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models import ProcessingCheckpoint
+
+EXTRACT = "extract"
+PLAN = "plan"
+CHUNK = "chunk"
+MAP = "map"
+MAPPED = "mapped"  # per-chunk marker that the map stage is done with it
+
+
+class CheckpointStore:
+    """
+    Durable per-document checkpoints in the ``processing_checkpoints`` table.
+
+    Every write uses its own short-lived session and commits immediately, so
+    checkpoints survive a worker crash and can be written from the map
+    phase's worker threads.
+    """
+
+    def __init__(self, session_factory, document_id: int):
+        self.session_factory = session_factory
+        self.document_id = document_id
+
+    def get(self, stage: str, key: str = "") -> Optional[str]:
+        """Return the checkpointed content for ``stage``/``key``, or None."""
+        with self.session_factory() as db:
+            checkpoint = (
+                db.query(ProcessingCheckpoint)
+                .filter(
+                    ProcessingCheckpoint.pdf_document_id == self.document_id,
+                    ProcessingCheckpoint.stage == stage,
+                    ProcessingCheckpoint.key == key,
+                )
+                .first()
+            )
+            return checkpoint.content if checkpoint else None
+
+    def get_many(self, stage: str, keys: Optional[list[str]] = None) -> dict[str, str]:
+        """Return checkpoints of ``stage`` (all, or only ``keys``) as a ``{key: content}`` dict."""
+        with self.session_factory() as db:
+            query = db.query(ProcessingCheckpoint.key, ProcessingCheckpoint.content).filter(
+                ProcessingCheckpoint.pdf_document_id == self.document_id,
+                ProcessingCheckpoint.stage == stage,
+            )
+            if keys is not None:
+                query = query.filter(ProcessingCheckpoint.key.in_(keys))
+            return {key: content for key, content in query.all()}
+
+    def count(self, stage: str) -> int:
+        """Return the number of checkpoints recorded for ``stage``."""
+        with self.session_factory() as db:
+            return (
+                db.query(ProcessingCheckpoint)
+                .filter(
+                    ProcessingCheckpoint.pdf_document_id == self.document_id,
+                    ProcessingCheckpoint.stage == stage,
+                )
+                .count()
+            )
+
+    def put(self, stage: str, content: str, key: str = "") -> None:
+        """Record the output of a completed step (first write wins)."""
+        with self.session_factory() as db:
+            db.add(ProcessingCheckpoint(
+                pdf_document_id=self.document_id,
+                stage=stage,
+                key=key,
+                content=content,
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Already checkpointed by an earlier attempt
+                db.rollback()
+
+    def clear(self) -> None:
+        """Delete all checkpoints of the document once processing has completed."""
+        with self.session_factory() as db:
+            db.query(ProcessingCheckpoint).filter(
+                ProcessingCheckpoint.pdf_document_id == self.document_id,
+            ).delete(synchronize_session=False)
+            db.commit()
@@ -0,0 +1,186 @@
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy import Select, Update, select, update
+
+try:
+    import zstandard
+except ImportError:  # zlib is used when zstandard is not installed
+    zstandard = None
+
+from app.config import get_settings
+from app.models import DocumentPage, PDFDocument
+
+settings = get_settings()
+
+ZSTD = "zstd"
+ZLIB = "zlib"
+
+
+def compress_page(text: str) -> tuple[str, bytes]:
+    """
+    Compress the text of one page.
+
+    Returns:
+        Tuple of (codec name, compressed bytes)
+    """
+    data = text.encode("utf-8")
+    if zstandard is not None:
+        return ZSTD, zstandard.ZstdCompressor(level=settings.text_compression_level).compress(data)
+    return ZLIB, zlib.compress(data, min(settings.text_compression_level, 9))
+
+
+def decompress_page(codec: str, data: bytes) -> str:
+    """Return the text of a page stored by compress_page."""
+    if codec == ZSTD:
+        if zstandard is None:
+            raise Exception("Reading zstd-compressed text requires the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    raise Exception(f"Unknown text codec '{codec}'")
+
+
+class PageTextWriter:
+    """
+    Compresses pages as they stream past, for storing the full text at the end.
+
+    Wrap the (page number, text) iterator with ``track``; every page is
+    compressed once as it is consumed, so the whole document is only held in
+    compressed form. Pages are stored under their number in the PDF, so
+    blank pages (which extraction skips) leave gaps rather than shifting
+    the pages after them.
+    """
+
+    def __init__(self):
+        self.pages: list[tuple[int, str, bytes, int]] = []  # (page number, codec, data, char count)
+        self.raw_bytes = 0
+
+    def track(self, pages: Iterable[Tuple[int, str]]) -> Iterator[str]:
+        """Yield the text of each (page number, text) pair, compressing it on the way."""
+        for number, page in pages:
+            codec, data = compress_page(page)
+            self.pages.append((number, codec, data, len(page)))
+            self.raw_bytes += len(page.encode("utf-8"))
+            yield page
+
+    @property
+    def compressed_bytes(self) -> int:
+        return sum(len(data) for _, _, data, _ in self.pages)
+
+    def save(self, db, document_id: int) -> None:
+        """
+        Replace the stored text of a document with the tracked pages (the caller commits).
+
+        Args:
+            db: Sync session
+            document_id: ID of the PDFDocument the text belongs to
+        """
+        db.query(DocumentPage).filter(DocumentPage.pdf_document_id == document_id).delete(
+            synchronize_session=False
+        )
+        db.bulk_insert_mappings(DocumentPage, [
+            {
+                "pdf_document_id": document_id,
+                "page_number": number,
+                "codec": codec,
+                "char_count": char_count,
+                "data": data,
+            }
+            for number, codec, data, char_count in self.pages
+        ])
+
+
+def text_source_query(content_hash: str) -> Select:
+    """
+    Select the ID of a document whose full text is stored, among documents with identical content.
+
+    Text is stored once, with the document that was extracted; identical
+    uploads (deduplicated, or re-summarized later) read it from there. When
+    that document is deleted the pages move to another one (text_heir_query).
+    """
+    return (
+        select(PDFDocument.id)
+        .where(
+            PDFDocument.content_hash == content_hash,
+            select(DocumentPage.id).where(DocumentPage.pdf_document_id == PDFDocument.id).exists(),
+        )
+        .order_by(PDFDocument.created_at)
+        .limit(1)
+    )
+
+
+def text_heir_query(document_id: int, content_hash: str) -> Select:
+    """
+    Select the ID of the document that takes over the stored text of ``document_id`` when it is deleted.
+
+    That is the oldest other document with identical content, so the text
+    stays readable by every upload that shares it.
+    """
+    return (
+        select(PDFDocument.id)
+        .where(PDFDocument.content_hash == content_hash, PDFDocument.id != document_id)
+        .order_by(PDFDocument.created_at)
+        .limit(1)
+    )
+
+
+def move_pages_statement(from_document_id: int, to_document_id: int) -> Update:
+    """Reassign the stored pages of one document to another (the caller commits)."""
+    return (
+        update(DocumentPage)
+        .where(DocumentPage.pdf_document_id == from_document_id)
+        .values(pdf_document_id=to_document_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def page_range_query(
+    document_id: int, start: int = 1, end: Optional[int] = None, limit: Optional[int] = None
+) -> Select:
+    """
+    Select the stored pages ``start`` to ``end`` (1-based, inclusive) of a document, in order.
+
+    Only the rows of the range are fetched (at most ``limit``); each one is
+    decompressed on its own with decompress_page. Blank pages have no row.
+    """
+    query = (
+        select(DocumentPage.page_number, DocumentPage.codec, DocumentPage.data)
+        .where(DocumentPage.pdf_document_id == document_id, DocumentPage.page_number >= start)
+        .order_by(DocumentPage.page_number)
+    )
+    if end is not None:
+        query = query.where(DocumentPage.page_number <= end)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def iter_stored_pages(
+    session_factory, document_id: int, start: int = 1, end: Optional[int] = None, batch_size: int = 32
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield the stored pages ``start`` to ``end`` of a document, decompressing lazily.
+
+    Rows are fetched ``batch_size`` pages at a time, each batch in its own
+    short session (so no read stays open while the caller writes), and
+    memory stays bounded by one batch of compressed pages.
+
+    Args:
+        session_factory: Sync session factory
+        document_id: ID of the PDFDocument holding the text
+        start: First page (1-based)
+        end: Last page, inclusive (None for the last page of the document)
+        batch_size: Pages fetched per round trip
+
+    Yields:
+        Tuples of (page number in the PDF, page text); blank pages are skipped
+    """
+    while True:
+        with session_factory() as db:
+            rows = db.execute(page_range_query(document_id, start, end, limit=batch_size)).all()
+        for number, codec, data in rows:
+            yield number, decompress_page(codec, data)
+        if len(rows) < batch_size:
+            return
+        start = rows[-1][0] + 1
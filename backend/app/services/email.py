@@ -1,14 +1,31 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content
+from functools import lru_cache
+from typing import Optional
+
+import httpx
 
 from app.config import get_settings
 
 settings = get_settings()
 
+# Status codes worth another attempt (rate limiting and server errors)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class EmailNotConfigured(Exception):
+    """No SendGrid API key is configured, so emails are skipped."""
+
+
+class EmailDeliveryError(Exception):
+    """SendGrid did not accept the message."""
 
-async def send_summary_email(to_email: str, filename: str, summary_content: str) -> bool:
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def build_summary_email(to_email: str, filename: str, summary_content: str) -> dict:
     """
-    Send summary email using SendGrid.
+    Build the SendGrid v3 ``mail/send`` payload of a summary email.
 
     Args:
         to_email: Recipient email address
@@ -16,16 +33,11 @@ async def send_summary_email(to_email: str, filename: str, summary_content: str)
         summary_content: The generated summary
 
     Returns:
-        True if email sent successfully, False otherwise
+        JSON payload
     """
-    if not settings.sendgrid_api_key:
-        print("SendGrid API key not configured, skipping email")
-        return False
-
-    try:
-        subject = f"Your PDF Summary: {filename}"
+    subject = f"Your PDF Summary: {filename}"
 
-        html_content = f"""
+    html_content = f"""
         <html>
         <head>
             <style>
@@ -62,7 +74,7 @@ async def send_summary_email(to_email: str, filename: str, summary_content: str)
         </html>
         """
 
-        plain_content = f"""
+    plain_content = f"""
 PDF Summary Ready
 
 Your summary for "{filename}" has been generated successfully.
@@ -75,102 +87,88 @@ View your summary in the dashboard: {settings.frontend_url}/dashboard
 This email was sent by PDF Summarizer.
         """
 
-        message = Mail(
-            from_email=Email(settings.from_email, "PDF Summarizer"),
-            to_emails=To(to_email),
-            subject=subject,
-        )
-        message.content = [
-            Content("text/plain", plain_content),
-            Content("text/html", html_content),
-        ]
-
-        sg = SendGridAPIClient(settings.sendgrid_api_key)
-        response = sg.send(message)
-
-        return response.status_code in [200, 201, 202]
-
-    except Exception as e:
-        print(f"Failed to send email: {str(e)}")
-        return False
+    return {
+        "personalizations": [{"to": [{"email": to_email}]}],
+        "from": {"email": settings.from_email, "name": "PDF Summarizer"},
+        "subject": subject,
+        "content": [
+            {"type": "text/plain", "value": plain_content},
+            {"type": "text/html", "value": html_content},
+        ],
+    }
 
 
-def send_summary_email_sync(to_email: str, filename: str, summary_content: str) -> bool:
+class SendGridClient:
     """
-    Synchronous version of send_summary_email for use in Celery tasks.
+    Sends mail through the SendGrid v3 HTTP API over a pooled connection.
+
+    One instance is shared by all threads of a process (see get_email_client),
+    so messages reuse keep-alive connections instead of opening a new client
+    and TLS session each. ``base_url`` can point at a local stub server.
     """
-    if not settings.sendgrid_api_key:
-        print("SendGrid API key not configured, skipping email")
-        return False
 
-    try:
-        subject = f"Your PDF Summary: {filename}"
+    def __init__(self, api_key: str, base_url: str, timeout: float, max_connections: int):
+        self._client = httpx.Client(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
 
-        html_content = f"""
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background-color: #4F46E5; color: white; padding: 20px; border-radius: 8px 8px 0 0; }}
-                .content {{ background-color: #f9fafb; padding: 20px; border: 1px solid #e5e7eb; }}
-                .summary {{ background-color: white; padding: 20px; border-radius: 8px; margin-top: 15px; }}
-                .footer {{ text-align: center; padding: 20px; color: #6b7280; font-size: 12px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1 style="margin: 0;">PDF Summary Ready</h1>
-                </div>
-                <div class="content">
-                    <p>Your summary for <strong>{filename}</strong> has been generated successfully.</p>
-                    <div class="summary">
-                        <h3>Summary</h3>
-                        <p>{summary_content.replace(chr(10), '<br>')}</p>
-                    </div>
-                    <p style="margin-top: 20px;">
-                        <a href="{settings.frontend_url}/dashboard" style="background-color: #4F46E5; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
-                            View in Dashboard
-                        </a>
-                    </p>
-                </div>
-                <div class="footer">
-                    <p>This email was sent by PDF Summarizer. Please do not reply to this email.</p>
-                </div>
-            </div>
-        </body>
-        </html>
+    def send(self, payload: dict) -> Optional[str]:
         """
+        Send one message.
 
-        plain_content = f"""
-PDF Summary Ready
-
-Your summary for "{filename}" has been generated successfully.
-
-SUMMARY:
-{summary_content}
+        Returns:
+            SendGrid's message ID, if it returned one
 
-View your summary in the dashboard: {settings.frontend_url}/dashboard
-
-This email was sent by PDF Summarizer.
+        Raises:
+            EmailDeliveryError: If the message was not accepted
         """
+        try:
+            response = self._client.post("/v3/mail/send", json=payload)
+        except httpx.HTTPError as e:
+            raise EmailDeliveryError(f"SendGrid request failed: {str(e)}", retryable=True)
+
+        if response.status_code not in (200, 201, 202):
+            raise EmailDeliveryError(
+                f"SendGrid returned {response.status_code}: {response.text[:500]}",
+                retryable=response.status_code in RETRYABLE_STATUS_CODES,
+            )
+        return response.headers.get("X-Message-Id")
+
+    def close(self) -> None:
+        self._client.close()
+
+
+@lru_cache()
+def get_email_client() -> SendGridClient:
+    """Return the process-wide SendGrid client."""
+    return SendGridClient(
+        api_key=settings.sendgrid_api_key,
+        base_url=settings.sendgrid_api_url,
+        timeout=settings.email_timeout,
+        max_connections=settings.email_max_connections,
+    )
+
+
+def send_summary_email(to_email: str, filename: str, summary_content: str) -> Optional[str]:
+    """
+    Send a summary email through the shared SendGrid client (called from Celery tasks).
 
-        message = Mail(
-            from_email=Email(settings.from_email, "PDF Summarizer"),
-            to_emails=To(to_email),
-            subject=subject,
-        )
-        message.content = [
-            Content("text/plain", plain_content),
-            Content("text/html", html_content),
-        ]
+    Args:
+        to_email: Recipient email address
+        filename: Original PDF filename
+        summary_content: The generated summary
 
-        sg = SendGridAPIClient(settings.sendgrid_api_key)
-        response = sg.send(message)
+    Returns:
+        SendGrid's message ID, if it returned one
 
-        return response.status_code in [200, 201, 202]
+    Raises:
+        EmailNotConfigured: If no SendGrid API key is configured
+        EmailDeliveryError: If SendGrid did not accept the message
+    """
+    if not settings.sendgrid_api_key:
+        raise EmailNotConfigured("SendGrid API key not configured, skipping email")
 
-    except Exception as e:
-        print(f"Failed to send email: {str(e)}")
-        return False
+    return get_email_client().send(build_summary_email(to_email, filename, summary_content))
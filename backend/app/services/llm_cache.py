@@ -0,0 +1,203 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+import redis
+
+from app.config import get_settings
+
+settings = get_settings()
+
+KEY_PREFIX = "llm-cache:"
+HITS_KEY = f"{KEY_PREFIX}stats:hits"
+MISSES_KEY = f"{KEY_PREFIX}stats:misses"
+
+
+def make_cache_key(prompt, llm, text: str) -> str:
+    """
+    Build a cache key from the prompt template, model parameters and input text.
+
+    Args:
+        prompt: The ChatPromptTemplate the text is rendered into
+        llm: Language model instance
+        text: The input text (e.g. a document chunk)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    params = getattr(llm, "_identifying_params", None) or {"type": type(llm).__name__}
+    digest = hashlib.sha256()
+    digest.update(repr(prompt.messages).encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    digest.update(text.encode())
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-level cache for LLM responses: an in-process LRU in front of Redis.
+
+    The in-process layer evicts least recently used entries once
+    ``max_memory_bytes`` is exceeded; both layers expire entries after
+    ``ttl`` seconds. Redis is shared by all workers, so a response computed
+    by one worker is reused by every other one. Redis errors are logged and
+    treated as misses, the cache never fails a summarization.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str],
+        ttl: int,
+        max_memory_bytes: int,
+        max_entry_bytes: int,
+    ):
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+        self._entries: OrderedDict[str, tuple[float, str, int]] = OrderedDict()  # key -> (expires at, value, bytes)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for ``key``, or None."""
+        value = self._get_local(key)
+        if value is not None:
+            self.memory_hits += 1
+            self._count(HITS_KEY)
+            return value
+
+        value = self._get_redis(key)
+        if value is not None:
+            self.redis_hits += 1
+            self._count(HITS_KEY)
+            self._set_local(key, value)
+            return value
+
+        self.misses += 1
+        self._count(MISSES_KEY)
+        return None
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        """Return cached responses for ``keys`` (missing keys are left out), using one Redis round-trip."""
+        found = {}
+        remote = []
+        for key in dict.fromkeys(keys):
+            value = self._get_local(key)
+            if value is not None:
+                found[key] = value
+            else:
+                remote.append(key)
+        self.memory_hits += len(found)
+
+        if remote and self._redis is not None:
+            try:
+                values = self._redis.mget([KEY_PREFIX + key for key in remote])
+            except redis.RedisError as e:
+                print(f"LLM cache read failed: {str(e)}")
+                values = [None] * len(remote)
+            for key, value in zip(remote, values):
+                if value is not None:
+                    found[key] = value.decode()
+                    self._set_local(key, found[key])
+                    self.redis_hits += 1
+
+        misses = len(dict.fromkeys(keys)) - len(found)
+        self.misses += misses
+        self._count(HITS_KEY, len(found))
+        self._count(MISSES_KEY, misses)
+        return found
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response in both layers (oversized responses are not cached)."""
+        if len(value.encode()) > self.max_entry_bytes:
+            return
+        self._set_local(key, value)
+        if self._redis is not None:
+            try:
+                self._redis.setex(KEY_PREFIX + key, self.ttl, value)
+            except redis.RedisError as e:
+                print(f"LLM cache write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process, plus cluster-wide counters from Redis."""
+        stats = {
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._entries),
+            "memory_bytes": self._memory_bytes,
+        }
+        if self._redis is not None:
+            try:
+                hits, misses = self._redis.mget(HITS_KEY, MISSES_KEY)
+                stats["cluster_hits"] = int(hits or 0)
+                stats["cluster_misses"] = int(misses or 0)
+            except redis.RedisError as e:
+                print(f"LLM cache stats unavailable: {str(e)}")
+        return stats
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.time():
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            # Counted in UTF-8 bytes, like max_entry_bytes (len() would count characters)
+            size = len(value.encode())
+            self._entries[key] = (time.time() + self.ttl, value, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes and self._entries:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._memory_bytes -= size
+
+    def _get_redis(self, key: str) -> Optional[str]:
+        if self._redis is None:
+            return None
+        try:
+            value = self._redis.get(KEY_PREFIX + key)
+        except redis.RedisError as e:
+            print(f"LLM cache read failed: {str(e)}")
+            return None
+        return value.decode() if value is not None else None
+
+    def _count(self, counter_key: str, amount: int = 1) -> None:
+        if self._redis is None or amount <= 0:
+            return
+        try:
+            self._redis.incrby(counter_key, amount)
+        except redis.RedisError:
+            pass
+
+
+@lru_cache()
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide LLM response cache, or None when disabled."""
+    if not settings.llm_cache_enabled:
+        return None
+    return LLMResponseCache(
+        redis_url=settings.redis_url if settings.llm_cache_redis else None,
+        ttl=settings.llm_cache_ttl,
+        max_memory_bytes=settings.llm_cache_memory_bytes,
+        max_entry_bytes=settings.llm_cache_max_entry_bytes,
+    )
@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, Optional
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class LLMTimeoutError(Exception):
+    """An LLM call did not complete within its deadline."""
+
+
+class LLMGateway:
+    """
+    Process-wide entry point for LLM calls.
+
+    Holds one pooled keep-alive HTTP client, shared by every chat model the
+    gateway creates, so calls reuse connections across chunks and documents
+    instead of opening a client per summarization. Every call gets a
+    deadline (``timeout`` seconds, retries included); a call still running
+    at its deadline raises LLMTimeoutError instead of stalling the task.
+
+    With hedging enabled, a call that has not returned after the
+    ``hedge_quantile`` latency of recent calls is sent a second time, and
+    whichever response arrives first is used. The slower request is
+    abandoned (it ends at the HTTP timeout at the latest). Hedging starts
+    once ``hedge_min_samples`` latencies have been observed.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        temperature: float,
+        base_url: Optional[str] = None,
+        timeout: float = 120.0,
+        max_connections: int = 16,
+        max_retries: int = 2,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_min_delay: float = 1.0,
+        latency_window: int = 200,
+    ):
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self._http = httpx.Client(
+            timeout=timeout or None,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._llm_params = {
+            "model": model,
+            "temperature": temperature,
+            "openai_api_key": api_key,
+            "openai_api_base": base_url,
+            "request_timeout": timeout or None,
+            "max_retries": max_retries,
+        }
+        self._llm: Optional[ChatOpenAI] = None
+        # Primary requests and their hedges run here; the caller only waits
+        self._executor = ThreadPoolExecutor(2 * max_connections, thread_name_prefix="llm-gateway")
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    @property
+    def llm(self) -> ChatOpenAI:
+        """The chat model bound to the pooled client, created on first use (it needs an API key)."""
+        with self._lock:
+            if self._llm is None:
+                self._llm = ChatOpenAI(**self._llm_params, http_client=self._http)
+            return self._llm
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a call is hedged, or None while hedging is off or still warming up."""
+        if not self.hedge:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(self.hedge_quantile * len(latencies)))
+        return max(self.hedge_min_delay, latencies[index])
+
+    def _attempt(self, llm, prompt_value, config, before: Optional[Callable[[], object]] = None):
+        if before is not None:
+            before()
+        started = time.monotonic()
+        message = llm.invoke(prompt_value, config)
+        # Abandoned attempts are recorded too, so hedging never hides the true tail
+        with self._lock:
+            self._latencies.append(time.monotonic() - started)
+        return message
+
+    def invoke(self, llm, prompt_value, config=None, before_hedge: Optional[Callable[[], object]] = None):
+        """
+        Call ``llm`` with the deadline and, if enabled, a hedged second request.
+
+        Args:
+            llm: Chat model (or any runnable) to call, usually ``self.llm``
+            prompt_value: The rendered prompt
+            config: Runnable config passed through to ``llm``
+            before_hedge: Called in the hedge's thread before it is sent,
+                e.g. to reserve it from the rate limiter
+
+        Returns:
+            The first successful response
+
+        Raises:
+            LLMTimeoutError: If no response arrived within ``self.timeout`` seconds
+        """
+        with self._lock:
+            self.calls += 1
+        started = time.monotonic()
+        deadline = started + self.timeout if self.timeout > 0 else None
+        delay = self.hedge_delay()
+
+        primary = self._executor.submit(self._attempt, llm, prompt_value, config)
+        pending = {primary}
+        hedged = False
+        error: Optional[Exception] = None
+
+        while pending:
+            now = time.monotonic()
+            wake_at = deadline
+            if delay is not None and not hedged:
+                wake_at = min(wake_at, started + delay) if wake_at else started + delay
+            done, pending = wait(
+                pending,
+                timeout=None if wake_at is None else max(0.0, wake_at - now),
+                return_when=FIRST_COMPLETED,
+            )
+
+            for future in done:
+                try:
+                    message = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if future is not primary:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return message
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                with self._lock:
+                    self.timeouts += 1
+                raise LLMTimeoutError(f"LLM call did not complete within {self.timeout:g}s")
+            if delay is not None and not hedged and now >= started + delay and pending:
+                hedged = True
+                with self._lock:
+                    self.hedged_calls += 1
+                pending.add(self._executor.submit(self._attempt, llm, prompt_value, config, before_hedge))
+
+        with self._lock:
+            self.errors += 1
+        raise error
+
+    def stats(self) -> dict:
+        """Call, hedge and latency counters for this process."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        stats = {
+            "calls": self.calls,
+            "hedged_calls": self.hedged_calls,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "hedge_delay": self.hedge_delay(),
+        }
+        if latencies:
+            stats["p50_seconds"] = round(latencies[len(latencies) // 2], 3)
+            stats["p95_seconds"] = round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 3)
+        return stats
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self._http.close()
+
+
+@lru_cache()
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide LLM gateway."""
+    return LLMGateway(
+        api_key=settings.openai_api_key,
+        model=settings.llm_model,
+        temperature=settings.llm_temperature,
+        base_url=settings.openai_base_url,
+        timeout=settings.llm_call_timeout,
+        max_connections=settings.llm_max_connections,
+        max_retries=settings.llm_max_retries,
+        hedge=settings.llm_hedge_enabled,
+        hedge_quantile=settings.llm_hedge_quantile,
+        hedge_min_samples=settings.llm_hedge_min_samples,
+        hedge_min_delay=settings.llm_hedge_min_delay,
+    )
@@ -0,0 +1,98 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Select, tuple_
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Encode the position after a row as an opaque cursor.
+
+    Args:
+        created_at: The row's creation timestamp
+        row_id: The row's primary key (breaks ties between equal timestamps)
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decode a cursor made by encode_cursor.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {str(e)}")
+
+
+def paginate(
+    query: Select,
+    created_column,
+    id_column,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> Select:
+    """
+    Order a listing newest first and select one page of it.
+
+    With a cursor the page starts right after the cursor's row (keyset
+    pagination): the database seeks directly to it through an index on
+    ``(created_at, id)``, so every page costs the same however deep it is.
+    Without one, ``skip`` rows are skipped (offset pagination, kept for
+    compatibility; its cost grows with the offset).
+
+    One extra row is selected, so callers can tell whether another page
+    follows (see next_cursor).
+
+    Args:
+        query: Select statement filtered to the rows to list
+        created_column: Creation timestamp column to order by
+        id_column: Primary key column, the tie breaker
+        limit: Page size
+        skip: Rows to skip when no cursor is given
+        cursor: Cursor returned with the previous page
+
+    Returns:
+        The paginated statement
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    query = query.order_by(created_column.desc(), id_column.desc()).limit(limit + 1)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        return query.where(tuple_(created_column, id_column) < tuple_(created_at, row_id))
+    return query.offset(skip)
+
+
+def next_cursor(rows: list, limit: int) -> tuple[list, Optional[str]]:
+    """
+    Split the rows of a paginate() query into the page and the cursor of the next page.
+
+    Args:
+        rows: Rows returned by the query (objects with ``created_at`` and ``id``)
+        limit: Page size passed to paginate
+
+    Returns:
+        Tuple of (rows of this page, cursor for the next page or None on the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
@@ -0,0 +1,152 @@
+from typing import Optional
+
+from pypdf import PdfReader
+
+try:
+    import pymupdf
+except ImportError:  # optional, pypdf is always available
+    pymupdf = None
+
+from app.config import get_settings
+
+settings = get_settings()
+
+METADATA_FIELDS = ("title", "author", "subject", "creator", "producer")
+
+
+class PdfEngine:
+    """
+    Interface of a PDF text extraction backend.
+
+    Engines are stateless; ``open`` returns an engine-specific document
+    object that is passed back to the other methods.
+    """
+
+    name = ""
+
+    def open(self, file_path: str, buffer=None):
+        """Open a document from ``file_path``, or from ``buffer`` (e.g. a memory map of it) if given."""
+        raise NotImplementedError
+
+    def page_count(self, document) -> int:
+        raise NotImplementedError
+
+    def page_text(self, document, index: int) -> str:
+        raise NotImplementedError
+
+    def metadata(self, document) -> dict:
+        raise NotImplementedError
+
+    def outline(self, document) -> list[dict]:
+        """Return the bookmarks as ``{"level", "title", "page"}`` dicts (pages are 1-based)."""
+        raise NotImplementedError
+
+    def close(self, document) -> None:
+        pass
+
+
+class PypdfEngine(PdfEngine):
+    """Pure-Python extraction with pypdf."""
+
+    name = "pypdf"
+
+    def open(self, file_path: str, buffer=None):
+        # pypdf reads a file path fully into memory; a memory map is read lazily
+        return PdfReader(buffer if buffer is not None else file_path)
+
+    def page_count(self, document) -> int:
+        return len(document.pages)
+
+    def page_text(self, document, index: int) -> str:
+        return document.pages[index].extract_text() or ""
+
+    def metadata(self, document) -> dict:
+        metadata = document.metadata
+        return {field: (getattr(metadata, field) if metadata else "") or "" for field in METADATA_FIELDS}
+
+    def outline(self, document) -> list[dict]:
+        entries = []
+
+        def walk(items: list, level: int) -> None:
+            for item in items:
+                if isinstance(item, list):
+                    walk(item, level + 1)
+                    continue
+                page = document.get_destination_page_number(item)
+                entries.append({
+                    "level": level,
+                    "title": item.title,
+                    "page": page + 1 if page is not None and page >= 0 else None,
+                })
+
+        walk(document.outline, 1)
+        return entries
+
+
+class PyMuPDFEngine(PdfEngine):
+    """Extraction with PyMuPDF (MuPDF bindings), several times faster than pypdf."""
+
+    name = "pymupdf"
+
+    def open(self, file_path: str, buffer=None):
+        # MuPDF does its own (unbuffered) file access, so the path is always used
+        return pymupdf.open(file_path)
+
+    def page_count(self, document) -> int:
+        return document.page_count
+
+    def page_text(self, document, index: int) -> str:
+        return document.load_page(index).get_text("text") or ""
+
+    def metadata(self, document) -> dict:
+        metadata = document.metadata or {}
+        return {field: metadata.get(field) or "" for field in METADATA_FIELDS}
+
+    def outline(self, document) -> list[dict]:
+        return [
+            {"level": level, "title": title, "page": page if page > 0 else None}
+            for level, title, page in document.get_toc()
+        ]
+
+    def close(self, document) -> None:
+        document.close()
+
+
+ENGINES = {
+    PyMuPDFEngine.name: PyMuPDFEngine,
+    PypdfEngine.name: PypdfEngine,
+}
+
+
+def available_engines() -> list[str]:
+    """Return the names of the engines whose libraries are installed, fastest first."""
+    return [name for name in ENGINES if name != PyMuPDFEngine.name or pymupdf is not None]
+
+
+def get_engine(name: Optional[str] = None) -> PdfEngine:
+    """
+    Return an extraction engine by name.
+
+    Args:
+        name: "pypdf", "pymupdf" or "auto" (defaults to settings.pdf_engine);
+            "auto" picks the fastest installed engine
+
+    Returns:
+        Engine instance
+    """
+    name = name or settings.pdf_engine
+    if name == "auto":
+        name = available_engines()[0]
+    if name not in ENGINES:
+        raise Exception(f"Unknown PDF engine '{name}', expected one of: auto, {', '.join(ENGINES)}")
+    if name not in available_engines():
+        raise Exception(f"PDF engine '{name}' is not installed")
+    return ENGINES[name]()
+
+
+def get_fallback_engine(engine: PdfEngine) -> Optional[PdfEngine]:
+    """Return another installed engine to retry pages that ``engine`` found empty, if any."""
+    for name in available_engines():
+        if name != engine.name:
+            return ENGINES[name]()
+    return None
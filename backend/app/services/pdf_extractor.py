@@ -1,91 +1,436 @@
-from pypdf import PdfReader
-from typing import Tuple
+import mmap
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple, Union
 import re
 
+from app.config import get_settings
+from app.services.pdf_engines import PdfEngine, get_engine, get_fallback_engine
 
-def extract_text_from_pdf(file_path: str) -> Tuple[str, int]:
+settings = get_settings()
+
+
+def extract_text_from_pdf(
+    file_path: str,
+    workers: Optional[int] = None,
+    engine: Optional[str] = None,
+    fallback: Optional[bool] = None,
+    timings: Optional[dict] = None,
+) -> Tuple[str, int]:
     """
-    Extract text content from a PDF file using pypdf.
+    Extract text content from a PDF file.
+
+    PDFs with at least ``parallel_min_pages(engine)`` pages are split into
+    page ranges that are extracted by a pool of processes, each opening the
+    file itself; smaller PDFs are extracted in-process.
 
     Args:
         file_path: Path to the PDF file
+        workers: Number of extraction processes (defaults to settings.extraction_workers)
+        engine: Extraction engine name (defaults to settings.pdf_engine)
+        fallback: Retry empty pages with the other engine (defaults to settings.pdf_engine_fallback)
+        timings: Optional dict that receives per-engine page counts and seconds
 
     Returns:
         Tuple of (extracted_text, page_count)
     """
-    text_content = []
-    page_count = 0
+    page_count, pages = open_pdf_pages(file_path, workers, engine, fallback, timings)
+    return "\n\n".join(pages), page_count
 
-    try:
-        reader = PdfReader(file_path)
-        page_count = len(reader.pages)
 
-        for page_num, page in enumerate(reader.pages, 1):
-            page_text = page.extract_text()
+def open_pdf_pages(
+    source: Union[str, "PdfDocumentHandle"],
+    workers: Optional[int] = None,
+    engine: Optional[str] = None,
+    fallback: Optional[bool] = None,
+    timings: Optional[dict] = None,
+) -> Tuple[int, Iterator[str]]:
+    """
+    Open a PDF for streaming extraction.
+
+    Pages are extracted lazily and cleaned one at a time, so only a few
+    pages of text are held in memory; consumers can start working on the
+    first pages while later ones are still being extracted.
+
+    Args:
+        source: Path to the PDF file, or an open PdfDocumentHandle (which is
+            closed once all pages have been read)
+        workers: Number of extraction processes (defaults to settings.extraction_workers)
+        engine: Extraction engine name (defaults to settings.pdf_engine, ignored for handles)
+        fallback: Retry empty pages with the other engine (defaults to
+            settings.pdf_engine_fallback, ignored for handles)
+        timings: Optional dict that receives per-engine page counts and seconds
+            once all pages have been read
 
-            if page_text and page_text.strip():
-                text_content.append(f"--- Page {page_num} ---\n{page_text}")
+    Returns:
+        Tuple of (page_count, iterator over cleaned non-empty page texts);
+        joining the pages with blank lines gives the same text as
+        extract_text_from_pdf
+    """
+    page_count, pages = open_numbered_pdf_pages(source, workers, engine, fallback, timings)
+    return page_count, (text for _, text in pages)
 
+
+def open_numbered_pdf_pages(
+    source: Union[str, "PdfDocumentHandle"],
+    workers: Optional[int] = None,
+    engine: Optional[str] = None,
+    fallback: Optional[bool] = None,
+    timings: Optional[dict] = None,
+) -> Tuple[int, Iterator[Tuple[int, str]]]:
+    """
+    open_pdf_pages, yielding every page with its page number in the PDF.
+
+    Blank pages are skipped, so the numbers tell where each page really is
+    (e.g. for storing the text by page, or reporting progress).
+
+    Returns:
+        Tuple of (page_count, iterator over (1-based page number, cleaned text)
+        of the non-empty pages)
+    """
+    try:
+        if isinstance(source, PdfDocumentHandle):
+            handle = source
+        else:
+            handle = PdfDocumentHandle(source, engine, fallback)
+        page_count = handle.page_count
     except Exception as e:
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
-    full_text = "\n\n".join(text_content)
+    def pages() -> Iterator[Tuple[int, str]]:
+        normalizer = TextNormalizer()
+        try:
+            raw_pages = iter_raw_pages(handle, page_count, workers)
+            for page_num, page_text in enumerate(raw_pages, 1):
+                if not page_text or page_text.isspace():
+                    continue
+                if normalizer.started:
+                    # The separator always normalizes to at least two newlines;
+                    # any more come from whitespace at the end of the previous page
+                    yield page_num, normalizer.feed(f"\n\n--- Page {page_num} ---\n{page_text}")[2:]
+                else:
+                    yield page_num, normalizer.feed(f"--- Page {page_num} ---\n{page_text}")
+        except Exception as e:
+            raise Exception(f"Failed to extract text from PDF: {str(e)}")
+        finally:
+            handle.close()
+
+        print(f"Extracted {page_count} pages from {os.path.basename(handle.file_path)}: {handle.describe_timings()}")
+        if timings is not None:
+            timings.update(handle.timings)
+
+    return page_count, pages()
+
+
+class PdfDocumentHandle:
+    """
+    A PDF opened once and shared by metadata and text extraction.
+
+    The file is memory-mapped, so engines that take a buffer read it lazily
+    instead of copying it into Python bytes, and the xref table and page
+    tree are parsed once for everything the handle provides. Metadata, page
+    count and outline are loaded on first access. Page text comes from the
+    primary engine, optionally retrying empty pages with a fallback engine
+    (opened only when a page needs it); time spent in each engine is
+    accumulated in ``timings`` as ``{engine: {"pages": n, "seconds": s}}``.
+    """
+
+    def __init__(self, file_path: str, engine: Optional[str] = None, fallback: Optional[bool] = None):
+        self.file_path = file_path
+        self.engine = get_engine(engine)
+        if fallback is None:
+            fallback = settings.pdf_engine_fallback
+        self.fallback_engine = get_fallback_engine(self.engine) if fallback else None
+        self.timings: dict[str, dict] = {}
+        self._file = open(file_path, "rb")
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            self._buffer = None
+        self._documents: dict[str, object] = {}
+        self._page_count: Optional[int] = None
+        self._metadata: Optional[dict] = None
+        self._outline: Optional[list[dict]] = None
+
+    @property
+    def page_count(self) -> int:
+        if self._page_count is None:
+            self._page_count = self.engine.page_count(self._document(self.engine))
+        return self._page_count
+
+    @property
+    def metadata(self) -> dict:
+        """Title, author, subject, creator and producer (empty strings when missing)."""
+        if self._metadata is None:
+            self._metadata = self.engine.metadata(self._document(self.engine))
+        return self._metadata
+
+    @property
+    def outline(self) -> list[dict]:
+        """Bookmarks as ``{"level", "title", "page"}`` dicts, in document order."""
+        if self._outline is None:
+            try:
+                self._outline = self.engine.outline(self._document(self.engine))
+            except Exception as e:
+                print(f"Could not read outline of {os.path.basename(self.file_path)}: {str(e)}")
+                self._outline = []
+        return self._outline
+
+    def page_text(self, index: int) -> str:
+        """Return the raw text of page ``index`` (0-based)."""
+        text = self._page_text(self.engine, index)
+        if self.fallback_engine and (not text or text.isspace()):
+            text = self._page_text(self.fallback_engine, index) or text
+        return text
+
+    def add_timings(self, timings: dict) -> None:
+        """Merge timings collected by another handle (e.g. in a worker process)."""
+        for name, entry in timings.items():
+            total = self.timings.setdefault(name, {"pages": 0, "seconds": 0.0})
+            total["pages"] += entry["pages"]
+            total["seconds"] += entry["seconds"]
+
+    def describe_timings(self) -> str:
+        return ", ".join(
+            f"{name} {entry['pages']} pages in {entry['seconds']:.3f}s"
+            for name, entry in self.timings.items()
+        )
+
+    def close(self) -> None:
+        for name, document in self._documents.items():
+            get_engine(name).close(document)
+        self._documents.clear()
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        self._file.close()
+
+    def __enter__(self) -> "PdfDocumentHandle":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _document(self, engine: PdfEngine):
+        if engine.name not in self._documents:
+            started = time.perf_counter()
+            self._documents[engine.name] = engine.open(self.file_path, self._buffer)
+            self._record(engine, 0, started)
+        return self._documents[engine.name]
+
+    def _page_text(self, engine: PdfEngine, index: int) -> str:
+        document = self._document(engine)
+        started = time.perf_counter()
+        text = engine.page_text(document, index)
+        self._record(engine, 1, started)
+        return text
+
+    def _record(self, engine: PdfEngine, pages: int, started: float) -> None:
+        self.add_timings({engine.name: {"pages": pages, "seconds": time.perf_counter() - started}})
 
-    # Clean up text
-    full_text = clean_extracted_text(full_text)
 
-    return full_text, page_count
+def iter_raw_pages(
+    handle: PdfDocumentHandle, page_count: int, workers: Optional[int] = None
+) -> Iterator[str]:
+    """Yield the raw text of every page, in page order (in parallel for large PDFs)."""
+    workers = resolve_extraction_workers(workers)
+    if workers > 1 and page_count >= parallel_min_pages(handle.engine.name):
+        yield from iter_pages_parallel(handle, page_count, workers)
+    else:
+        for index in range(page_count):
+            yield handle.page_text(index)
+
+
+def resolve_extraction_workers(workers: Optional[int] = None) -> int:
+    """Return the number of extraction processes to use (0 means one per CPU)."""
+    if workers is None:
+        workers = settings.extraction_workers
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def parallel_min_pages(engine: str) -> int:
+    """Return the page count from which a PDF is extracted by the process pool with ``engine``."""
+    if engine == "pymupdf":
+        return settings.parallel_extraction_min_pages_pymupdf
+    return settings.parallel_extraction_min_pages
+
+
+@lru_cache()
+def _get_extraction_pool(workers: int) -> ProcessPoolExecutor:
+    """Return this process's extraction pool, started on first use and kept for later documents."""
+    context = multiprocessing.get_context(
+        "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    )
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def extract_page_range(
+    file_path: str,
+    start: int,
+    end: int,
+    engine: Optional[str] = None,
+    fallback: Optional[bool] = None,
+) -> Tuple[list[str], dict]:
+    """
+    Extract the raw text of pages ``start`` to ``end - 1``.
+
+    Runs in extraction worker processes, so it opens the file itself.
+
+    Args:
+        file_path: Path to the PDF file
+        start: Index of the first page (0-based)
+        end: Index after the last page
+        engine: Extraction engine name
+        fallback: Retry empty pages with the other engine
+
+    Returns:
+        Tuple of (page texts in page order, per-engine timings)
+    """
+    with PdfDocumentHandle(file_path, engine, fallback) as handle:
+        return [handle.page_text(index) for index in range(start, end)], handle.timings
+
+
+def iter_pages_parallel(handle: PdfDocumentHandle, page_count: int, workers: int) -> Iterator[str]:
+    """
+    Extract all pages with a process pool, sharding contiguous page ranges.
+
+    Pages are yielded in order as soon as their shard is done. The pool is
+    started once per process and shared by every document (and thread), so
+    only the first large PDF pays for starting it. Falls back to
+    in-process extraction when a process pool cannot be used: daemonic
+    processes (Celery prefork children) cannot start one, so the extract
+    queue is consumed by a ``--pool threads`` worker.
+
+    Args:
+        handle: Open PDF (the workers use its file path and engine settings)
+        page_count: Number of pages in the PDF
+        workers: Number of processes
+
+    Yields:
+        Page texts, in page order
+    """
+    if multiprocessing.current_process().daemon:
+        print("Parallel extraction unavailable in a daemonic process (run the extract queue with --pool threads)")
+        for index in range(page_count):
+            yield handle.page_text(index)
+        return
+
+    # A few shards per worker keeps processes busy when page cost is uneven
+    shard_count = min(page_count, workers * 4)
+    bounds = [page_count * i // shard_count for i in range(shard_count + 1)]
+    done = 0
+
+    try:
+        shards = _get_extraction_pool(workers).map(
+            extract_page_range,
+            [handle.file_path] * shard_count,
+            bounds[:-1],
+            bounds[1:],
+            [handle.engine.name] * shard_count,
+            [handle.fallback_engine is not None] * shard_count,
+        )
+        for texts, timings in shards:
+            handle.add_timings(timings)
+            yield from texts
+            done += len(texts)
+    except (AssertionError, BrokenProcessPool, OSError, RuntimeError) as e:
+        if isinstance(e, (BrokenProcessPool, RuntimeError)):
+            # The pool died or was shut down; the next document starts a new one
+            _get_extraction_pool(workers).shutdown(wait=False)
+            _get_extraction_pool.cache_clear()
+        print(f"Parallel extraction unavailable, extracting in-process: {str(e)}")
+        for index in range(done, page_count):
+            yield handle.page_text(index)
+
+
+# Everything clean_extracted_text removes, as one alternation so the text is
+# scanned once. Every match starts at a whitespace character (which lets the
+# regex engine skip ahead to candidates quickly) and only covers characters
+# to delete, so the replacement is always "".
+_CLEANUP_PATTERN = re.compile(
+    r"\s(?:"
+    r"(?<=[^\S\n])[^\S\n]*(?=\n|\Z)"  # whitespace at the end of a line
+    r"|(?<=\n[^\S\n])[^\S\n]*"  # whitespace at the start of a line
+    r"|(?<=\n\n\n)\n*"  # newlines beyond two in a row
+    r"|(?<=  ) *"  # spaces beyond one in a row
+    r")"
+)
 
 
 def clean_extracted_text(text: str) -> str:
     """
     Clean up extracted text by removing excessive whitespace and artifacts.
 
+    Collapses runs of 3+ newlines to 2 and runs of spaces to one, strips
+    every line and then the whole text, in a single regex pass.
+
     Args:
         text: Raw extracted text
 
     Returns:
         Cleaned text
     """
-    # Replace multiple newlines with double newlines
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    return _CLEANUP_PATTERN.sub("", text).strip()
+
+
+class TextNormalizer:
+    """
+    Incremental version of clean_extracted_text for text that arrives in pieces.
+
+    Concatenating the results of feed() for every piece gives exactly
+    clean_extracted_text of the concatenated pieces. Whitespace at the end of
+    a piece is held back until the next one arrives, since its cleanup
+    depends on what follows; trailing whitespace left at the end is dropped.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self.started = False
+
+    def feed(self, text: str) -> str:
+        """
+        Clean the next piece of text.
 
-    # Replace multiple spaces with single space
-    text = re.sub(r" {2,}", " ", text)
+        Args:
+            text: Raw text following the previously fed pieces
 
-    # Remove leading/trailing whitespace from each line
-    lines = [line.strip() for line in text.split("\n")]
-    text = "\n".join(lines)
+        Returns:
+            Cleaned text for everything up to the last non-whitespace character
+        """
+        if self._pending:
+            text = self._pending + text
 
-    # Remove empty lines at start and end
-    text = text.strip()
+        end = len(text)
+        while end and text[end - 1].isspace():
+            end -= 1
+        self._pending = text[end:]
 
-    return text
+        # No pattern branch can span the cut: it ends on a non-whitespace character
+        cleaned = _CLEANUP_PATTERN.sub("", text[:end])
+        if not self.started:
+            cleaned = cleaned.lstrip()
+            self.started = bool(cleaned)
+        return cleaned
 
 
-def get_pdf_metadata(file_path: str) -> dict:
+def get_pdf_metadata(file_path: str, engine: Optional[str] = None) -> dict:
     """
     Get metadata from a PDF file.
 
     Args:
         file_path: Path to the PDF file
+        engine: Extraction engine name (defaults to settings.pdf_engine)
 
     Returns:
         Dictionary containing PDF metadata
     """
     try:
-        reader = PdfReader(file_path)
-        metadata = reader.metadata
-        page_count = len(reader.pages)
-
-        return {
-            "title": metadata.title if metadata else "",
-            "author": metadata.author if metadata else "",
-            "subject": metadata.subject if metadata else "",
-            "creator": metadata.creator if metadata else "",
-            "producer": metadata.producer if metadata else "",
-            "page_count": page_count,
-        }
+        with PdfDocumentHandle(file_path, engine, fallback=False) as handle:
+            return {**handle.metadata, "page_count": handle.page_count}
 
     except Exception as e:
         raise Exception(f"Failed to get PDF metadata: {str(e)}")
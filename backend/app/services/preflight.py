@@ -0,0 +1,145 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import get_settings
+from app.services.pdf_extractor import PdfDocumentHandle, clean_extracted_text
+from app.services.summarizer import SummaryPlan, count_tokens, plan_for_tokens
+
+settings = get_settings()
+
+# Celery priorities of the scheduling lanes (0 is served first, 9 last)
+INTERACTIVE_PRIORITY = 0  # one-call documents
+STANDARD_PRIORITY = 3
+BULK_PRIORITY = 6
+MAX_PRIORITY = 9
+
+
+class PreflightError(Exception):
+    """The PDF cannot be summarized; the message is safe to return to the client."""
+
+
+@dataclass
+class PreflightEstimate:
+    """What a PDF will cost to summarize, estimated from a sample of its pages."""
+
+    page_count: int
+    sampled_pages: int
+    text_pages: int  # sampled pages with a text layer
+    estimated_tokens: int
+    plan: SummaryPlan
+    seconds: float
+
+    @property
+    def has_text_layer(self) -> bool:
+        return self.text_pages > 0
+
+
+def sample_page_indexes(page_count: int, samples: int) -> list[int]:
+    """Evenly spaced 0-based page indexes, always including the first and last page."""
+    if page_count <= samples:
+        return list(range(page_count))
+    if samples <= 1:
+        return [0]
+    return sorted({round(i * (page_count - 1) / (samples - 1)) for i in range(samples)})
+
+
+def _count_page_tokens(handle: PdfDocumentHandle, indexes: list[int]) -> tuple[int, int]:
+    """Return (tokens, pages with text) of the pages at ``indexes``, marked like the full text."""
+    tokens = 0
+    text_pages = 0
+    for index in indexes:
+        text = clean_extracted_text(handle.page_text(index) or "")
+        if len(text) < settings.preflight_min_page_chars:
+            continue
+        text_pages += 1
+        tokens += count_tokens(f"--- Page {index + 1} ---\n{text}")
+    return tokens, text_pages
+
+
+def preflight_pdf(file_path: str, samples: Optional[int] = None, filename: Optional[str] = None) -> PreflightEstimate:
+    """
+    Estimate the summarization cost of a PDF without extracting all of it.
+
+    Only the page tree is parsed and ``samples`` evenly spaced pages are
+    extracted; their token count is extrapolated to the whole document and
+    planned like the full text would be. When none of the sampled pages has
+    text (a scan, or text only on pages between the samples), up to twice
+    as many other pages, evenly spaced, are checked before the PDF is taken
+    for a scan, so the upload never extracts a whole large document.
+
+    Args:
+        file_path: Local path of the PDF
+        samples: Pages to extract (defaults to settings.preflight_sample_pages)
+        filename: Name of the PDF for the log (defaults to the file name of ``file_path``)
+
+    Returns:
+        The estimate
+
+    Raises:
+        PreflightError: If the PDF cannot be opened or has no pages
+    """
+    if samples is None:
+        samples = settings.preflight_sample_pages
+    started = time.perf_counter()
+
+    try:
+        with PdfDocumentHandle(file_path) as handle:
+            page_count = handle.page_count
+            indexes = sample_page_indexes(page_count, samples)
+            tokens, text_pages = _count_page_tokens(handle, indexes)
+            if text_pages == 0 and len(indexes) < page_count:
+                sampled = set(indexes)
+                unsampled = [index for index in range(page_count) if index not in sampled]
+                extra = [unsampled[i] for i in sample_page_indexes(len(unsampled), 2 * samples)]
+                tokens, text_pages = _count_page_tokens(handle, extra)
+                indexes = sorted(indexes + extra)
+    except Exception as e:
+        print(f"Preflight of {filename or os.path.basename(file_path)} failed: {str(e)}")
+        raise PreflightError("Could not read the PDF; the file may be damaged or encrypted")
+
+    if page_count == 0:
+        raise PreflightError("The PDF has no pages")
+
+    estimated_tokens = round(tokens * page_count / len(indexes))
+    estimate = PreflightEstimate(
+        page_count=page_count,
+        sampled_pages=len(indexes),
+        text_pages=text_pages,
+        estimated_tokens=estimated_tokens,
+        plan=plan_for_tokens(estimated_tokens),
+        seconds=time.perf_counter() - started,
+    )
+    print(
+        f"Preflight of {filename or os.path.basename(file_path)}: {page_count} pages, {text_pages}/{len(indexes)} sampled "
+        f"pages with text, ~{estimated_tokens} tokens, ~{estimate.plan.estimated_calls} LLM calls "
+        f"in {estimate.seconds:.3f}s"
+    )
+    return estimate
+
+
+def job_priority(estimated_calls: int, user_jobs_in_flight: int) -> int:
+    """
+    Celery priority of a document's pipeline tasks.
+
+    Documents are put in a lane by their estimated LLM calls, so one-call
+    documents are never queued behind the chunks of large ones. Each job the
+    user already has waiting or running lowers the priority one step (up to
+    ``settings.priority_max_user_penalty``), so one user's backlog cannot
+    hold up everyone else's uploads.
+
+    Args:
+        estimated_calls: LLM calls the document is expected to take
+        user_jobs_in_flight: The user's other documents still pending or processing
+
+    Returns:
+        Priority from 0 (served first) to 9
+    """
+    if estimated_calls <= 1:
+        priority = INTERACTIVE_PRIORITY
+    elif estimated_calls <= settings.priority_standard_max_calls:
+        priority = STANDARD_PRIORITY
+    else:
+        priority = BULK_PRIORITY
+    return min(MAX_PRIORITY, priority + min(user_jobs_in_flight, settings.priority_max_user_penalty))
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.config import get_settings
+
+settings = get_settings()
+
+CHANNEL_PREFIX = "progress:"
+LAST_EVENT_PREFIX = "progress-last:"
+
+QUEUED = "queued"
+EXTRACTING = "extracting"
+MAPPING = "mapping"
+SUMMARIZING = "summarizing"  # single-call summary of a short document
+REDUCING = "reducing"
+EMAILING = "emailing"
+COMPLETED = "completed"
+FAILED = "failed"
+TERMINAL_STAGES = (COMPLETED, FAILED)
+
+# Span of the overall percentage each stage covers
+STAGE_PERCENT = {
+    QUEUED: (0, 0),
+    EXTRACTING: (0, 40),
+    MAPPING: (40, 85),
+    SUMMARIZING: (40, 95),
+    REDUCING: (85, 95),
+    EMAILING: (95, 100),
+    COMPLETED: (100, 100),
+    FAILED: (100, 100),
+}
+
+
+def make_event(
+    document_id: int,
+    stage: str,
+    current: Optional[int] = None,
+    total: Optional[int] = None,
+    message: Optional[str] = None,
+) -> dict:
+    """
+    Build a progress event.
+
+    Args:
+        document_id: ID of the PDFDocument
+        stage: One of the stage constants
+        current: Units of the stage done so far (pages, chunks)
+        total: Units of the stage in all, if known
+        message: Optional detail, e.g. the error of a failed document
+
+    Returns:
+        Event dict with the overall ``percent`` complete
+    """
+    start, end = STAGE_PERCENT[stage]
+    fraction = min(current / total, 1.0) if current is not None and total else 0.0
+    event = {
+        "document_id": document_id,
+        "stage": stage,
+        "current": current,
+        "total": total,
+        "percent": round(start + (end - start) * fraction),
+        "at": time.time(),
+    }
+    if message:
+        event["message"] = message
+    return event
+
+
+@lru_cache()
+def _get_redis() -> redis.Redis:
+    return redis.Redis.from_url(settings.redis_url, socket_timeout=2, socket_connect_timeout=2)
+
+
+def publish_progress(
+    document_id: int,
+    stage: str,
+    current: Optional[int] = None,
+    total: Optional[int] = None,
+    message: Optional[str] = None,
+) -> None:
+    """
+    Publish a progress event of a document to Redis (from the workers).
+
+    The latest event is also kept for ``settings.progress_event_ttl``
+    seconds, so clients that connect mid-job start from the current state.
+    Redis errors are logged and ignored; progress never fails a task.
+    """
+    if not settings.progress_events_enabled:
+        return
+    payload = json.dumps(make_event(document_id, stage, current, total, message))
+    try:
+        pipe = _get_redis().pipeline(transaction=False)
+        pipe.setex(f"{LAST_EVENT_PREFIX}{document_id}", settings.progress_event_ttl, payload)
+        pipe.publish(f"{CHANNEL_PREFIX}{document_id}", payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Progress event for document {document_id} not published: {str(e)}")
+
+
+def track_progress(
+    document_id: int,
+    stage: str,
+    items: Iterable,
+    total: Optional[int],
+    step_percent: int = 2,
+    min_interval: float = 0.25,
+    position: Optional[Callable[[Any], int]] = None,
+) -> Iterator:
+    """
+    Yield ``items``, publishing ``stage`` events as they are consumed.
+
+    An event is published once at least ``step_percent`` percent of
+    ``total`` and ``min_interval`` seconds have passed since the previous
+    one, and once all items are consumed, so fast stages don't flood
+    subscribers.
+
+    Args:
+        document_id: ID of the PDFDocument
+        stage: Stage the items belong to (e.g. EXTRACTING for pages)
+        items: Items being processed
+        total: Number of items, if known
+        step_percent: Minimum progress between two events
+        min_interval: Minimum seconds between two events
+        position: Returns how far an item is (1-based) when items can be
+            skipped, e.g. the page number of non-blank pages; by default
+            items are counted
+    """
+    step = max(1, (total or 0) * step_percent // 100)
+    published, published_at = 0, time.monotonic()
+    current = 0
+    publish_progress(document_id, stage, 0, total)
+    for item in items:
+        yield item
+        current = position(item) if position is not None else current + 1
+        now = time.monotonic()
+        if current == total or (current - published >= step and now - published_at >= min_interval):
+            publish_progress(document_id, stage, current, total)
+            published, published_at = current, now
+
+    # Items skipped at the end (e.g. trailing blank pages) still complete the stage
+    if total is not None and published != total:
+        publish_progress(document_id, stage, total, total)
+
+
+class ProgressHub:
+    """
+    Fans progress events out to the clients of one API process.
+
+    A single pattern subscription on Redis receives the events of every
+    document; each connected client gets its own bounded queue, so the
+    number of Redis connections does not grow with the number of watchers.
+    """
+
+    def __init__(self, redis_url: str, queue_size: int = 100):
+        self._redis = aioredis.Redis.from_url(redis_url)
+        self._queue_size = queue_size
+        self._queues: dict[int, set[asyncio.Queue]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    @asynccontextmanager
+    async def subscribe(self, document_ids: Iterable[int]) -> AsyncIterator[asyncio.Queue]:
+        """Yield a queue receiving the events of ``document_ids`` while the context is open."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        document_ids = list(document_ids)
+        for document_id in document_ids:
+            self._queues.setdefault(document_id, set()).add(queue)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            yield queue
+        finally:
+            for document_id in document_ids:
+                queues = self._queues.get(document_id)
+                if queues is not None:
+                    queues.discard(queue)
+                    if not queues:
+                        del self._queues[document_id]
+
+    async def last_event(self, document_id: int) -> Optional[dict]:
+        """Return the latest event published for a document, if still kept."""
+        try:
+            payload = await self._redis.get(f"{LAST_EVENT_PREFIX}{document_id}")
+        except redis.RedisError as e:
+            print(f"Could not read the progress of document {document_id}: {str(e)}")
+            return None
+        return json.loads(payload) if payload else None
+
+    async def _listen(self) -> None:
+        while self._queues:
+            try:
+                async with self._redis.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    while self._queues:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is not None:
+                            self._dispatch(message["data"])
+            except redis.RedisError as e:
+                print(f"Progress subscription lost, reconnecting: {str(e)}")
+                await asyncio.sleep(1)
+
+    def _dispatch(self, payload: bytes) -> None:
+        event = json.loads(payload)
+        for queue in list(self._queues.get(event["document_id"], ())):
+            if queue.full():
+                # A slow client only needs the latest state
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+@lru_cache()
+def get_progress_hub() -> ProgressHub:
+    """Return the process-wide progress hub (API side)."""
+    return ProgressHub(settings.redis_url)
@@ -0,0 +1,172 @@
+import threading
+import time
+from functools import lru_cache
+from typing import Optional
+
+import redis
+
+from app.config import get_settings
+
+settings = get_settings()
+
+KEY_PREFIX = "llm-rate:"
+
+# Reserves one request and ``cost`` tokens from two token buckets and returns
+# the seconds the caller must wait for them. Buckets refill continuously at
+# their per-minute limit and hold at most one minute of it. A reservation is
+# always granted, even if it drives a bucket negative: later callers queue
+# behind it in arrival order instead of all retrying at once.
+#
+# KEYS: requests bucket, tokens bucket, stats hash
+# ARGV: requests/sec, requests capacity, tokens/sec, tokens capacity, token cost
+RESERVE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local wait = 0
+
+local function reserve(key, rate, capacity, cost)
+    if rate <= 0 then
+        return
+    end
+    local state = redis.call('HMGET', key, 'level', 'at')
+    local level = tonumber(state[1]) or capacity
+    local at = tonumber(state[2]) or now
+    level = math.min(capacity, level + math.max(0, now - at) * rate) - cost
+    redis.call('HSET', key, 'level', tostring(level), 'at', tostring(now))
+    redis.call('EXPIRE', key, math.ceil((capacity - level) / rate) + 60)
+    if level < 0 then
+        wait = math.max(wait, -level / rate)
+    end
+end
+
+reserve(KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[2]), 1)
+reserve(KEYS[2], tonumber(ARGV[3]), tonumber(ARGV[4]), tonumber(ARGV[5]))
+
+redis.call('HINCRBY', KEYS[3], 'calls', 1)
+if wait > 0 then
+    redis.call('HINCRBY', KEYS[3], 'throttled_calls', 1)
+    redis.call('HINCRBYFLOAT', KEYS[3], 'wait_seconds', tostring(wait))
+    if wait > (tonumber(redis.call('HGET', KEYS[3], 'max_wait_seconds')) or 0) then
+        redis.call('HSET', KEYS[3], 'max_wait_seconds', tostring(wait))
+    end
+end
+return tostring(wait)
+"""
+
+# Gives back (or charges) the difference between estimated and actual tokens
+# KEYS: tokens bucket; ARGV: tokens to add, tokens capacity
+# Returns the new level of the bucket
+ADJUST_SCRIPT = """
+local level = tonumber(redis.call('HGET', KEYS[1], 'level'))
+if not level then
+    return '0'
+end
+level = math.min(tonumber(ARGV[2]), level + tonumber(ARGV[1]))
+redis.call('HSET', KEYS[1], 'level', tostring(level))
+return tostring(level)
+"""
+
+
+class LLMRateLimiter:
+    """
+    Cluster-wide limit on LLM requests and tokens per minute, kept in Redis.
+
+    Every worker process reserves capacity from the same two token buckets
+    (one for requests, one for tokens) before calling the model, and sleeps
+    until its reservation is due. Calls are spread smoothly over the minute
+    instead of bursting into 429 responses. A limit of 0 is not enforced.
+    Redis errors are logged and the call goes ahead unthrottled; the limiter
+    never fails a summarization.
+    """
+
+    def __init__(self, redis_url: str, model: str, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._redis = redis.Redis.from_url(redis_url, socket_timeout=2, socket_connect_timeout=2)
+        self._reserve = self._redis.register_script(RESERVE_SCRIPT)
+        self._adjust = self._redis.register_script(ADJUST_SCRIPT)
+        self._requests_key = f"{KEY_PREFIX}{model}:requests"
+        self._tokens_key = f"{KEY_PREFIX}{model}:tokens"
+        self._stats_key = f"{KEY_PREFIX}{model}:stats"
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled_calls = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Wait until one request of ``tokens`` estimated tokens may be sent.
+
+        Args:
+            tokens: Estimated prompt and completion tokens of the call
+
+        Returns:
+            Seconds waited
+        """
+        try:
+            wait = float(self._reserve(
+                keys=[self._requests_key, self._tokens_key, self._stats_key],
+                args=[
+                    self.requests_per_minute / 60, self.requests_per_minute,
+                    self.tokens_per_minute / 60, self.tokens_per_minute,
+                    tokens,
+                ],
+            ))
+        except redis.RedisError as e:
+            print(f"LLM rate limiter unavailable, calling without a limit: {str(e)}")
+            wait = 0.0
+
+        with self._lock:
+            self.calls += 1
+            if wait > 0:
+                self.throttled_calls += 1
+                self.wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        if wait > 0:
+            if wait >= 1:
+                print(f"LLM rate limit: waiting {wait:.1f}s for {tokens} tokens")
+            time.sleep(wait)
+        return wait
+
+    def adjust(self, tokens: int) -> None:
+        """Give back ``tokens`` reserved but not used by a call (negative to charge extra)."""
+        if not tokens or self.tokens_per_minute <= 0:
+            return
+        try:
+            self._adjust(keys=[self._tokens_key], args=[tokens, self.tokens_per_minute])
+        except redis.RedisError as e:
+            print(f"LLM rate limiter adjustment failed: {str(e)}")
+
+    def stats(self) -> dict:
+        """Wait counters for this process, plus cluster-wide counters from Redis."""
+        stats = {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "calls": self.calls,
+            "throttled_calls": self.throttled_calls,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+        }
+        try:
+            cluster = self._redis.hgetall(self._stats_key)
+            stats["cluster_calls"] = int(cluster.get(b"calls", 0))
+            stats["cluster_throttled_calls"] = int(cluster.get(b"throttled_calls", 0))
+            stats["cluster_wait_seconds"] = round(float(cluster.get(b"wait_seconds", 0)), 3)
+            stats["cluster_max_wait_seconds"] = round(float(cluster.get(b"max_wait_seconds", 0)), 3)
+        except redis.RedisError as e:
+            print(f"LLM rate limiter stats unavailable: {str(e)}")
+        return stats
+
+
+@lru_cache()
+def get_rate_limiter() -> Optional[LLMRateLimiter]:
+    """Return the process-wide LLM rate limiter, or None when no limit is configured."""
+    if settings.llm_requests_per_minute <= 0 and settings.llm_tokens_per_minute <= 0:
+        return None
+    return LLMRateLimiter(
+        redis_url=settings.redis_url,
+        model=settings.llm_model,
+        requests_per_minute=settings.llm_requests_per_minute,
+        tokens_per_minute=settings.llm_tokens_per_minute,
+    )
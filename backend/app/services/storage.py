@@ -0,0 +1,183 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Optional
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # only needed for the S3 backend
+    boto3 = None
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class BlobStorage:
+    """
+    Interface of the store uploaded PDFs live in.
+
+    Objects are addressed by key (``PDFDocument.file_path``). Workers that
+    need a file on disk, e.g. for the extraction engines, use
+    ``local_copy``; other reads can stream or fetch byte ranges.
+    """
+
+    def put_file(self, local_path: str, key: str) -> None:
+        """Store the file at ``local_path`` under ``key``, consuming the local file."""
+        raise NotImplementedError
+
+    def iter_blocks(self, key: str, block_size: Optional[int] = None) -> Iterator[bytes]:
+        """Stream the object in blocks of about ``block_size`` bytes."""
+        raise NotImplementedError
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """Return bytes ``start`` to ``end - 1`` of the object."""
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Delete the object (missing objects are ignored)."""
+        raise NotImplementedError
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """Yield a local path holding the object; it is removed afterwards if it was downloaded."""
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for block in self.iter_blocks(key):
+                    f.write(block)
+            yield path
+        finally:
+            os.remove(path)
+
+
+class LocalStorage(BlobStorage):
+    """Files in a directory shared by the API and every worker (the original layout)."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        # Documents uploaded before storage keys were introduced hold their full path
+        if os.path.isabs(key) or key.startswith(self.root.rstrip(os.sep) + os.sep):
+            return key
+        return os.path.join(self.root, key)
+
+    def put_file(self, local_path: str, key: str) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            # Atomic when both are on the same filesystem
+            os.replace(local_path, path)
+        except OSError:
+            shutil.move(local_path, path)
+
+    def iter_blocks(self, key: str, block_size: Optional[int] = None) -> Iterator[bytes]:
+        block_size = block_size or settings.storage_block_size
+        with open(self.path(key), "rb") as f:
+            while block := f.read(block_size):
+                yield block
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        with open(self.path(key), "rb") as f:
+            f.seek(start)
+            return f.read(max(end - start, 0))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def delete(self, key: str) -> None:
+        path = self.path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        yield self.path(key)
+
+
+class S3Storage(BlobStorage):
+    """Objects in an S3-compatible bucket (AWS S3, MinIO, ...), reachable from any node."""
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+    ):
+        if boto3 is None:
+            raise Exception("The S3 storage backend requires boto3")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            # Path-style addressing works with MinIO and other self-hosted servers
+            config=BotoConfig(s3={"addressing_style": "path"}, retries={"mode": "standard"}),
+        )
+
+    def ensure_bucket(self) -> None:
+        """Create the bucket if it does not exist yet (convenient for local MinIO)."""
+        try:
+            self.client.head_bucket(Bucket=self.bucket)
+        except ClientError:
+            self.client.create_bucket(Bucket=self.bucket)
+
+    def put_file(self, local_path: str, key: str) -> None:
+        # upload_file switches to parallel multipart uploads for large files
+        self.client.upload_file(local_path, self.bucket, self.prefix + key)
+        os.remove(local_path)
+
+    def iter_blocks(self, key: str, block_size: Optional[int] = None) -> Iterator[bytes]:
+        response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        body = response["Body"]
+        try:
+            yield from body.iter_chunks(block_size or settings.storage_block_size)
+        finally:
+            body.close()
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        if end <= start:
+            return b""
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=self.prefix + key, Range=f"bytes={start}-{end - 1}"
+        )
+        return response["Body"].read()
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)["ContentLength"]
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+
+@lru_cache()
+def get_storage() -> BlobStorage:
+    """Return the process-wide storage backend selected by settings.storage_backend."""
+    if settings.storage_backend == "local":
+        return LocalStorage(settings.upload_dir)
+    if settings.storage_backend == "s3":
+        storage = S3Storage(
+            bucket=settings.s3_bucket,
+            prefix=settings.s3_prefix,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+        )
+        storage.ensure_bucket()
+        return storage
+    raise Exception(f"Unknown storage backend '{settings.storage_backend}', expected 'local' or 's3'")
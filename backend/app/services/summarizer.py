@@ -1,144 +1,786 @@
+import hashlib
+import itertools
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, Optional
+
+import tiktoken
 from langchain_openai import ChatOpenAI
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
 
 from app.config import get_settings
+from app.services.checkpoints import MAP, CheckpointStore
+from app.services.llm_cache import get_llm_cache, make_cache_key
+from app.services.llm_gateway import get_llm_gateway
+from app.services.rate_limiter import get_rate_limiter
 
 settings = get_settings()
 
+SIMPLE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant that creates clear, concise summaries."),
+    ("human", """Please provide a comprehensive summary of the following document.
+Include the main points, key findings, and important conclusions.
+Make the summary clear, concise, and well-organized.
 
-def create_summarizer():
-    """Create and return a GPT-4 language model instance."""
-    return ChatOpenAI(
-        model="gpt-4",
-        temperature=0.3,
-        openai_api_key=settings.openai_api_key,
-    )
+Document:
+{text}
+
+Summary:"""),
+])
+
+MAP_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant that creates clear, concise summaries."),
+    ("human", """Summarize the following section of a document, capturing the key points and important details:
+
+{text}
+
+Section Summary:"""),
+])
+
+COLLAPSE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant that creates clear, concise summaries."),
+    ("human", """You are given summaries of consecutive sections of a document.
+Combine them into a single condensed summary of these sections, keeping the key points and important details in order.
+
+Section Summaries:
+{text}
+
+Combined Summary:"""),
+])
+
+REDUCE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a helpful assistant that creates clear, concise summaries."),
+    ("human", """You are given summaries of different sections of a document.
+Please combine these into a comprehensive, well-organized final summary.
+Include the main points, key findings, and important conclusions.
+Make sure the summary flows naturally and is easy to read.
+
+Section Summaries:
+{text}
+
+Final Summary:"""),
+])
+
+# Identifies the prompt set; cached summaries are only reused for the same version
+PROMPT_VERSION = hashlib.sha256(
+    "\n".join(
+        repr(prompt.messages)
+        for prompt in (SIMPLE_PROMPT, MAP_PROMPT, COLLAPSE_PROMPT, REDUCE_PROMPT)
+    ).encode()
+).hexdigest()[:16]
+
+
+@dataclass
+class SummaryPlan:
+    """Summarization strategy chosen for a document, with its cost estimate."""
+
+    STUFF = "stuff"
+    MAP_REDUCE = "map_reduce"
+    TREE_REDUCE = "tree_reduce"
+
+    strategy: str
+    input_tokens: int
+    chunk_count: int
+    estimated_calls: int
+
+
+def create_summarizer() -> ChatOpenAI:
+    """Return the GPT-4 language model instance of this process (pooled by the LLM gateway)."""
+    return get_llm_gateway().llm
 
 
-def split_text_into_chunks(text: str, chunk_size: int = 4000, chunk_overlap: int = 500) -> list[Document]:
+@lru_cache()
+def _get_encoding():
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use; fall back to an estimate offline
+        print(f"tiktoken encoding unavailable, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count GPT tokens in text (roughly 4 characters per token if tiktoken is unavailable)."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Return ``text`` cut down to at most ``max_tokens`` GPT tokens."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[: max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def gated_llm(llm: ChatOpenAI, waits: Optional[list] = None) -> Runnable:
     """
-    Split text into chunks for processing.
+    Send a language model's calls through the LLM gateway and rate limiter.
+
+    Each call gets the gateway's deadline and, if enabled, a hedged second
+    request. With a cluster-wide rate limit, each call first reserves one
+    request and its estimated tokens (prompt plus
+    ``settings.llm_output_tokens``) and waits for them; the estimate is
+    corrected with the actual usage once the response arrives. Hedges
+    reserve their own request before they are sent.
 
     Args:
-        text: The text to split
-        chunk_size: Maximum size of each chunk
-        chunk_overlap: Overlap between chunks
+        llm: Language model instance
+        waits: Optional list that receives the seconds each call waited for the rate limiter
 
     Returns:
-        List of Document objects
+        Runnable to use in place of ``llm``
     """
-    text_splitter = RecursiveCharacterTextSplitter(
+    gateway = get_llm_gateway()
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return RunnableLambda(lambda prompt_value, config: gateway.invoke(llm, prompt_value, config), name="gated_llm")
+
+    def call(prompt_value, config):
+        tokens = count_tokens(prompt_value.to_string()) + settings.llm_output_tokens
+        waited = limiter.acquire(tokens)
+        if waits is not None:
+            waits.append(waited)
+        message = gateway.invoke(llm, prompt_value, config, before_hedge=lambda: limiter.acquire(tokens))
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            limiter.adjust(tokens - usage["total_tokens"])
+        return message
+
+    return RunnableLambda(call, name="gated_llm")
+
+
+def _prompt_budget(prompt: ChatPromptTemplate) -> int:
+    """Tokens left for {text} in ``prompt`` once instructions and output headroom are reserved."""
+    overhead = count_tokens(prompt.format(text="")) + 8 * len(prompt.messages)
+    return settings.llm_context_tokens - settings.llm_output_tokens - overhead
+
+
+def _chunk_token_budget() -> int:
+    return min(settings.chunk_max_tokens, _prompt_budget(MAP_PROMPT))
+
+
+def _reduce_token_budget() -> int:
+    return min(settings.reduce_max_input_tokens, _prompt_budget(REDUCE_PROMPT))
+
+
+def _overlap_budget(max_tokens: int, max_overlap: Optional[int] = None) -> int:
+    if max_overlap is None:
+        max_overlap = settings.chunk_max_overlap_tokens
+    return min(max_overlap, max_tokens // 4)
+
+
+def _chunk_count(total_tokens: int, max_tokens: int, max_overlap: int) -> int:
+    return math.ceil(total_tokens / (max_tokens - max_overlap))
+
+
+def plan_summary(text: str) -> SummaryPlan:
+    """
+    Pick the cheapest summarization strategy that fits the model context.
+
+    - stuff: the whole text fits one prompt, so it is summarized in one call
+    - map_reduce: chunks are summarized, then combined in one reduce call
+    - tree_reduce: the section summaries themselves overflow the reduce
+      prompt, so they are collapsed over several levels first
+
+    Args:
+        text: The text to summarize
+
+    Returns:
+        SummaryPlan with the strategy, token count and estimated LLM calls
+    """
+    return plan_for_tokens(count_tokens(text))
+
+
+def plan_for_tokens(input_tokens: int) -> SummaryPlan:
+    """
+    Plan the summarization of a text of ``input_tokens`` tokens (see plan_summary).
+
+    Used directly when only an estimate of the token count is known, e.g.
+    by the upload preflight.
+    """
+    if fits_single_prompt(input_tokens):
+        return SummaryPlan(SummaryPlan.STUFF, input_tokens, 1, 1)
+
+    max_tokens = _chunk_token_budget()
+    chunk_count = _chunk_count(input_tokens, max_tokens, _overlap_budget(max_tokens))
+    return plan_map_reduce(input_tokens, chunk_count)
+
+
+def fits_single_prompt(input_tokens: int) -> bool:
+    """Whether text of ``input_tokens`` tokens can be summarized in a single call."""
+    return input_tokens <= _prompt_budget(SIMPLE_PROMPT)
+
+
+def plan_map_reduce(input_tokens: int, chunk_count: int) -> SummaryPlan:
+    """
+    Plan a map-reduce (or tree reduce) summarization over ``chunk_count`` chunks.
+
+    Args:
+        input_tokens: Token length of the whole text
+        chunk_count: Number of chunks the text is split into
+
+    Returns:
+        SummaryPlan with the strategy and estimated LLM calls
+    """
+    reduce_budget = _reduce_token_budget()
+
+    # Mirror reduce_summaries: collapse batches until the summaries fit one reduce call
+    calls = chunk_count
+    remaining = chunk_count
+    while remaining > 1 and remaining * settings.map_summary_tokens > reduce_budget:
+        per_batch = max(2, reduce_budget // max(1, settings.map_summary_tokens))
+        remaining = math.ceil(remaining / per_batch)
+        calls += remaining
+    strategy = SummaryPlan.MAP_REDUCE if calls == chunk_count else SummaryPlan.TREE_REDUCE
+
+    return SummaryPlan(strategy, input_tokens, chunk_count, calls + 1)
+
+
+def _chunk_sizing(total_tokens: Optional[int], max_tokens: int, max_overlap: int) -> tuple[int, int]:
+    """
+    Chunk size and overlap for splitting ``total_tokens`` tokens evenly (see iter_chunks).
+
+    Returns:
+        Tuple of (chunk size, chunk overlap) in tokens
+    """
+    if not total_tokens:
+        return max_tokens, min(max_overlap, int(max_tokens * settings.chunk_overlap_ratio))
+    target_tokens = math.ceil(total_tokens / _chunk_count(total_tokens, max_tokens, max_overlap))
+    chunk_overlap = min(max_overlap, int(target_tokens * settings.chunk_overlap_ratio))
+    # Leave some slack for separator boundaries, never above the hard limit
+    return min(max_tokens, int(target_tokens * 1.05) + chunk_overlap), chunk_overlap
+
+
+def _text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
+        length_function=count_tokens,
         separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=True,
     )
 
-    chunks = text_splitter.split_text(text)
-    return [Document(page_content=chunk) for chunk in chunks]
+
+def split_text_into_chunks(
+    text: str,
+    max_tokens: Optional[int] = None,
+    max_overlap: Optional[int] = None,
+) -> list[Document]:
+    """
+    Split text into token-budgeted chunks for processing.
+
+    The text is streamed through iter_chunks paragraph by paragraph (which
+    joins them back with the same blank lines), as the worker streams pages.
+
+    Args:
+        text: The text to split
+        max_tokens: Maximum tokens per chunk (defaults to settings.chunk_max_tokens)
+        max_overlap: Maximum token overlap between chunks (defaults to settings.chunk_max_overlap_tokens)
+
+    Returns:
+        List of Document objects
+    """
+    return list(iter_chunks(text.split("\n\n"), max_tokens, max_overlap, total_tokens=count_tokens(text)))
 
 
-def summarize_text(text: str) -> str:
+def iter_chunks(
+    pages: Iterable[str],
+    max_tokens: Optional[int] = None,
+    max_overlap: Optional[int] = None,
+    total_tokens: Optional[int] = None,
+) -> Iterator[Document]:
+    """
+    Incrementally split a stream of page texts into token-budgeted chunks.
+
+    The number of chunks is the minimum needed to stay under ``max_tokens``,
+    and chunks are sized evenly so none ends up as a tiny remainder. The
+    overlap scales with the chunk size (``settings.chunk_overlap_ratio``),
+    capped at ``max_overlap``. The stream's length is not known up front:
+    chunks are sized from ``total_tokens`` (an estimate is enough), or
+    filled up to ``max_tokens`` without it, and whatever is left at the end
+    is always re-split evenly, so a wrong estimate only affects the sizes.
+
+    Pages are buffered until they hold about three chunks' worth of tokens;
+    the chunks are then emitted except for the last two, which are carried
+    over so the final re-split always has a full chunk to even out with.
+    Memory stays bounded by a few chunks plus one page, and each chunk is
+    available soon after the pages it covers have been extracted.
+
+    Args:
+        pages: Page texts in document order
+        max_tokens: Maximum tokens per chunk (defaults to settings.chunk_max_tokens)
+        max_overlap: Maximum token overlap between chunks (defaults to settings.chunk_max_overlap_tokens)
+        total_tokens: Expected token length of all pages, for sizing chunks evenly
+
+    Yields:
+        Document chunks in document order
+    """
+    max_tokens = max_tokens or _chunk_token_budget()
+    max_overlap = _overlap_budget(max_tokens, max_overlap)
+    text_splitter = _text_splitter(*_chunk_sizing(total_tokens, max_tokens, max_overlap))
+
+    buffer: list[str] = []
+    buffer_tokens = 0
+    for page in pages:
+        buffer.append(page)
+        buffer_tokens += count_tokens(page)
+        if buffer_tokens < 3 * max_tokens:
+            continue
+
+        text = "\n\n".join(buffer)
+        chunks = text_splitter.create_documents([text])
+        if len(chunks) < 3:
+            continue
+        for chunk in chunks[:-2]:
+            yield Document(page_content=chunk.page_content)
+        # Carry the source text rather than the chunks, which overlap each other
+        buffer = [text[chunks[-2].metadata["start_index"]:]]
+        buffer_tokens = count_tokens(buffer[0])
+
+    # The rest is split evenly on its own, so the last chunk is never a small remainder
+    text = "\n\n".join(buffer)
+    if text.strip():
+        for chunk in _split_evenly(text, max_tokens, max_overlap):
+            yield Document(page_content=chunk)
+
+
+def _split_evenly(text: str, max_tokens: int, max_overlap: int) -> list[str]:
+    """
+    Split ``text`` into as few chunks as filling them up to ``max_tokens`` would, of even size.
+
+    Text only splits at separators, so the even size is raised step by
+    step (up to ``max_tokens``) until no extra chunk is left over.
+    """
+    total_tokens = count_tokens(text)
+    if total_tokens <= max_tokens:
+        return [text]
+    fewest = len(_text_splitter(*_chunk_sizing(None, max_tokens, max_overlap)).split_text(text))
+    chunk_size, chunk_overlap = _chunk_sizing(total_tokens, max_tokens, max_overlap)
+    while True:
+        chunks = _text_splitter(chunk_size, chunk_overlap).split_text(text)
+        if len(chunks) <= fewest or chunk_size >= max_tokens:
+            return chunks
+        chunk_size = min(max_tokens, int(chunk_size * 1.1))
+
+
+def plan_pages(
+    pages: Iterable[str],
+    on_chunk: Callable[[int, Document], None],
+    estimated_tokens: Optional[int] = None,
+) -> tuple[SummaryPlan, Optional[str]]:
+    """
+    Plan the summarization of a stream of page texts, chunking it if needed.
+
+    Pages are buffered while they may still fit a single prompt. Once they
+    cannot, the rest of the stream goes through iter_chunks and every chunk
+    is handed to ``on_chunk`` as soon as it is ready, so the map phase can
+    start while later pages are still being extracted.
+
+    Args:
+        pages: Cleaned page texts, in order (joined by blank lines)
+        on_chunk: Called with (index, chunk) for each chunk of a map-reduce plan
+        estimated_tokens: Estimate of the text's tokens (e.g. from the upload preflight), for sizing chunks evenly
+
+    Returns:
+        Tuple of (plan, the joined text of a STUFF plan, or None)
+    """
+    separator_tokens = count_tokens("\n\n")
+    pages = iter(pages)
+    head: list[str] = []
+    head_tokens = 0
+    fits = True
+    for page in pages:
+        head_tokens += count_tokens(page)
+        head.append(page)
+        if not fits_single_prompt(head_tokens):
+            fits = False
+            break
+
+    if fits:
+        # The blank lines joining the pages count too, so the joined text has the final say
+        text = "\n\n".join(head)
+        input_tokens = count_tokens(text)
+        if fits_single_prompt(input_tokens):
+            return SummaryPlan(SummaryPlan.STUFF, input_tokens, 1, 1), text
+
+    input_tokens = 0
+
+    def counted_pages() -> Iterator[str]:
+        nonlocal input_tokens
+        for page in itertools.chain(head, pages):
+            input_tokens += count_tokens(page) + (separator_tokens if input_tokens else 0)
+            yield page
+
+    chunk_count = 0
+    for index, doc in enumerate(iter_chunks(counted_pages(), total_tokens=estimated_tokens)):
+        on_chunk(index, doc)
+        chunk_count += 1
+
+    return plan_map_reduce(input_tokens, chunk_count), None
+
+
+def summarize_text(
+    text: str,
+    plan: Optional[SummaryPlan] = None,
+    timings: Optional[list] = None,
+    checkpoint: Optional[CheckpointStore] = None,
+    llm: Optional[ChatOpenAI] = None,
+) -> str:
     """
     Summarize text using GPT-4.
 
     Args:
         text: The text to summarize
+        plan: Strategy to use (computed with plan_summary if not given)
+        timings: Optional list that receives per-stage timing entries
+        checkpoint: Optional store used to resume and record the map phase
+        llm: Language model instance (defaults to create_summarizer(), e.g. a fake model in benchmarks)
 
     Returns:
         Summary string
     """
-    llm = create_summarizer()
-
-    # Split text into chunks
+    llm = llm or create_summarizer()
+    plan = plan or plan_summary(text)
+    print(f"Summarization plan: {plan}")
+
+    # If text fits in one prompt, never pay for a map phase
+    if plan.strategy == SummaryPlan.STUFF:
+        started = time.time()
+        waits = []
+        summary = simple_summarize(text, llm, waits)
+        record_timing(timings, "stuff", 0, 1, 1, started, waits)
+        return summary
+
+    # Use map-reduce (tree reduce when needed) for longer documents
     docs = split_text_into_chunks(text)
+    return map_reduce_summarize(docs, llm, timings, checkpoint)
 
-    # If text is short enough, use simple summarization
-    if len(docs) == 1:
-        return simple_summarize(docs[0].page_content, llm)
-
-    # Use map-reduce for longer documents
-    return map_reduce_summarize(docs, llm)
 
-
-def simple_summarize(text: str, llm: ChatOpenAI) -> str:
+def simple_summarize(text: str, llm: ChatOpenAI, waits: Optional[list] = None) -> str:
     """
     Simple summarization for short documents.
 
     Args:
         text: Text to summarize
         llm: Language model instance
+        waits: Optional list that receives the seconds the call waited for the rate limiter
 
     Returns:
         Summary string
     """
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a helpful assistant that creates clear, concise summaries."),
-        ("human", """Please provide a comprehensive summary of the following document.
-Include the main points, key findings, and important conclusions.
-Make the summary clear, concise, and well-organized.
-
-Document:
-{text}
-
-Summary:"""),
-    ])
-
-    chain = prompt | llm
+    chain = SIMPLE_PROMPT | gated_llm(llm, waits)
     result = chain.invoke({"text": text})
     return result.content
 
 
-def map_reduce_summarize(docs: list[Document], llm: ChatOpenAI) -> str:
+def map_summaries(
+    docs: list[Document],
+    llm: ChatOpenAI,
+    checkpoint: Optional[CheckpointStore] = None,
+    waits: Optional[list] = None,
+) -> list[str]:
     """
-    Map-reduce summarization for longer documents.
+    Summarize each chunk concurrently (map phase).
+
+    Chunks are sent in parallel, bounded by ``settings.map_max_concurrency``.
+    Chunks whose summary is already checkpointed or in the LLM response cache
+    are not sent; every new summary is checkpointed as soon as it completes.
+    Chunks that fail are retried up to ``settings.map_chunk_retries`` times;
+    chunks that still fail are left out so the rest of the document is kept.
 
     Args:
         docs: List of document chunks
         llm: Language model instance
+        checkpoint: Optional store to resume from and record completed chunks
+        waits: Optional list that receives the seconds each call waited for the rate limiter
 
     Returns:
-        Summary string
+        Section summaries in the same order as the input chunks
     """
-    # Map phase - summarize each chunk
-    map_prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a helpful assistant that creates clear, concise summaries."),
-        ("human", """Summarize the following section of a document, capturing the key points and important details:
+    map_chain = MAP_PROMPT | gated_llm(llm, waits)
+    config = {"max_concurrency": max(1, settings.map_max_concurrency)}
+
+    summaries: list[Optional[str]] = [None] * len(docs)
+    errors: dict[int, Exception] = {}
+    pending = list(range(len(docs)))
+
+    cache = get_llm_cache()
+    cache_keys = [make_cache_key(MAP_PROMPT, llm, doc.page_content) for doc in docs]
+
+    # Resume chunks completed by an earlier attempt
+    if checkpoint is not None:
+        completed = checkpoint.get_many(MAP, keys=list(set(cache_keys)))
+        for i, key in enumerate(cache_keys):
+            summaries[i] = completed.get(key)
+        pending = [i for i in pending if summaries[i] is None]
+        if len(pending) < len(docs):
+            print(f"Checkpoint: {len(docs) - len(pending)}/{len(docs)} chunk summaries resumed")
+
+    # Reuse cached summaries of identical chunks
+    if cache is not None and pending:
+        cached = cache.get_many([cache_keys[i] for i in pending])
+        for i in pending:
+            summaries[i] = cached.get(cache_keys[i])
+        reused = [i for i in pending if summaries[i] is not None]
+        if checkpoint is not None:
+            # The reduce stage collects chunk summaries from the checkpoints
+            for i in reused:
+                checkpoint.put(MAP, summaries[i], key=cache_keys[i])
+        pending = [i for i in pending if summaries[i] is None]
+        print(f"LLM cache: {len(reused)}/{len(docs)} chunk summaries reused")
+
+    # Identical chunks within the document are only summarized once
+    first_index: dict[str, int] = {}
+    for i in pending:
+        first_index.setdefault(cache_keys[i], i)
+    pending = sorted(first_index.values())
+
+    for _ in range(settings.map_chunk_retries + 1):
+        if not pending:
+            break
+
+        results = map_chain.batch_as_completed(
+            [{"text": docs[i].page_content} for i in pending],
+            config=config,
+            return_exceptions=True,
+        )
+
+        failed = []
+        for position, result in results:
+            i = pending[position]
+            if isinstance(result, Exception):
+                errors[i] = result
+                failed.append(i)
+                continue
+
+            summaries[i] = result.content
+            errors.pop(i, None)
+            if cache is not None:
+                cache.set(cache_keys[i], result.content)
+            if checkpoint is not None:
+                checkpoint.put(MAP, result.content, key=cache_keys[i])
+        pending = sorted(failed)
+
+    for i, key in enumerate(cache_keys):
+        if summaries[i] is None and key in first_index:
+            summaries[i] = summaries[first_index[key]]
+            if first_index[key] in errors and i != first_index[key]:
+                errors[i] = errors[first_index[key]]
+
+    if len(errors) == len(docs):
+        raise Exception(f"All {len(docs)} chunks failed to summarize: {errors[0]}")
+
+    for i, error in sorted(errors.items()):
+        print(f"Skipping chunk {i + 1}/{len(docs)} after failed summarization: {error}")
+
+    return [summary for summary in summaries if summary is not None]
+
+
+def record_timing(
+    timings: Optional[list],
+    stage: str,
+    level: int,
+    inputs: int,
+    calls: int,
+    started: float,
+    waits: Optional[list] = None,
+) -> None:
+    """
+    Log a summarization stage and append its timing entry to ``timings`` (if given).
 
-{text}
+    When ``waits`` is given, the entry also records the total seconds the
+    stage's calls waited for the rate limiter (``waited``).
+    """
+    entry = {
+        "stage": stage,
+        "level": level,
+        "inputs": inputs,
+        "calls": calls,
+        "seconds": round(time.time() - started, 3),
+    }
+    if waits is not None:
+        entry["waited"] = round(sum(waits), 3)
+    print(f"Summarization {stage} level {level}: {inputs} inputs, {calls} calls, {entry['seconds']}s")
+    if timings is not None:
+        timings.append(entry)
+
+
+def batch_summaries(summaries: list[str], max_tokens: int) -> list[list[str]]:
+    """
+    Group consecutive summaries into batches that fit a token budget.
 
-Section Summary:"""),
-    ])
+    The blank lines joining the summaries of a batch count towards the
+    budget. Summaries are expected to be fitted with ``fit_summaries`` first,
+    so any two of them fit together and every batch but the last holds at
+    least two; a last summary that fits no batch is returned on its own.
 
-    map_chain = map_prompt | llm
-    summaries = []
+    Args:
+        summaries: Section summaries in document order
+        max_tokens: Token budget for the joined summaries of one batch
 
-    for doc in docs:
-        result = map_chain.invoke({"text": doc.page_content})
-        summaries.append(result.content)
+    Returns:
+        List of batches, in document order
+    """
+    separator_tokens = count_tokens("\n\n")
+    batches: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
 
-    # Reduce phase - combine summaries
-    combined_summaries = "\n\n".join(summaries)
+    for summary in summaries:
+        tokens = count_tokens(summary)
+        if current and current_tokens + separator_tokens + tokens > max_tokens:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current_tokens += tokens + (separator_tokens if current else 0)
+        current.append(summary)
 
-    reduce_prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a helpful assistant that creates clear, concise summaries."),
-        ("human", """You are given summaries of different sections of a document.
-Please combine these into a comprehensive, well-organized final summary.
-Include the main points, key findings, and important conclusions.
-Make sure the summary flows naturally and is easy to read.
+    if current:
+        batches.append(current)
 
-Section Summaries:
-{text}
+    return batches
+
+
+def fit_summaries(summaries: list[str], max_tokens: int) -> list[str]:
+    """
+    Truncate summaries so that any two of them fit ``max_tokens`` together.
+
+    Args:
+        summaries: Section summaries in document order
+        max_tokens: Token budget for the joined summaries of one batch
+
+    Returns:
+        The summaries, truncated where needed
+    """
+    limit = (max_tokens - count_tokens("\n\n")) // 2
+    fitted = []
+    for summary in summaries:
+        if count_tokens(summary) > limit:
+            print(f"Truncating a {count_tokens(summary)}-token summary to {limit} tokens for the reduce prompt")
+            summary = truncate_to_tokens(summary, limit)
+        fitted.append(summary)
+    return fitted
 
-Final Summary:"""),
-    ])
 
-    reduce_chain = reduce_prompt | llm
-    result = reduce_chain.invoke({"text": combined_summaries})
+def reduce_summaries(summaries: list[str], llm: ChatOpenAI, timings: Optional[list] = None) -> str:
+    """
+    Combine section summaries into a final summary (tree reduce).
+
+    When the summaries do not fit in one reduce prompt, they are grouped into
+    token-bounded batches that are collapsed in parallel, level by level,
+    until the remainder fits a single final reduce call. Batches that fail
+    are retried up to ``settings.map_chunk_retries`` times; after that their
+    summaries are carried to the next level uncollapsed, as is a lone summary
+    left over at the end of a level. Summaries are truncated so that any two
+    fit a prompt together, so every level shrinks the list.
+
+    Args:
+        summaries: Section summaries in document order
+        llm: Language model instance
+        timings: Optional list that receives one timing entry per level
+
+    Returns:
+        Summary string
+    """
+    config = {"max_concurrency": max(1, settings.map_max_concurrency)}
+    level = 1
+
+    # Collapse levels - reduce batches in parallel until the rest fits one prompt
+    reduce_budget = _reduce_token_budget()
+    summaries = fit_summaries(summaries, reduce_budget)
+    while len(summaries) > 1 and count_tokens("\n\n".join(summaries)) > reduce_budget:
+        started = time.time()
+        waits = []
+        batches = batch_summaries(summaries, reduce_budget)
+        collapse_chain = COLLAPSE_PROMPT | gated_llm(llm, waits)
+        collapsed: list[Optional[str]] = [None] * len(batches)
+        errors: dict[int, Exception] = {}
+        # A lone summary has nothing to be combined with at this level
+        pending = [i for i, batch in enumerate(batches) if len(batch) > 1]
+        collapsible = len(pending)
+
+        for _ in range(settings.map_chunk_retries + 1):
+            if not pending:
+                break
+
+            results = collapse_chain.batch(
+                [{"text": "\n\n".join(batches[i])} for i in pending],
+                config=config,
+                return_exceptions=True,
+            )
+
+            failed = []
+            for i, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    errors[i] = result
+                    failed.append(i)
+                    continue
+                collapsed[i] = result.content
+                errors.pop(i, None)
+            pending = failed
+
+        record_timing(timings, "collapse", level, len(summaries), collapsible, started, waits)
+        # The level must shrink the list, or the next one would face the same input
+        if len(errors) == collapsible:
+            first_error = next(iter(errors.values()))
+            raise Exception(f"All {collapsible} batches of reduce level {level} failed to collapse: {first_error}")
+
+        for i, error in sorted(errors.items()):
+            print(f"Keeping the {len(batches[i])} summaries of batch {i + 1}/{len(batches)} after failed collapse: {error}")
+
+        next_summaries = []
+        for batch, summary in zip(batches, collapsed):
+            next_summaries.extend(batch if summary is None else [summary])
+        summaries = fit_summaries(next_summaries, reduce_budget)
+        level += 1
+
+    # Final reduce
+    started = time.time()
+    waits = []
+    reduce_chain = REDUCE_PROMPT | gated_llm(llm, waits)
+    result = reduce_chain.invoke({"text": "\n\n".join(summaries)})
+    record_timing(timings, "reduce", level, len(summaries), 1, started, waits)
     return result.content
 
 
+def map_reduce_summarize(
+    docs: list[Document],
+    llm: ChatOpenAI,
+    timings: Optional[list] = None,
+    checkpoint: Optional[CheckpointStore] = None,
+) -> str:
+    """
+    Map-reduce summarization for longer documents.
+
+    Args:
+        docs: List of document chunks
+        llm: Language model instance
+        timings: Optional list that receives per-level timing entries
+        checkpoint: Optional store used to resume and record the map phase
+
+    Returns:
+        Summary string
+    """
+    # Map phase - summarize each chunk concurrently
+    started = time.time()
+    waits = []
+    summaries = map_summaries(docs, llm, checkpoint, waits)
+    record_timing(timings, "map", 0, len(docs), len(docs), started, waits)
+
+    # Reduce phase - combine summaries, level by level if needed
+    return reduce_summaries(summaries, llm, timings)
+
+
 def count_words(text: str) -> int:
     """Count words in text."""
     return len(text.split())
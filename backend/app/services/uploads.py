@@ -0,0 +1,166 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadError(Exception):
+    """The upload was rejected; the message is safe to return to the client."""
+
+
+@dataclass
+class ReceivedUpload:
+    filename: str  # name sent by the client
+    temp_path: str  # where the data was streamed, in the upload directory
+    size: int
+    content_hash: str  # hex SHA-256 of the data
+
+
+async def receive_upload(
+    request: Request,
+    field_name: str = "file",
+    allowed_extensions: tuple = (".pdf",),
+    max_size: Optional[int] = None,
+    directory: Optional[str] = None,
+) -> ReceivedUpload:
+    """
+    Stream a multipart file upload to a temp file without buffering it in memory.
+
+    The body is parsed as it arrives. File data is collected into blocks of
+    ``settings.upload_block_size`` bytes that are hashed and written from a
+    thread pool, so the event loop never blocks on disk I/O. The upload is
+    rejected as soon as the declared Content-Length or the data received so
+    far exceeds the limit, or the file name has a disallowed extension.
+
+    Args:
+        request: The incoming request
+        field_name: Form field holding the file
+        allowed_extensions: Accepted (lowercase) file name extensions
+        max_size: Maximum file size in bytes (defaults to settings.max_file_size)
+        directory: Directory for the temp file (defaults to settings.upload_dir)
+
+    Returns:
+        The received upload, still in its temp file
+
+    Raises:
+        UploadError: If the request is not a valid upload or is too large
+    """
+    max_size = max_size or settings.max_file_size
+    directory = directory or settings.upload_dir
+    too_large = UploadError(f"File size exceeds maximum allowed ({max_size // (1024 * 1024)}MB)")
+
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadError("Expected a multipart/form-data upload")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD_BYTES:
+        raise too_large
+
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    temp_file = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+
+    state = {"headers": {}, "header_field": b"", "header_value": b"", "in_file": False, "filename": None}
+    pending: list[bytes] = []
+    size = 0
+    pending_size = 0
+
+    def on_part_begin() -> None:
+        state["headers"] = {}
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        state["header_field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        state["header_value"] += data[start:end]
+
+    def on_header_end() -> None:
+        state["headers"][state["header_field"].lower()] = state["header_value"]
+        state["header_field"] = state["header_value"] = b""
+
+    def on_headers_finished() -> None:
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("utf-8", "replace")
+        filename = disposition.get(b"filename")
+        state["in_file"] = name == field_name and filename is not None and state["filename"] is None
+        if state["in_file"]:
+            state["filename"] = os.path.basename(filename.decode("utf-8", "replace"))
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        nonlocal size, pending_size
+        if state["in_file"]:
+            pending.append(data[start:end])
+            size += end - start
+            pending_size += end - start
+
+    def on_part_end() -> None:
+        state["in_file"] = False
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    def write_block(block: bytes) -> None:
+        digest.update(block)
+        temp_file.write(block)
+
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except ValueError as e:  # multipart parse errors
+                raise UploadError(f"Malformed multipart upload: {str(e)}")
+
+            filename = state["filename"]
+            if filename is not None and not filename.lower().endswith(allowed_extensions):
+                raise UploadError("Only PDF files are allowed")
+            if size > max_size:
+                raise too_large
+
+            if pending_size >= settings.upload_block_size:
+                block = b"".join(pending)
+                pending.clear()
+                pending_size = 0
+                await run_in_threadpool(write_block, block)
+
+        parser.finalize()
+        if state["filename"] is None:
+            raise UploadError(f"No file uploaded in field '{field_name}'")
+        await run_in_threadpool(write_block, b"".join(pending))
+        await run_in_threadpool(temp_file.close)
+
+    except BaseException:
+        temp_file.close()
+        os.remove(temp_path)
+        raise
+
+    return ReceivedUpload(
+        filename=state["filename"],
+        temp_path=temp_path,
+        size=size,
+        content_hash=digest.hexdigest(),
+    )
@@ -1,14 +1,44 @@
+import json
 import time
 from datetime import datetime
-from celery import Celery
+from typing import Iterator, Optional
+from celery import Celery, Task, chain
 from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from langchain_core.documents import Document
 from sqlalchemy.orm import sessionmaker
 
 from app.config import get_settings
-from app.models import PDFDocument, Summary, TaskStatus
-from app.services.pdf_extractor import extract_text_from_pdf
-from app.services.summarizer import summarize_text, count_words
-from app.services.email import send_summary_email_sync
+from app.models import DeliveryStatus, EmailDelivery, PDFDocument, Summary, TaskStatus
+from app.services.checkpoints import CHUNK, EXTRACT, MAP, MAPPED, PLAN, CheckpointStore
+from app.services.document_text import PageTextWriter, iter_stored_pages, text_source_query
+from app.services.llm_cache import make_cache_key
+from app.services.pdf_extractor import PdfDocumentHandle, open_numbered_pdf_pages
+from app.services.progress import (
+    COMPLETED,
+    EMAILING,
+    EXTRACTING,
+    FAILED,
+    MAPPING,
+    REDUCING,
+    SUMMARIZING,
+    publish_progress,
+    track_progress,
+)
+from app.services.storage import get_storage
+from app.services.summarizer import (
+    MAP_PROMPT,
+    PROMPT_VERSION,
+    SummaryPlan,
+    count_words,
+    create_summarizer,
+    map_summaries,
+    plan_pages,
+    record_timing,
+    reduce_summaries,
+    simple_summarize,
+)
+from app.services.email import EmailDeliveryError, EmailNotConfigured, send_summary_email
 
 settings = get_settings()
 
@@ -28,6 +58,21 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=600,  # 10 minutes max
     worker_prefetch_multiplier=1,
+    # Priority lanes (see app.services.preflight.job_priority): the Redis
+    # broker keeps one list per priority and always serves the lowest first;
+    # every task a pipeline stage sends inherits the document's priority
+    broker_transport_options={"priority_steps": list(range(10)), "sep": ":", "queue_order_strategy": "priority"},
+    task_inherit_parent_priority=True,
+    # Each pipeline stage has its own queue so CPU-bound extraction and
+    # I/O-bound LLM/email work can be served by separately scaled workers
+    task_routes={
+        "app.tasks.worker.process_pdf_task": {"queue": "extract"},
+        "app.tasks.worker.extract_stage": {"queue": "extract"},
+        "app.tasks.worker.map_chunk_stage": {"queue": "llm"},
+        "app.tasks.worker.wait_for_map_stage": {"queue": "llm"},
+        "app.tasks.worker.reduce_stage": {"queue": "llm"},
+        "app.tasks.worker.send_summary_email_task": {"queue": "notify"},
+    },
 )
 
 # Create sync database session for Celery
@@ -35,17 +80,184 @@ engine = create_engine(settings.database_url_sync)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-@celery_app.task(bind=True, max_retries=3)
+def complete_duplicates(db, document: PDFDocument, summary: Summary) -> int:
+    """
+    Give every upload waiting on ``document`` its own copy of the summary.
+
+    Returns:
+        Number of duplicate documents completed
+    """
+    duplicates = (
+        db.query(PDFDocument)
+        .filter(
+            PDFDocument.duplicate_of_id == document.id,
+            PDFDocument.status.in_([TaskStatus.PENDING.value, TaskStatus.PROCESSING.value]),
+        )
+        .all()
+    )
+
+    completed = 0
+    for duplicate in duplicates:
+        duplicate_summary = summary.copy_for(duplicate.id, duplicate.user_id)
+        db.add(duplicate_summary)
+        duplicate.page_count = document.page_count
+        duplicate.title = document.title
+        duplicate.author = document.author
+        duplicate.status = TaskStatus.COMPLETED.value
+        try:
+            db.commit()
+        except IntegrityError:
+            # Already completed by the upload endpoint
+            db.rollback()
+            continue
+
+        send_summary_email_task.delay(duplicate_summary.id, str(duplicate.user.email))
+        completed += 1
+
+    return completed
+
+
+def fail_duplicates(db, document_id: int, message: str) -> None:
+    """Mark uploads waiting on a document that failed for good as failed too."""
+    waiting = db.query(PDFDocument).filter(
+        PDFDocument.duplicate_of_id == document_id,
+        PDFDocument.status.in_([TaskStatus.PENDING.value, TaskStatus.PROCESSING.value]),
+    )
+    duplicate_ids = [duplicate_id for duplicate_id, in waiting.with_entities(PDFDocument.id).all()]
+    waiting.update({PDFDocument.status: TaskStatus.FAILED.value}, synchronize_session=False)
+    db.commit()
+    for duplicate_id in duplicate_ids:
+        publish_progress(duplicate_id, FAILED, message=message)
+
+
+class PermanentPipelineError(Exception):
+    """A failure that retrying cannot fix (e.g. a PDF without a text layer)."""
+
+
+def mark_failed(document_id: int, error: Exception) -> None:
+    """Mark a document (and uploads waiting on it) as failed."""
+    print(f"Error processing PDF {document_id}: {str(error)}")
+
+    db = SessionLocal()
+    try:
+        document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+        if document:
+            document.status = TaskStatus.FAILED.value
+            db.commit()
+        fail_duplicates(db, document_id, str(error))
+    finally:
+        db.close()
+    publish_progress(document_id, FAILED, message=str(error))
+
+
+class PipelineTask(Task):
+    """
+    Base class for the pipeline stages (first argument is the document ID).
+
+    Stages are retried with a growing delay; once a stage runs out of
+    retries the document is marked as failed.
+    """
+
+    autoretry_for = (Exception,)
+    dont_autoretry_for = (PermanentPipelineError,)
+    max_retries = 3
+    retry_backoff = 60
+    retry_jitter = False
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        mark_failed(args[0], exc)
+
+
+@celery_app.task(bind=True)
+def send_summary_email_task(self, summary_id: int, user_email: str, delivery_id: Optional[int] = None):
+    """
+    Celery task to email a summary (last stage of the pipeline, also used for reused summaries and resends).
+
+    Every email is tracked as an EmailDelivery whose status the API exposes.
+    Rate-limited or failed requests are retried with a growing delay, up to
+    ``settings.email_max_retries`` times.
+
+    Args:
+        summary_id: ID of the Summary to send
+        user_email: Email address to send the summary to
+        delivery_id: EmailDelivery to send (resends create it up front); None for the pipeline's email
+    """
+    db = SessionLocal()
+
+    try:
+        summary = db.query(Summary).filter(Summary.id == summary_id).first()
+
+        if not summary:
+            raise Exception(f"Summary {summary_id} not found")
+
+        if delivery_id is None:
+            # Already sent by an earlier attempt
+            if summary.email_sent:
+                publish_progress(summary.pdf_document_id, COMPLETED)
+                return {"status": "completed", "summary_id": summary_id, "email_sent": True}
+            delivery = EmailDelivery(summary_id=summary_id, to_email=user_email)
+            db.add(delivery)
+            db.commit()
+        else:
+            delivery = db.query(EmailDelivery).filter(EmailDelivery.id == delivery_id).first()
+            if not delivery:
+                raise Exception(f"Email delivery {delivery_id} not found")
+            if delivery.status == DeliveryStatus.SENT.value:
+                return {"status": "completed", "summary_id": summary_id, "email_sent": True}
+
+        publish_progress(summary.pdf_document_id, EMAILING)
+        print(f"Sending summary email to {user_email}")
+        delivery.attempts += 1
+        try:
+            delivery.provider_message_id = send_summary_email(
+                to_email=user_email,
+                filename=summary.pdf_document.original_filename,
+                summary_content=summary.content,
+            )
+        except EmailNotConfigured as e:
+            print(str(e))
+            delivery.status = DeliveryStatus.SKIPPED.value
+        except EmailDeliveryError as e:
+            print(f"Failed to send email: {str(e)}")
+            delivery.error = str(e)
+            if e.retryable and self.request.retries < settings.email_max_retries:
+                db.commit()
+                raise self.retry(
+                    args=(summary_id, user_email, delivery.id),
+                    countdown=30 * (self.request.retries + 1),
+                    max_retries=settings.email_max_retries,
+                )
+            delivery.status = DeliveryStatus.FAILED.value
+        else:
+            delivery.status = DeliveryStatus.SENT.value
+            delivery.sent_at = datetime.utcnow()
+            delivery.error = None
+            summary.email_sent = True
+            summary.email_sent_at = delivery.sent_at
+        db.commit()
+
+        publish_progress(summary.pdf_document_id, COMPLETED)
+        email_sent = delivery.status == DeliveryStatus.SENT.value
+        return {"status": "completed", "summary_id": summary_id, "email_sent": email_sent}
+
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, base=PipelineTask)
 def process_pdf_task(self, document_id: int, user_email: str):
     """
-    Celery task to process PDF: extract text, summarize, and send email.
+    Celery task to start processing a PDF: extract text, summarize, and send email.
+
+    The work runs as a pipeline of stages, each routed to its own queue:
+    extract -> chunk -> map (one task per chunk, as a chord) -> reduce -> notify.
+    Stage outputs are checkpointed, so retries resume from the last completed step.
 
     Args:
         document_id: ID of the PDFDocument to process
         user_email: Email address to send the summary to
     """
     db = SessionLocal()
-    start_time = time.time()
 
     try:
         # Get document from database
@@ -58,31 +270,370 @@ def process_pdf_task(self, document_id: int, user_email: str):
         document.status = TaskStatus.PROCESSING.value
         db.commit()
 
-        # Step 1: Extract text from PDF
+        # A previous run already produced the summary: only the email is left
+        if document.summary:
+            print(f"Resuming document {document_id} after summarization")
+            document.status = TaskStatus.COMPLETED.value
+            db.commit()
+            send_summary_email_task.delay(document.summary.id, user_email)
+            return {"status": "resumed", "document_id": document_id}
+
+        extract_stage.delay(document_id, user_email, time.time())
+
+        return {"status": "started", "document_id": document_id}
+
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, base=PipelineTask)
+def extract_stage(self, document_id: int, user_email: str, started_at: float):
+    """
+    Pipeline stage 1: stream text out of the PDF and fan chunks out to the map stage.
+
+    Pages are extracted and cleaned one at a time. Text that fits a single
+    prompt is checkpointed for a one-call summary; longer text goes through
+    the incremental chunker, and every chunk is checkpointed and sent to
+    map_chunk_stage as soon as it is ready, so summarization overlaps with
+    extraction and memory stays bounded by a few pages. The full text is
+    stored compressed, and identical content processed again (e.g. after a
+    prompt change) is read from there instead of the PDF.
+
+    Args:
+        document_id: ID of the PDFDocument to process
+        user_email: Email address to send the summary to
+        started_at: Timestamp at which processing started
+    """
+    checkpoint = CheckpointStore(SessionLocal, document_id)
+    finish = chain(
+        reduce_stage.si(document_id, started_at),
+        send_summary_email_task.s(user_email),
+    )
+
+    plan = checkpoint.get(PLAN)
+    if plan:
+        print(f"Resuming document {document_id} from extraction checkpoint")
+        if json.loads(plan)["strategy"] == SummaryPlan.STUFF:
+            return self.replace(finish)
+        return self.replace(chain(wait_for_map_stage.si(document_id), finish))
+
+    db = SessionLocal()
+
+    try:
+        document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+
+        if not document:
+            raise Exception(f"Document {document_id} not found")
+
         print(f"Extracting text from PDF: {document.original_filename}")
-        extracted_text, page_count = extract_text_from_pdf(document.file_path)
+        storage_key = document.file_path
+        text_source_id = None
+        if document.content_hash:
+            text_source_id = db.execute(text_source_query(document.content_hash)).scalar_one_or_none()
+
+    finally:
+        db.close()
 
-        # Update page count
+    if text_source_id is not None:
+        strategy = reuse_document_text(document_id, text_source_id, checkpoint)
+    else:
+        # The extraction engines need a local file; object storage downloads it to a temp file
+        with get_storage().local_copy(storage_key) as file_path:
+            strategy = extract_document(document_id, file_path, checkpoint)
+
+    if strategy == SummaryPlan.STUFF:
+        return self.replace(finish)
+    return self.replace(chain(wait_for_map_stage.si(document_id), finish))
+
+
+def extract_document(document_id: int, file_path: str, checkpoint: CheckpointStore) -> str:
+    """
+    Extract a PDF page by page, store its full text and checkpoint its chunks and plan.
+
+    Args:
+        document_id: ID of the PDFDocument being processed
+        file_path: Local path of the PDF
+        checkpoint: Checkpoint store of the document
+
+    Returns:
+        The summarization strategy (SummaryPlan.STUFF or a map-reduce strategy)
+    """
+    extraction_timings: dict[str, dict] = {}
+    try:
+        handle = PdfDocumentHandle(file_path)
+        metadata = handle.metadata
+    except Exception as e:
+        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+    page_count, pages = open_numbered_pdf_pages(handle, timings=extraction_timings)
+
+    # Update page count and metadata, read from the same parse as the text
+    db = SessionLocal()
+    try:
+        document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
         document.page_count = page_count
+        document.title = metadata["title"][:500] or None
+        document.author = metadata["author"][:255] or None
+        estimated_tokens = document.estimated_tokens
         db.commit()
+    finally:
+        db.close()
+
+    text = PageTextWriter()
+    pages = track_progress(document_id, EXTRACTING, pages, page_count, position=lambda page: page[0])
+    plan = plan_document(document_id, text.track(pages), page_count, checkpoint, estimated_tokens)
+
+    # Stored before the plan, so a resumed run never misses it
+    db = SessionLocal()
+    try:
+        text.save(db, document_id)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Stored {len(text.pages)} pages of text: {text.raw_bytes} bytes, {text.compressed_bytes} compressed")
+
+    plan["extraction_timings"] = extraction_timings
+    checkpoint.put(PLAN, json.dumps(plan))
+    return plan["strategy"]
+
+
+def reuse_document_text(document_id: int, source_id: int, checkpoint: CheckpointStore) -> str:
+    """
+    Plan a document from the stored text of an identical one, without opening the PDF.
+
+    Args:
+        document_id: ID of the PDFDocument being processed
+        source_id: ID of the document whose text is stored
+        checkpoint: Checkpoint store of the document
+
+    Returns:
+        The summarization strategy
+    """
+    print(f"Reusing the stored text of document {source_id}")
+    db = SessionLocal()
+    try:
+        source = db.query(PDFDocument).filter(PDFDocument.id == source_id).first()
+        document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+        document.page_count = source.page_count
+        document.title = source.title
+        document.author = source.author
+        page_count = source.page_count
+        estimated_tokens = document.estimated_tokens
+        db.commit()
+    finally:
+        db.close()
 
+    started = time.time()
+    pages = track_progress(
+        document_id, EXTRACTING, iter_stored_pages(SessionLocal, source_id), page_count, position=lambda page: page[0]
+    )
+    plan = plan_document(document_id, (text for _, text in pages), page_count, checkpoint, estimated_tokens)
+    plan["extraction_timings"] = {"stored": {"pages": page_count, "seconds": time.time() - started}}
+    checkpoint.put(PLAN, json.dumps(plan))
+    return plan["strategy"]
+
+
+def plan_document(
+    document_id: int,
+    pages: Iterator[str],
+    page_count: int,
+    checkpoint: CheckpointStore,
+    estimated_tokens: Optional[int] = None,
+) -> dict:
+    """
+    Consume a document's pages, checkpointing its text or chunks, and return its plan.
+
+    Args:
+        document_id: ID of the PDFDocument being processed
+        pages: Page texts, in order
+        page_count: Number of pages
+        checkpoint: Checkpoint store of the document
+        estimated_tokens: Upload preflight estimate of the text's tokens, for sizing chunks evenly
+
+    Returns:
+        The plan, to be checkpointed as PLAN once the caller is done
+    """
+    map_started_at = None
+
+    def map_chunk(index: int, doc: Document) -> None:
+        # Longer documents: map each chunk as soon as it is ready
+        nonlocal map_started_at
+        if map_started_at is None:
+            map_started_at = time.time()
+        checkpoint.put(CHUNK, doc.page_content, key=str(index))
+        map_chunk_stage.delay(document_id, index)
+
+    plan, extracted_text = plan_pages(pages, map_chunk, estimated_tokens)
+    print(f"Summarization plan: {plan}")
+
+    if plan.strategy == SummaryPlan.STUFF:
         if not extracted_text.strip():
-            raise Exception("No text could be extracted from the PDF")
+            raise PermanentPipelineError("No text could be extracted from the PDF")
+        # Documents that fit one prompt skip the map phase entirely
+        checkpoint.put(EXTRACT, json.dumps({"text": extracted_text, "page_count": page_count}))
+        return {
+            "strategy": plan.strategy,
+            "input_tokens": plan.input_tokens,
+            "estimated_calls": plan.estimated_calls,
+            "chunk_count": 0,
+        }
 
-        # Step 2: Summarize text using GPT-4
-        print(f"Summarizing text ({len(extracted_text)} characters)")
-        summary_content = summarize_text(extracted_text)
+    return {
+        "strategy": plan.strategy,
+        "input_tokens": plan.input_tokens,
+        "estimated_calls": plan.estimated_calls,
+        "chunk_count": plan.chunk_count,
+        "map_started_at": map_started_at or time.time(),
+    }
+
+
+@celery_app.task(bind=True, max_retries=3)
+def map_chunk_stage(self, document_id: int, index: int):
+    """
+    Pipeline stage 3 (one task per chunk): summarize a chunk and checkpoint the result.
+
+    A chunk that keeps failing (including reading or writing its
+    checkpoints) is left out instead of failing the document, so the other
+    sections still reach the reduce stage. If not even its "failed" marker
+    can be written, the document is marked as failed.
+
+    Args:
+        document_id: ID of the PDFDocument being processed
+        index: Position of the chunk in the document
+    """
+    checkpoint = CheckpointStore(SessionLocal, document_id)
+
+    try:
+        chunk = checkpoint.get(CHUNK, key=str(index))
+        if chunk is None:
+            raise Exception(f"Chunk {index + 1} of document {document_id} not found")
+        map_summaries([Document(page_content=chunk)], create_summarizer(), checkpoint)
+        checkpoint.put(MAPPED, "ok", key=str(index))
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=30 * (self.request.retries + 1))
+        print(f"Error processing chunk {index + 1} of PDF {document_id}, skipping it: {str(e)}")
+        try:
+            checkpoint.put(MAPPED, "failed", key=str(index))
+        except Exception as marker_error:
+            mark_failed(document_id, marker_error)
+            raise
 
-        # Calculate processing time
-        processing_time = time.time() - start_time
+    # The chunk count is only known once extraction is done
+    plan = checkpoint.get(PLAN)
+    if plan:
+        publish_progress(document_id, MAPPING, checkpoint.count(MAPPED), json.loads(plan)["chunk_count"])
 
-        # Step 3: Save summary to database
+
+@celery_app.task(bind=True, max_retries=None)
+def wait_for_map_stage(self, document_id: int):
+    """
+    Pipeline stage 3b: wait until every chunk has been through the map stage.
+
+    Map tasks are sent while extraction is still running, so their count is
+    only known at the end; this stage polls the per-chunk markers instead of
+    using a chord, doubling the pause between checks up to
+    ``settings.map_wait_max_interval`` seconds. After
+    ``settings.map_wait_timeout`` seconds it gives up on missing chunks and
+    lets the reduce stage run without them. An error while checking marks
+    the document as failed.
+
+    Args:
+        document_id: ID of the PDFDocument being processed
+    """
+    try:
+        checkpoint = CheckpointStore(SessionLocal, document_id)
+        plan = checkpoint.get(PLAN)
+        if plan is None:
+            raise Exception(f"No summarization plan stored for document {document_id}")
+        plan = json.loads(plan)
+        mapped = checkpoint.count(MAPPED)
+        missing = plan["chunk_count"] - mapped
+        if self.request.retries == 0:
+            publish_progress(document_id, MAPPING, mapped, plan["chunk_count"])
+    except Exception as e:
+        mark_failed(document_id, e)
+        raise
+
+    if missing > 0:
+        if time.time() - plan["map_started_at"] < settings.map_wait_timeout:
+            raise self.retry(countdown=min(settings.map_wait_max_interval, 2 ** (self.request.retries + 1)))
+        print(f"Gave up waiting for {missing} chunks of document {document_id}")
+
+
+@celery_app.task(bind=True, base=PipelineTask)
+def reduce_stage(self, document_id: int, started_at: float):
+    """
+    Pipeline stage 4: combine the chunk summaries and save the final Summary.
+
+    Args:
+        document_id: ID of the PDFDocument being processed
+        started_at: Timestamp at which processing started
+
+    Returns:
+        ID of the saved Summary
+    """
+    db = SessionLocal()
+    checkpoint = CheckpointStore(SessionLocal, document_id)
+
+    try:
+        document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
+
+        if not document:
+            raise Exception(f"Document {document_id} not found")
+
+        if document.summary:
+            return document.summary.id
+
+        plan = json.loads(checkpoint.get(PLAN))
+        llm = create_summarizer()
+        stage_timings = [
+            {
+                "stage": f"extract:{engine}",
+                "level": 0,
+                "inputs": entry["pages"],
+                "calls": entry["pages"],
+                "seconds": round(entry["seconds"], 3),
+            }
+            for engine, entry in plan.get("extraction_timings", {}).items()
+        ]
+
+        if plan["strategy"] == SummaryPlan.STUFF:
+            publish_progress(document_id, SUMMARIZING)
+            started = time.time()
+            waits = []
+            extracted_text = json.loads(checkpoint.get(EXTRACT))["text"]
+            summary_content = simple_summarize(extracted_text, llm, waits)
+            record_timing(stage_timings, "stuff", 0, 1, 1, started, waits)
+        else:
+            # Collect chunk summaries in document order
+            chunks = checkpoint.get_many(CHUNK)
+            completed = checkpoint.get_many(MAP)
+            summaries = []
+            for index in range(plan["chunk_count"]):
+                key = make_cache_key(MAP_PROMPT, llm, chunks[str(index)])
+                if key in completed:
+                    summaries.append(completed[key])
+            record_timing(stage_timings, "map", 0, plan["chunk_count"], plan["chunk_count"], plan["map_started_at"])
+
+            if not summaries:
+                raise Exception(f"All {plan['chunk_count']} chunks failed to summarize")
+
+            publish_progress(document_id, REDUCING)
+            summary_content = reduce_summaries(summaries, llm, stage_timings)
+
+        # Save summary to database
         summary = Summary(
             pdf_document_id=document_id,
+            user_id=document.user_id,
             content=summary_content,
-            extracted_text=extracted_text[:50000],  # Store first 50k chars
             word_count=count_words(summary_content),
-            processing_time=processing_time,
+            processing_time=time.time() - started_at,
+            stage_timings=stage_timings,
+            strategy=plan["strategy"],
+            input_tokens=plan["input_tokens"],
+            estimated_llm_calls=plan["estimated_calls"],
+            prompt_version=PROMPT_VERSION,
+            model=settings.llm_model,
         )
         db.add(summary)
 
@@ -90,47 +641,14 @@ def process_pdf_task(self, document_id: int, user_email: str):
         document.status = TaskStatus.COMPLETED.value
         db.commit()
 
-        # Step 4: Send email with summary
-        print(f"Sending summary email to {user_email}")
-        email_sent = send_summary_email_sync(
-            to_email=user_email,
-            filename=document.original_filename,
-            summary_content=summary_content,
-        )
+        # The summary is the final checkpoint; intermediate ones are no longer needed
+        checkpoint.clear()
 
-        if email_sent:
-            summary.email_sent = True
-            summary.email_sent_at = datetime.utcnow()
-            db.commit()
+        # Complete identical uploads that attached to this document while it ran
+        complete_duplicates(db, document, summary)
 
         print(f"PDF processing completed for document {document_id}")
-
-        return {
-            "status": "completed",
-            "document_id": document_id,
-            "summary_length": len(summary_content),
-            "processing_time": processing_time,
-            "email_sent": email_sent,
-        }
-
-    except Exception as e:
-        print(f"Error processing PDF {document_id}: {str(e)}")
-
-        # Update document status to failed
-        document = db.query(PDFDocument).filter(PDFDocument.id == document_id).first()
-        if document:
-            document.status = TaskStatus.FAILED.value
-            db.commit()
-
-        # Retry if attempts remaining
-        if self.request.retries < self.max_retries:
-            raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
-
-        return {
-            "status": "failed",
-            "document_id": document_id,
-            "error": str(e),
-        }
+        return summary.id
 
     finally:
         db.close()
@@ -0,0 +1,83 @@
+"""
+Compare the legacy character splitter with the token-budgeted splitter.
+
+Reports, per document, the number of chunks (= map LLM calls) and the total
+number of tokens sent to the map prompt, including overlap.
+
+Usage:
+    python -m benchmarks.bench_chunking [--pdf-dir DIR] [--max-tokens N]
+"""
+import argparse
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.services.pdf_extractor import extract_text_from_pdf
+from app.services.summarizer import count_tokens, split_text_into_chunks
+from benchmarks.corpus import corpus_paths
+
+
+def legacy_split(text: str) -> list[str]:
+    """The previous splitter: 4000 characters with 500 characters of overlap."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=4000,
+        chunk_overlap=500,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+    return splitter.split_text(text)
+
+
+def measure(chunks: list[str], text_tokens: int, seconds: float) -> dict:
+    chunk_tokens = [count_tokens(chunk) for chunk in chunks]
+    total = sum(chunk_tokens)
+    return {
+        "chunks": len(chunks),
+        "tokens": total,
+        "max_chunk": max(chunk_tokens, default=0),
+        "overhead": (total - text_tokens) / text_tokens if text_tokens else 0.0,
+        "seconds": seconds,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", help="Directory of PDFs to use instead of the generated corpus")
+    parser.add_argument("--max-tokens", type=int, default=None, help="Token budget per chunk")
+    args = parser.parse_args()
+
+    header = f"{'document':<28} {'text tok':>9} | {'splitter':<7} {'chunks':>6} {'tokens':>9} {'max':>6} {'overlap':>8} {'time':>7}"
+    print(header)
+    print("-" * len(header))
+
+    totals = {"legacy": [0, 0], "token": [0, 0]}
+    for path in corpus_paths(args.pdf_dir):
+        text, _ = extract_text_from_pdf(path)
+        text_tokens = count_tokens(text)
+
+        started = time.perf_counter()
+        legacy = measure(legacy_split(text), text_tokens, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        docs = split_text_into_chunks(text, max_tokens=args.max_tokens)
+        token = measure([doc.page_content for doc in docs], text_tokens, time.perf_counter() - started)
+
+        name = path.rsplit("/", 1)[-1][:28]
+        for label, result in (("legacy", legacy), ("token", token)):
+            totals[label][0] += result["chunks"]
+            totals[label][1] += result["tokens"]
+            print(
+                f"{name:<28} {text_tokens:>9} | {label:<7} {result['chunks']:>6} {result['tokens']:>9} "
+                f"{result['max_chunk']:>6} {result['overhead']:>7.1%} {result['seconds']:>6.2f}s"
+            )
+            name = ""
+
+    print("-" * len(header))
+    for label, (chunks, tokens) in totals.items():
+        print(f"{'total':<28} {'':>9} | {label:<7} {chunks:>6} {tokens:>9}")
+    legacy_chunks, token_chunks = totals["legacy"][0], totals["token"][0]
+    if legacy_chunks:
+        print(f"\nMap calls reduced by {1 - token_chunks / legacy_chunks:.1%}")
+
+
+if __name__ == "__main__":
+    main()
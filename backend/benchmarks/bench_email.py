@@ -0,0 +1,119 @@
+"""
+Measure email sending against a local stub of the SendGrid API.
+
+Starts a stub ``/v3/mail/send`` server (HTTP/1.1 keep-alive, optional added
+latency) and sends --messages summary emails with one new HTTP client per
+message, as the previous code did with SendGridAPIClient, and with the
+shared pooled SendGridClient, from --threads threads like a notify worker.
+Reports messages/sec and the number of connections the server accepted.
+
+With --serve it only runs the stub, for manual testing of the workers:
+    SENDGRID_API_KEY=test SENDGRID_API_URL=http://127.0.0.1:8025 celery -A app.tasks.worker worker -Q notify
+
+Usage:
+    python -m benchmarks.bench_email [--messages 200] [--threads 8] [--latency-ms 20] [--serve] [--port 8025]
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from app.services.email import SendGridClient, build_summary_email
+
+
+class StubSendGrid(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.connections = 0
+        self.messages = 0
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(self.server.latency)
+        if self.path != "/v3/mail/send" or not self.headers.get("Authorization", "").startswith("Bearer "):
+            self.send_response(401)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if not body.get("personalizations"):
+            self.send_response(400)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with self.server.lock:
+            self.server.messages += 1
+            message_id = f"stub-{next(self.server.ids)}"
+        self.send_response(202)
+        self.send_header("X-Message-Id", message_id)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(server: StubSendGrid, send, messages: int, threads: int) -> tuple[float, int]:
+    """Send ``messages`` emails with ``send``; return (messages/sec, connections opened)."""
+    server.connections = 0
+    payload = build_summary_email("reader@example.com", "report.pdf", "Summary text. " * 200)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda _: send(payload), range(messages)))
+    return messages / (time.perf_counter() - started), server.connections
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20, help="Added server latency per request")
+    parser.add_argument("--port", type=int, default=0, help="Stub server port (default: any free port)")
+    parser.add_argument("--serve", action="store_true", help="Only run the stub server")
+    args = parser.parse_args()
+
+    server = StubSendGrid(("127.0.0.1", args.port), args.latency_ms / 1000)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    if args.serve:
+        print(f"Stub SendGrid API listening on {base_url}")
+        server.serve_forever()
+        return
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def send_with_new_client(payload: dict) -> None:
+        with httpx.Client(base_url=base_url, headers={"Authorization": "Bearer test"}) as client:
+            client.post("/v3/mail/send", json=payload).raise_for_status()
+
+    pooled = SendGridClient("test", base_url, timeout=10, max_connections=args.threads)
+
+    header = f"{'client':<22} {'messages/s':>11} {'connections':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, send in (("new client per message", send_with_new_client), ("shared pooled client", pooled.send)):
+        rate, connections = run(server, send, args.messages, args.threads)
+        print(f"{name:<22} {rate:>11.1f} {connections:>12}")
+
+    pooled.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare PDF extraction engines (pypdf vs PyMuPDF) on the sample corpus.
+
+Runs extract_text_from_pdf in-process with every installed engine, with and
+without per-page fallback, and reports pages/sec, speedup over pypdf, the
+number of pages each engine found empty, and characters extracted.
+
+Usage:
+    python -m benchmarks.bench_engines [--pdf-dir DIR] [--engines pypdf pymupdf] [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from app.services import pdf_extractor
+from app.services.pdf_engines import available_engines
+from benchmarks.corpus import corpus_paths
+
+
+def empty_pages(path: str, engine: str) -> int:
+    with pdf_extractor.PdfDocumentHandle(path, engine, fallback=False) as handle:
+        return sum(1 for index in range(handle.page_count) if not handle.page_text(index).strip())
+
+
+def time_engine(path: str, engine: str, fallback: bool, repeat: int) -> tuple[float, int, int, dict]:
+    best = float("inf")
+    for _ in range(repeat):
+        timings: dict = {}
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            text, page_count = pdf_extractor.extract_text_from_pdf(
+                path, workers=1, engine=engine, fallback=fallback, timings=timings
+            )
+        best = min(best, time.perf_counter() - started)
+    return best, page_count, len(text), timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", help="Directory of PDFs to use instead of the generated corpus")
+    parser.add_argument("--engines", nargs="+", default=sorted(available_engines(), key=lambda name: name != "pypdf"))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration (best is reported)")
+    args = parser.parse_args()
+
+    header = (
+        f"{'document':<28} {'engine':<18} {'pages':>6} {'empty':>6} "
+        f"{'seconds':>9} {'pages/s':>9} {'speedup':>8} {'chars':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for path in corpus_paths(args.pdf_dir):
+        name = os.path.basename(path)[:28]
+        baseline = None
+        for engine in args.engines:
+            for fallback in (False, True):
+                seconds, page_count, chars, timings = time_engine(path, engine, fallback, args.repeat)
+                baseline = baseline or seconds
+                label = f"{engine}+fallback" if fallback else engine
+                empty = empty_pages(path, engine) if not fallback else ""
+                print(
+                    f"{name:<28} {label:<18} {page_count:>6} {empty:>6} {seconds:>9.3f} "
+                    f"{page_count / seconds:>9.1f} {baseline / seconds:>7.2f}x {chars:>10}"
+                )
+                if fallback and len(timings) > 1:
+                    print(f"{'':<28}   " + ", ".join(
+                        f"{used} {entry['pages']} pages in {entry['seconds']:.3f}s" for used, entry in timings.items()
+                    ))
+                name = ""
+
+
+if __name__ == "__main__":
+    main()
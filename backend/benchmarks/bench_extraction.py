@@ -0,0 +1,78 @@
+"""
+Measure text extraction throughput (pages/sec) as extraction processes are added.
+
+Runs extract_text_from_pdf on each PDF with every installed engine and 1,
+2, 4, ... processes (up to the CPU count, or --workers) and reports
+pages/sec and speedup over the single-process run. As in the workers, the
+process pool is started on first use and reused, so the first run of each
+worker count ("first s") includes starting it; the others are warm.
+Comparing the speedups by page count shows where
+PARALLEL_EXTRACTION_MIN_PAGES(_PYMUPDF) should sit for an engine.
+
+Usage:
+    python -m benchmarks.bench_extraction [--pdf-dir DIR] [--engines pypdf pymupdf] [--workers 1 2 4 8] [--repeat N]
+"""
+import argparse
+import os
+import time
+
+from app.services import pdf_extractor
+from app.services.pdf_engines import available_engines
+from benchmarks.corpus import corpus_paths
+
+
+def default_worker_counts() -> list[int]:
+    counts, n = [], 1
+    while n <= (os.cpu_count() or 1):
+        counts.append(n)
+        n *= 2
+    return counts
+
+
+def time_extraction(path: str, engine: str, workers: int, repeat: int) -> tuple[float, float, int]:
+    """Return (first run seconds, best of the other runs, page count)."""
+    runs = []
+    page_count = 0
+    for _ in range(repeat + 1):
+        started = time.perf_counter()
+        _, page_count = pdf_extractor.extract_text_from_pdf(path, workers=workers, engine=engine)
+        runs.append(time.perf_counter() - started)
+    return runs[0], min(runs[1:]), page_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", help="Directory of PDFs to use instead of the generated corpus")
+    parser.add_argument("--engines", nargs="+", default=available_engines())
+    parser.add_argument("--workers", type=int, nargs="+", default=default_worker_counts())
+    parser.add_argument("--repeat", type=int, default=3, help="Warm runs per configuration (best is reported)")
+    args = parser.parse_args()
+
+    # Benchmark the parallel path for every PDF, whatever its size
+    pdf_extractor.settings.parallel_extraction_min_pages = 1
+    pdf_extractor.settings.parallel_extraction_min_pages_pymupdf = 1
+
+    print(f"CPUs: {os.cpu_count()}")
+    header = (
+        f"{'document':<28} {'engine':<8} {'pages':>6} {'workers':>8} {'first s':>8} "
+        f"{'seconds':>9} {'pages/s':>9} {'speedup':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for path in corpus_paths(args.pdf_dir):
+        name = os.path.basename(path)[:28]
+        for engine in args.engines:
+            baseline = None
+            for workers in args.workers:
+                first, seconds, page_count = time_extraction(path, engine, workers, args.repeat)
+                baseline = baseline or seconds
+                print(
+                    f"{name:<28} {engine:<8} {page_count:>6} {workers:>8} {first:>8.3f} {seconds:>9.3f} "
+                    f"{page_count / seconds:>9.1f} {baseline / seconds:>7.2f}x"
+                )
+                name = ""
+
+
+if __name__ == "__main__":
+    main()
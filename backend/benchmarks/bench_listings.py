@@ -0,0 +1,217 @@
+"""
+Compare full-row and slim-projection listing queries for documents and summaries.
+
+Seeds a database with --documents documents for one user, each with a summary
+of --summary-chars characters and --text-chars characters of extracted text
+(the sizes the worker stores). Then times one listing page the way the API
+used to build it (whole ORM rows with the summary relationship loaded) and
+the way it does now (only the rendered columns, has_summary as EXISTS, the
+summary preview cut by the database), and reports the JSON payload size.
+
+Usage:
+    python -m benchmarks.bench_listings [--database-url URL] [--documents N] [--limit 20] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, exists, func, insert, select
+from sqlalchemy.orm import Session, selectinload, undefer
+
+from app.database import Base
+from app.models import PDFDocument, Summary, TaskStatus, User
+from app.schemas import PDFDocumentListResponse, SummaryDetailResponse, SummaryListResponse
+from app.services.pagination import paginate
+
+DEFAULT_DATABASE_URL = "sqlite:///" + os.path.join(os.path.dirname(__file__), "results", "listings.db")
+PREVIEW_LENGTH = 300  # as in app.routers.summary
+BATCH_SIZE = 1000
+WORDS = "the report describes revenue growth costs risks outlook market segment quarter".split()
+
+
+def seed(engine, documents: int, summary_chars: int, text_chars: int) -> str:
+    """Create and fill the tables (unless already seeded with ``documents`` rows); return the user's ID."""
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        if session.scalar(select(func.count()).select_from(PDFDocument)) == documents:
+            return session.scalar(select(User.id))
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    user_id = str(uuid.uuid4())
+    started_at = datetime(2024, 1, 1)
+
+    def text(chars: int) -> str:
+        words = []
+        while sum(len(word) + 1 for word in words) < chars:
+            words.append(rng.choice(WORDS))
+        return " ".join(words)[:chars]
+
+    # A pool of texts keeps seeding fast; rows only need realistic sizes
+    summaries_pool = [text(summary_chars) for _ in range(16)]
+    texts_pool = [text(text_chars) for _ in range(16)]
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{
+            "id": user_id,
+            "email": "listings@example.com",
+            "hashed_password": "x",
+            "is_active": True,
+            "is_superuser": False,
+            "is_verified": True,
+        }])
+
+    print(f"Seeding {documents} documents...")
+    for batch_start in range(0, documents, BATCH_SIZE):
+        document_rows, summary_rows = [], []
+        for row in range(batch_start, min(batch_start + BATCH_SIZE, documents)):
+            created_at = started_at + timedelta(minutes=row)
+            document_rows.append({
+                "id": row + 1,
+                "user_id": user_id,
+                "filename": f"{row}.pdf",
+                "original_filename": f"report-{row}.pdf",
+                "file_path": f"{row}.pdf",
+                "file_size": rng.randint(10_000, 10_000_000),
+                "page_count": rng.randint(1, 400),
+                "status": TaskStatus.COMPLETED.value,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+            summary_rows.append({
+                "id": row + 1,
+                "pdf_document_id": row + 1,
+                "user_id": user_id,
+                "content": rng.choice(summaries_pool),
+                "extracted_text": rng.choice(texts_pool),
+                "word_count": summary_chars // 6,
+                "created_at": created_at + timedelta(seconds=30),
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(PDFDocument), document_rows)
+            conn.execute(insert(Summary), summary_rows)
+
+    return user_id
+
+
+def full_documents(session: Session, user_id: str, limit: int) -> list:
+    """The previous listing: whole documents with their summaries (all columns) loaded."""
+    query = paginate(select(PDFDocument).where(PDFDocument.user_id == user_id), PDFDocument.created_at, PDFDocument.id, limit)
+    query = query.options(
+        selectinload(PDFDocument.summary).options(undefer(Summary.content), undefer(Summary.extracted_text))
+    )
+    return [
+        PDFDocumentListResponse(
+            id=doc.id,
+            original_filename=doc.original_filename,
+            file_size=doc.file_size,
+            page_count=doc.page_count,
+            status=doc.status,
+            created_at=doc.created_at,
+            has_summary=doc.summary is not None,
+        ).model_dump(mode="json")
+        for doc in session.scalars(query).all()[:limit]
+    ]
+
+
+def slim_documents(session: Session, user_id: str, limit: int) -> list:
+    columns = select(
+        PDFDocument.id,
+        PDFDocument.original_filename,
+        PDFDocument.file_size,
+        PDFDocument.page_count,
+        PDFDocument.status,
+        PDFDocument.created_at,
+        exists().where(Summary.pdf_document_id == PDFDocument.id).label("has_summary"),
+    )
+    query = paginate(columns.where(PDFDocument.user_id == user_id), PDFDocument.created_at, PDFDocument.id, limit)
+    return [
+        PDFDocumentListResponse.model_validate(row._mapping).model_dump(mode="json")
+        for row in session.execute(query).all()[:limit]
+    ]
+
+
+def full_summaries(session: Session, user_id: str, limit: int) -> list:
+    """The previous listing: whole summaries with their documents loaded."""
+    query = paginate(select(Summary).where(Summary.user_id == user_id), Summary.created_at, Summary.id, limit)
+    query = query.options(
+        selectinload(Summary.pdf_document), undefer(Summary.content), undefer(Summary.extracted_text)
+    )
+    return [
+        SummaryDetailResponse.model_validate(summary, from_attributes=True).model_dump(mode="json")
+        for summary in session.scalars(query).all()[:limit]
+    ]
+
+
+def slim_summaries(session: Session, user_id: str, limit: int) -> list:
+    columns = select(
+        Summary.id,
+        Summary.pdf_document_id,
+        PDFDocument.original_filename,
+        func.substr(Summary.content, 1, PREVIEW_LENGTH).label("preview"),
+        Summary.word_count,
+        Summary.processing_time,
+        Summary.strategy,
+        Summary.email_sent,
+        Summary.email_sent_at,
+        Summary.created_at,
+    ).join(PDFDocument, PDFDocument.id == Summary.pdf_document_id)
+    query = paginate(columns.where(Summary.user_id == user_id), Summary.created_at, Summary.id, limit)
+    return [
+        SummaryListResponse.model_validate(row._mapping).model_dump(mode="json")
+        for row in session.execute(query).all()[:limit]
+    ]
+
+
+def measure(engine, listing, user_id: str, limit: int, repeat: int) -> tuple[float, int]:
+    """Median milliseconds to build one page, and its JSON size in bytes."""
+    samples = []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            payload = json.dumps(listing(session, user_id, limit))
+            samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(payload.encode())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL, help="Synchronous SQLAlchemy URL")
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--summary-chars", type=int, default=4000)
+    parser.add_argument("--text-chars", type=int, default=50000)
+    parser.add_argument("--limit", type=int, default=20, help="Page size")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median is reported)")
+    args = parser.parse_args()
+
+    if args.database_url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(args.database_url[len("sqlite:///"):]) or ".", exist_ok=True)
+    engine = create_engine(args.database_url)
+    user_id = seed(engine, args.documents, args.summary_chars, args.text_chars)
+
+    header = f"{'listing':<10} {'query':<6} {'ms':>9} {'bytes':>10} {'speedup':>8} {'smaller':>8}"
+    print(header)
+    print("-" * len(header))
+
+    listings = [
+        ("documents", full_documents, slim_documents),
+        ("summaries", full_summaries, slim_summaries),
+    ]
+    for name, full, slim in listings:
+        full_ms, full_bytes = measure(engine, full, user_id, args.limit, args.repeat)
+        slim_ms, slim_bytes = measure(engine, slim, user_id, args.limit, args.repeat)
+        print(f"{name:<10} {'full':<6} {full_ms:>9.2f} {full_bytes:>10}")
+        print(
+            f"{'':<10} {'slim':<6} {slim_ms:>9.2f} {slim_bytes:>10} "
+            f"{full_ms / slim_ms:>7.1f}x {full_bytes / slim_bytes:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Measure LLM call latency against a local fake OpenAI-compatible server.
+
+Starts a stub ``/v1/chat/completions`` server (HTTP/1.1 keep-alive) that
+answers after --latency-ms (+/- 20% jitter), except for --slow-fraction of
+requests that take --slow-factor times longer, like a loaded API. --threads
+threads send --calls chunk-summary calls:
+
+- new client per call: a fresh ChatOpenAI for every call, as before the gateway
+- gateway: the shared LLMGateway with its pooled client
+- gateway + hedging: the same, resending calls slower than the p95 latency
+
+Reports calls/sec, p50/p95/p99 latency, connections the server accepted and
+the hedged calls.
+
+With --serve it only runs the stub, for manual testing of the workers:
+    OPENAI_BASE_URL=http://127.0.0.1:8026/v1 OPENAI_API_KEY=test celery -A app.tasks.worker worker
+
+Usage:
+    python -m benchmarks.bench_llm_gateway [--calls 400] [--threads 8] [--latency-ms 200] [--slow-fraction 0.05] [--serve]
+"""
+import argparse
+import itertools
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_openai import ChatOpenAI
+
+from app.services.llm_gateway import LLMGateway
+from app.services.summarizer import MAP_PROMPT
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float, slow_fraction: float, slow_factor: float):
+        super().__init__(address, FakeOpenAIHandler)
+        self.latency = latency
+        self.slow_fraction = slow_fraction
+        self.slow_factor = slow_factor
+        self.connections = 0
+        self.requests = 0
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.random = random.Random(42)
+
+    def delay(self) -> float:
+        with self.lock:
+            delay = self.latency * self.random.uniform(0.8, 1.2)
+            if self.random.random() < self.slow_fraction:
+                delay *= self.slow_factor
+        return delay
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if not self.path.endswith("/chat/completions"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        time.sleep(self.server.delay())
+        prompt = " ".join(str(message.get("content", "")) for message in body.get("messages", []))
+        content = f"Summary of {len(prompt.split())} words: " + " ".join(prompt.split()[-40:])
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        with self.server.lock:
+            self.server.requests += 1
+            completion_id = f"chatcmpl-fake-{next(self.server.ids)}"
+        payload = json.dumps({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except ConnectionError:
+            pass  # the client abandoned the request (the losing half of a hedge)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(server: FakeOpenAI, call, calls: int, threads: int) -> dict:
+    """Send ``calls`` prompts with ``call``; return throughput, latency percentiles and connections."""
+    server.connections = 0
+    server.requests = 0
+    prompts = [MAP_PROMPT.invoke({"text": f"Section {i}. " + "Lorem ipsum dolor sit amet. " * 200}) for i in range(calls)]
+
+    def one_call(prompt_value) -> float:
+        started = time.perf_counter()
+        call(prompt_value)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = sorted(pool.map(one_call, prompts))
+    return {
+        "rate": calls / (time.perf_counter() - started),
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+        "p99": latencies[int(0.99 * (len(latencies) - 1))],
+        "connections": server.connections,
+        "requests": server.requests,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=200, help="Typical server latency per call")
+    parser.add_argument("--slow-fraction", type=float, default=0.05, help="Share of calls that are slow")
+    parser.add_argument("--slow-factor", type=float, default=10, help="How much slower the slow calls are")
+    parser.add_argument("--port", type=int, default=0, help="Stub server port (default: any free port)")
+    parser.add_argument("--serve", action="store_true", help="Only run the stub server")
+    args = parser.parse_args()
+
+    server = FakeOpenAI(("127.0.0.1", args.port), args.latency_ms / 1000, args.slow_fraction, args.slow_factor)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    if args.serve:
+        print(f"Fake OpenAI API listening on {base_url}")
+        server.serve_forever()
+        return
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def call_with_new_client(prompt_value) -> None:
+        ChatOpenAI(model="gpt-4", openai_api_key="test", openai_api_base=base_url).invoke(prompt_value)
+
+    def gateway(hedge: bool) -> LLMGateway:
+        return LLMGateway(
+            api_key="test",
+            model="gpt-4",
+            temperature=0.3,
+            base_url=base_url,
+            timeout=30,
+            max_connections=2 * args.threads,  # room for hedges, like the default 16 for 8 map calls
+            hedge=hedge,
+            hedge_min_delay=0,
+        )
+
+    plain = gateway(False)
+    hedged = gateway(True)
+
+    header = f"{'client':<20} {'calls/s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'connections':>12} {'requests':>9} {'hedged':>7}"
+    print(header)
+    print("-" * len(header))
+    modes = (
+        ("new client per call", call_with_new_client, None),
+        ("gateway", lambda prompt_value: plain.invoke(plain.llm, prompt_value), plain),
+        ("gateway + hedging", lambda prompt_value: hedged.invoke(hedged.llm, prompt_value), hedged),
+    )
+    for name, call, instance in modes:
+        result = run(server, call, args.calls, args.threads)
+        hedges = instance.stats()["hedged_calls"] if instance is not None else 0
+        print(
+            f"{name:<20} {result['rate']:>8.1f} {result['p50']:>7.3f} {result['p95']:>7.3f} {result['p99']:>7.3f} "
+            f"{result['connections']:>12} {result['requests']:>9} {hedges:>7}"
+        )
+
+    plain.close()
+    hedged.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+End-to-end load test of the API and the Celery workers.
+
+Registers --users users and logs them in through the JWT flow, then runs
+one step per --concurrency value: --uploads uploads of corpus PDFs with that
+many in flight at once, each followed through GET /pdf/documents/{id} until
+it is completed or failed, and finally every user lists their summaries.
+Every upload gets a unique trailing comment, so duplicate detection never
+short-circuits the pipeline. Per step it reports upload latency
+percentiles, time to completion, throughput and error rates; the step with
+the highest throughput marks the saturation point. With --output the
+results are also written as JSON.
+
+Against a running stack (e.g. docker-compose, Postgres and Redis), with the
+LLM and SendGrid stubbed for the workers:
+    python -m benchmarks.bench_llm_gateway --serve --port 8026
+    python -m benchmarks.bench_email --serve --port 8025
+    OPENAI_BASE_URL=http://127.0.0.1:8026/v1 OPENAI_API_KEY=test \\
+    SENDGRID_API_URL=http://127.0.0.1:8025 SENDGRID_API_KEY=test \\
+        celery -A app.tasks.worker worker -Q extract,llm,notify --pool threads
+    python -m benchmarks.bench_load --base-url http://127.0.0.1:8000
+
+With --local it starts everything in this process instead: the FastAPI app
+(uvicorn), a Celery worker (thread pool, in-memory broker), SQLite, and the
+fake OpenAI and SendGrid servers. Handy for a quick run without Docker; the
+numbers then include the load generator sharing the process.
+
+Usage:
+    python -m benchmarks.bench_load (--base-url URL | --local) [--users 4] [--uploads 40]
+        [--concurrency 1 4 16] [--page-counts 2 10 50] [--output FILE]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from itertools import cycle
+from typing import Optional
+
+import httpx
+
+from benchmarks.corpus import corpus_paths
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def unique_pdf(data: bytes) -> bytes:
+    """The same PDF with a unique comment after %%EOF, so every upload has its own content hash."""
+    return data + f"\n% load-test {uuid.uuid4()}\n".encode()
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    """Register ``email`` (if needed) and log in; return the Authorization header."""
+    response = await client.post("/auth/register", json={"email": email, "password": password})
+    if response.status_code not in (201, 400):
+        response.raise_for_status()
+    response = await client.post("/auth/jwt/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def follow_document(
+    client: httpx.AsyncClient, headers: dict, name: str, data: bytes, args, results: dict
+) -> None:
+    """Upload one PDF and poll it until it is completed or failed, recording the timings."""
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            "/pdf/upload", files={"file": (name, unique_pdf(data), "application/pdf")}, headers=headers
+        )
+    except httpx.HTTPError as e:
+        results["upload_errors"].append(type(e).__name__)
+        return
+    results["upload_latencies"].append(time.perf_counter() - started)
+    if not response.is_success:
+        results["upload_errors"].append(str(response.status_code))
+        return
+
+    document_id = response.json()["document_id"]
+    while time.perf_counter() - started < args.timeout:
+        await asyncio.sleep(args.poll_interval)
+        try:
+            response = await client.get(f"/pdf/documents/{document_id}", headers=headers)
+        except httpx.HTTPError:
+            results["poll_errors"] += 1
+            continue
+        if response.status_code != 200:
+            results["poll_errors"] += 1
+            continue
+        status = response.json()["status"]
+        if status in TERMINAL_STATUSES:
+            results["completion_times"].append(time.perf_counter() - started)
+            if status == "failed":
+                results["failed"] += 1
+            return
+    results["timeouts"] += 1
+
+
+async def run_step(base_url: str, users: list[dict], corpus: list[tuple[str, bytes]], concurrency: int, args) -> dict:
+    """Run ``args.uploads`` uploads with ``concurrency`` in flight, then list every user's summaries."""
+    results = {
+        "concurrency": concurrency,
+        "uploads": args.uploads,
+        "upload_latencies": [],
+        "upload_errors": [],
+        "completion_times": [],
+        "poll_errors": 0,
+        "failed": 0,
+        "timeouts": 0,
+        "list_latencies": [],
+        "list_errors": 0,
+    }
+    limits = httpx.Limits(max_connections=2 * concurrency + len(users))
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        slots = asyncio.Semaphore(concurrency)
+        documents = cycle(corpus)
+        owners = cycle(users)
+
+        async def one_upload() -> None:
+            async with slots:
+                name, data = next(documents)
+                await follow_document(client, next(owners), name, data, args, results)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_upload() for _ in range(args.uploads)))
+        results["seconds"] = time.perf_counter() - started
+
+        for headers in users:
+            list_started = time.perf_counter()
+            try:
+                response = await client.get("/summaries", params={"limit": 20}, headers=headers)
+                response.raise_for_status()
+                results["list_latencies"].append(time.perf_counter() - list_started)
+            except httpx.HTTPError:
+                results["list_errors"] += 1
+    return results
+
+
+def summarize_step(results: dict) -> dict:
+    """Percentiles, throughput and error rates of one step."""
+    uploads = results["uploads"]
+    completed = len(results["completion_times"]) - results["failed"]
+    summary = {
+        "concurrency": results["concurrency"],
+        "uploads": uploads,
+        "seconds": round(results["seconds"], 2),
+        "documents_per_second": round(completed / results["seconds"], 3),
+        "upload_error_rate": round(len(results["upload_errors"]) / uploads, 4),
+        "upload_errors": sorted(set(results["upload_errors"])),
+        "failure_rate": round(results["failed"] / uploads, 4),
+        "timeout_rate": round(results["timeouts"] / uploads, 4),
+        "poll_errors": results["poll_errors"],
+        "list_errors": results["list_errors"],
+    }
+    for metric, values in (
+        ("upload", results["upload_latencies"]),
+        ("completion", results["completion_times"]),
+        ("list", results["list_latencies"]),
+    ):
+        for q in (0.5, 0.95, 0.99):
+            value = percentile(values, q)
+            summary[f"{metric}_p{int(q * 100)}"] = None if value is None else round(value, 3)
+    summary["completion_mean"] = round(statistics.mean(results["completion_times"]), 3) if results["completion_times"] else None
+    return summary
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_stack(args) -> str:
+    """
+    Start the API, a Celery worker and the LLM/SendGrid stubs in this process.
+
+    Settings are read when the app is first imported, so the environment is
+    set up before any ``app`` module is loaded.
+
+    Returns:
+        Base URL of the API
+    """
+    workdir = tempfile.mkdtemp(prefix="bench-load-")
+    llm_port, email_port, api_port = _free_port(), _free_port(), _free_port()
+    os.environ.update({
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/app.db",
+        "DATABASE_URL_SYNC": f"sqlite:///{workdir}/app.db",
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "STORAGE_BACKEND": "local",
+        "OPENAI_API_KEY": "test",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "SENDGRID_API_KEY": "test",
+        "SENDGRID_API_URL": f"http://127.0.0.1:{email_port}",
+        # No Redis in the local stack
+        "PROGRESS_EVENTS_ENABLED": "false",
+        "LLM_CACHE_REDIS": "false",
+        "LLM_REQUESTS_PER_MINUTE": "0",
+        "LLM_TOKENS_PER_MINUTE": "0",
+    })
+
+    import uvicorn
+    from celery.worker import WorkController
+
+    from app.database import engine
+    from app.main import app
+    from app.tasks.worker import celery_app
+    from benchmarks.bench_email import StubSendGrid
+    from benchmarks.bench_llm_gateway import FakeOpenAI
+
+    llm = FakeOpenAI(("127.0.0.1", llm_port), args.llm_latency_ms / 1000, 0.0, 1.0)
+    email = StubSendGrid(("127.0.0.1", email_port), 0.02)
+    for stub in (llm, email):
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    engine.echo = False
+    celery_app.conf.update(broker_url="memory://", result_backend="cache+memory://")
+    # ``celery -A`` does this; chains sent from worker threads use the default app
+    celery_app.set_default()
+    celery_app.set_current()
+    worker = WorkController(
+        app=celery_app,
+        pool_cls="threads",
+        concurrency=args.local_workers,
+        queues=["extract", "llm", "notify", "celery"],
+        without_heartbeat=True,
+        without_mingle=True,
+        without_gossip=True,
+    )
+    threading.Thread(target=worker.start, daemon=True).start()
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=api_port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    log_path = os.path.join(workdir, "stack.log")
+    print(f"Local stack in {workdir}: API on port {api_port}, {args.local_workers} worker threads, log in {log_path}")
+    # The app logs with print(); keep it out of the report
+    sys.stdout = open(log_path, "w", buffering=1)
+    return f"http://127.0.0.1:{api_port}"
+
+
+async def run_load(base_url: str, args, out=None) -> list[dict]:
+    corpus = []
+    for path in corpus_paths(args.pdf_dir, args.page_counts):
+        with open(path, "rb") as f:
+            corpus.append((os.path.basename(path), f.read()))
+
+    run_id = uuid.uuid4().hex[:8]
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        users = [
+            await login(client, f"loadtest-{run_id}-{i}@example.com", f"load-{run_id}-pw")
+            for i in range(args.users)
+        ]
+
+    header = (
+        f"{'conc':>4} {'docs/s':>7} {'upload p50':>11} {'p95':>7} {'p99':>7} "
+        f"{'complete p50':>13} {'p95':>7} {'p99':>7} {'list p95':>9} {'errors':>7} {'failed':>7} {'timeout':>8}"
+    )
+    print(header, file=out)
+    print("-" * len(header), file=out)
+
+    def fmt(value: Optional[float], width: int) -> str:
+        return f"{'-':>{width}}" if value is None else f"{value:>{width}.3f}"
+
+    steps = []
+    for concurrency in args.concurrency:
+        step = summarize_step(await run_step(base_url, users, corpus, concurrency, args))
+        steps.append(step)
+        print(
+            f"{concurrency:>4} {step['documents_per_second']:>7.2f} {fmt(step['upload_p50'], 11)} "
+            f"{fmt(step['upload_p95'], 7)} {fmt(step['upload_p99'], 7)} {fmt(step['completion_p50'], 13)} "
+            f"{fmt(step['completion_p95'], 7)} {fmt(step['completion_p99'], 7)} {fmt(step['list_p95'], 9)} "
+            f"{step['upload_error_rate']:>7.1%} {step['failure_rate']:>7.1%} {step['timeout_rate']:>8.1%}",
+            file=out,
+            flush=True,
+        )
+        if step["upload_errors"]:
+            print(f"     upload errors: {', '.join(step['upload_errors'])}", file=out)
+    return steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--base-url", help="API of a running stack, e.g. http://127.0.0.1:8000")
+    target.add_argument("--local", action="store_true", help="Start the whole stack in this process")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--uploads", type=int, default=40, help="Uploads per step")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Uploads in flight, one step each")
+    parser.add_argument("--pdf-dir", help="Directory of PDFs to use instead of the generated corpus")
+    parser.add_argument("--page-counts", type=int, nargs="+", default=[2, 10, 50], help="Generated corpus documents")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between status checks")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds before a document counts as timed out")
+    parser.add_argument("--local-workers", type=int, default=8, help="Celery worker threads (--local)")
+    parser.add_argument("--llm-latency-ms", type=float, default=200, help="Fake OpenAI latency per call (--local)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    report = sys.stdout
+    base_url = start_local_stack(args) if args.local else args.base_url.rstrip("/")
+    steps = asyncio.run(run_load(base_url, args, report))
+
+    best = max(steps, key=lambda step: step["documents_per_second"])
+    print(f"\nPeak throughput {best['documents_per_second']:.2f} documents/s at concurrency {best['concurrency']}", file=report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"base_url": base_url, "users": args.users, "steps": steps}, f, indent=2)
+        print(f"Results written to {args.output}", file=report)
+
+
+if __name__ == "__main__":
+    main()
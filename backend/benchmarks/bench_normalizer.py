@@ -0,0 +1,123 @@
+"""
+Micro-benchmark text cleanup: the original multi-pass clean_extracted_text vs
+the single-pass version, on whole documents and page by page.
+
+Inputs are synthetic documents of a few sizes (report-like pages with the
+whitespace noise PDF extraction produces) plus the real page texts of the
+corpus PDFs. For each implementation the benchmark reports throughput (MB/s,
+best of --repeat runs) and peak memory allocated during one call as a
+multiple of the input size, and checks that every output is identical.
+
+Usage:
+    python -m benchmarks.bench_normalizer [--pdf-dir DIR] [--sizes-mb 1 4 16] [--repeat N]
+"""
+import argparse
+import os
+import random
+import re
+import time
+import tracemalloc
+from typing import Callable
+
+from pypdf import PdfReader
+
+from app.services.pdf_extractor import TextNormalizer, clean_extracted_text
+from benchmarks.corpus import corpus_paths, generate_page_text
+
+
+def legacy_clean_extracted_text(text: str) -> str:
+    """clean_extracted_text as it was before the single-pass rewrite."""
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = re.sub(r" {2,}", " ", text)
+    lines = [line.strip() for line in text.split("\n")]
+    text = "\n".join(lines)
+    return text.strip()
+
+
+def clean_per_page(pages: list[str]) -> str:
+    """Clean page by page with TextNormalizer, as the extraction loop does."""
+    normalizer = TextNormalizer()
+    return "".join(normalizer.feed(page) for page in pages)
+
+
+def noisy_page(rng: random.Random, page_num: int) -> str:
+    """A synthetic page with indentation, trailing spaces, runs of spaces and blank lines."""
+    lines = []
+    for line in generate_page_text(rng, page_num).split("\n"):
+        line = " " * rng.choice([0, 0, 2, 4]) + line + " " * rng.choice([0, 0, 1, 3])
+        if rng.random() < 0.2:
+            line = line.replace(" ", "   ", 2)
+        lines.append(line)
+        if rng.random() < 0.1:
+            lines.append("\n" * rng.randint(1, 3))
+    return "\n".join(lines)
+
+
+def synthetic_pages(size_mb: float, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    pages, total = [], 0
+    while total < size_mb * 1024 * 1024:
+        pages.append(f"--- Page {len(pages) + 1} ---\n{noisy_page(rng, len(pages) + 1)}\n\n")
+        total += len(pages[-1])
+    return pages
+
+
+def pdf_pages(path: str) -> list[str]:
+    reader = PdfReader(path)
+    return [
+        f"--- Page {num} ---\n{page.extract_text() or ''}\n\n"
+        for num, page in enumerate(reader.pages, 1)
+    ]
+
+
+def measure(func: Callable, arg, size: int, repeat: int) -> tuple[float, float, str]:
+    """Return (MB/s, peak allocation / input size, output) for ``func(arg)``."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = func(arg)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return size / best / 1e6, peak / size, output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", help="Directory of PDFs to use instead of the generated corpus")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    inputs = [(f"synthetic {size:g} MB", synthetic_pages(size)) for size in args.sizes_mb]
+    inputs += [(os.path.basename(path), pdf_pages(path)) for path in corpus_paths(args.pdf_dir)]
+
+    implementations = [
+        ("legacy", lambda pages: legacy_clean_extracted_text("".join(pages))),
+        ("single-pass", lambda pages: clean_extracted_text("".join(pages))),
+        ("per-page", clean_per_page),
+    ]
+
+    header = f"{'input':<28} {'MB':>7} {'implementation':<14} {'MB/s':>9} {'peak alloc':>11}"
+    print(header)
+    print("-" * len(header))
+
+    for name, pages in inputs:
+        size = sum(len(page) for page in pages)
+        expected = None
+        label = name[:28]
+        for impl_name, func in implementations:
+            throughput, peak, output = measure(func, pages, size, args.repeat)
+            expected = expected if expected is not None else output
+            if output != expected:
+                raise SystemExit(f"{impl_name} output differs from legacy on {name}")
+            print(f"{label:<28} {size / 1e6:>7.2f} {impl_name:<14} {throughput:>9.1f} {peak:>10.2f}x")
+            label = ""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Compare offset and keyset (cursor) pagination of document and summary listings.
+
+Seeds a database with --rows documents (default 1M) spread over --users
+users, one of them a power user owning --power-share of them, with a summary
+for most documents. Then times the listing queries the API runs for that
+user at increasing page depths, with ``skip`` and with a cursor. The seeded
+database is kept and reused while the row count matches.
+
+Usage:
+    python -m benchmarks.bench_pagination [--database-url URL] [--rows N] [--limit 20]
+        [--depths 1 10 100 1000 5000] [--repeat 5] [--without-indexes]
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import Session, selectinload
+
+from app.database import Base
+from app.models import PDFDocument, Summary, TaskStatus, User
+from app.services.pagination import encode_cursor, next_cursor, paginate
+
+DEFAULT_DATABASE_URL = "sqlite:///" + os.path.join(os.path.dirname(__file__), "results", "pagination.db")
+BATCH_SIZE = 20000
+
+
+def seed(engine, rows: int, users: int, power_share: float) -> str:
+    """Create and fill the tables (unless already seeded with ``rows`` documents); return the power user's ID."""
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        if session.scalar(select(func.count()).select_from(PDFDocument)) == rows:
+            return session.scalar(select(User.id).where(User.email == "power@example.com"))
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    started_at = datetime(2024, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {
+                "id": user_id,
+                "email": "power@example.com" if i == 0 else f"user{i}@example.com",
+                "hashed_password": "x",
+                "is_active": True,
+                "is_superuser": False,
+                "is_verified": True,
+            }
+            for i, user_id in enumerate(user_ids)
+        ])
+
+    print(f"Seeding {rows} documents...")
+    for batch_start in range(0, rows, BATCH_SIZE):
+        documents, summaries = [], []
+        for row in range(batch_start, min(batch_start + BATCH_SIZE, rows)):
+            owner = user_ids[0] if rng.random() < power_share else rng.choice(user_ids[1:])
+            # Several documents per second, so timestamps collide and the id tie-breaker matters
+            created_at = started_at + timedelta(seconds=row // 3)
+            documents.append({
+                "id": row + 1,
+                "user_id": str(owner),
+                "filename": f"{row}.pdf",
+                "original_filename": f"report-{row}.pdf",
+                "file_path": f"{row}.pdf",
+                "file_size": rng.randint(10_000, 10_000_000),
+                "page_count": rng.randint(1, 400),
+                "status": TaskStatus.COMPLETED.value,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+            if rng.random() < 0.9:
+                summaries.append({
+                    "id": row + 1,
+                    "pdf_document_id": row + 1,
+                    "user_id": str(owner),
+                    "content": "Summary text. " * 20,
+                    "word_count": 40,
+                    "created_at": created_at + timedelta(seconds=30),
+                })
+        with engine.begin() as conn:
+            conn.execute(insert(PDFDocument), documents)
+            conn.execute(insert(Summary), summaries)
+
+    return str(user_ids[0])
+
+
+def document_query(user_id: str):
+    return select(PDFDocument).where(PDFDocument.user_id == user_id).options(selectinload(PDFDocument.summary))
+
+
+def summary_query(user_id: str):
+    return select(Summary).where(Summary.user_id == user_id).options(selectinload(Summary.pdf_document))
+
+
+def time_page(engine, query, created_column, id_column, limit: int, repeat: int, **page) -> float:
+    """Median milliseconds to fetch one page."""
+    samples = []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            rows = session.scalars(paginate(query, created_column, id_column, limit, **page)).all()
+            next_cursor(rows, limit)
+            samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def cursor_before(engine, query, created_column, id_column, limit: int, depth: int):
+    """The cursor a client paging from the start would send for page ``depth`` (1-based)."""
+    if depth <= 1:
+        return None
+    with Session(engine) as session:
+        row = session.scalars(paginate(query, created_column, id_column, 1, skip=(depth - 1) * limit - 1)).first()
+    return encode_cursor(row.created_at, row.id) if row else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL, help="Synchronous SQLAlchemy URL")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--power-share", type=float, default=0.1, help="Share of documents owned by the power user")
+    parser.add_argument("--limit", type=int, default=20, help="Page size")
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 10, 100, 1000, 4000])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median is reported)")
+    parser.add_argument("--without-indexes", action="store_true", help="Drop the listing indexes first")
+    args = parser.parse_args()
+
+    if args.database_url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(args.database_url[len("sqlite:///"):]) or ".", exist_ok=True)
+    engine = create_engine(args.database_url)
+    user_id = seed(engine, args.rows, args.users, args.power_share)
+
+    indexes = [index for table in (PDFDocument.__table__, Summary.__table__) for index in table.indexes]
+    with engine.begin() as conn:
+        for index in indexes:
+            if args.without_indexes:
+                index.drop(conn, checkfirst=True)
+            else:
+                index.create(conn, checkfirst=True)
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+
+    with Session(engine) as session:
+        owned = session.scalar(select(func.count()).where(PDFDocument.user_id == user_id))
+    print(f"{args.rows} documents, power user owns {owned}; indexes {'dropped' if args.without_indexes else 'present'}")
+
+    header = f"{'listing':<10} {'page':>6} {'offset ms':>10} {'cursor ms':>10} {'speedup':>8}"
+    print(header)
+    print("-" * len(header))
+
+    listings = [
+        ("documents", document_query(user_id), PDFDocument.created_at, PDFDocument.id),
+        ("summaries", summary_query(user_id), Summary.created_at, Summary.id),
+    ]
+    for name, query, created_column, id_column in listings:
+        for depth in args.depths:
+            if (depth - 1) * args.limit >= owned:
+                continue
+            offset_ms = time_page(
+                engine, query, created_column, id_column, args.limit, args.repeat, skip=(depth - 1) * args.limit
+            )
+            cursor = cursor_before(engine, query, created_column, id_column, args.limit, depth)
+            cursor_ms = time_page(engine, query, created_column, id_column, args.limit, args.repeat, cursor=cursor)
+            print(f"{name:<10} {depth:>6} {offset_ms:>10.2f} {cursor_ms:>10.2f} {offset_ms / cursor_ms:>7.1f}x")
+            name = ""
+
+
+if __name__ == "__main__":
+    main()
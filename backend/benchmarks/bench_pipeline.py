@@ -0,0 +1,266 @@
+"""
+Offline benchmark of the summarization pipeline, stage by stage.
+
+Runs every corpus document through the same calls as the upload and the
+workers: preflight -> extract -> plan -> map -> reduce (or preflight ->
+extract -> plan -> stuff for short documents). Extract is the engine plus
+the per-page cleanup and compression of the stored text; plan is the
+worker's plan_pages, which also cuts the chunks. The workers interleave
+the two, here they are timed one after the other. The deterministic
+FakeChatModel stands in for GPT-4, so no API key or
+network is needed and LLM calls and tokens are identical between runs.
+The fake model's latency, throughput and concurrency can be set to mimic
+the real API; by default it answers instantly, so wall times measure the
+pipeline's own overhead. The LLM response cache is disabled.
+
+For each stage it reports wall time and CPU time (median of --repeat runs),
+peak Python memory allocated (tracemalloc), LLM calls and tokens. Results
+are written as JSON to --output. With a baseline (--baseline, written by
+--save-baseline), every stage is compared with it: times or memory more
+than --threshold above the baseline, or any change in LLM calls or tokens,
+are reported and make the command exit with status 1.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--pdf-dir DIR] [--repeat 3] [--latency 0] [--tokens-per-second 0]
+        [--output FILE] [--baseline FILE] [--save-baseline] [--threshold 0.25]
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from app.config import get_settings
+from app.services.llm_cache import get_llm_cache
+from app.services.document_text import PageTextWriter
+from app.services.pdf_extractor import PdfDocumentHandle, open_numbered_pdf_pages
+from app.services.preflight import preflight_pdf
+from app.services.summarizer import SummaryPlan, map_summaries, plan_pages, reduce_summaries, simple_summarize
+from benchmarks.corpus import corpus_paths
+from benchmarks.fake_llm import FakeChatModel
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+TIME_METRICS = ("wall_seconds", "cpu_seconds")
+COUNT_METRICS = ("llm_calls", "input_tokens", "output_tokens")
+# Differences below these are noise, whatever the ratio
+MIN_TIME_DELTA = 0.005
+MIN_MEMORY_DELTA_MB = 1.0
+
+
+def measure(stage: str, func, model: FakeChatModel, memory: bool):
+    """Run ``func`` and return (its result, the stage's measurements)."""
+    gc.collect()
+    model.reset()
+    if memory:
+        tracemalloc.start()
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    result = func()
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+    peak = 0
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    usage = model.usage()
+    return result, {
+        "stage": stage,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "peak_mb": peak / 1e6,
+        "llm_calls": usage["calls"],
+        "input_tokens": usage["input_tokens"],
+        "output_tokens": usage["output_tokens"],
+    }
+
+
+def run_pipeline(path: str, model: FakeChatModel, memory: bool) -> tuple[dict, list[dict]]:
+    """Run one document through every stage; return (document info, stage measurements)."""
+    stages = []
+
+    estimate, entry = measure("preflight", lambda: preflight_pdf(path), model, memory)
+    stages.append(entry)
+
+    def extract():
+        page_count, pages = open_numbered_pdf_pages(PdfDocumentHandle(path))
+        return page_count, list(PageTextWriter().track(pages))
+
+    (page_count, pages), entry = measure("extract", extract, model, memory)
+    stages.append(entry)
+
+    def plan_document():
+        docs = []
+        plan, text = plan_pages(pages, lambda index, doc: docs.append(doc), estimate.estimated_tokens)
+        return plan, text, docs
+
+    (plan, text, docs), entry = measure("plan", plan_document, model, memory)
+    stages.append(entry)
+
+    if plan.strategy == SummaryPlan.STUFF:
+        summary, entry = measure("stuff", lambda: simple_summarize(text, model), model, memory)
+        stages.append(entry)
+    else:
+        summaries, entry = measure("map", lambda: map_summaries(docs, model), model, memory)
+        stages.append(entry)
+        summary, entry = measure("reduce", lambda: reduce_summaries(summaries, model), model, memory)
+        stages.append(entry)
+
+    document = {
+        "document": os.path.basename(path),
+        "pages": page_count,
+        "strategy": plan.strategy,
+        "input_tokens": plan.input_tokens,
+        "chunks": len(docs),
+        "summary_chars": len(summary),
+    }
+    return document, stages
+
+
+def run_quietly(path: str, model: FakeChatModel, memory: bool) -> tuple[dict, list[dict]]:
+    """run_pipeline without the pipeline's log output."""
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            return run_pipeline(path, model, memory)
+        finally:
+            sys.stdout = stdout
+
+
+def median_stages(runs: list[list[dict]]) -> list[dict]:
+    """Combine repeated runs of a document: median times, largest peak memory."""
+    combined = []
+    for entries in zip(*runs):
+        entry = dict(entries[0])
+        for metric in TIME_METRICS:
+            entry[metric] = round(statistics.median(e[metric] for e in entries), 4)
+        entry["peak_mb"] = round(max(e["peak_mb"] for e in entries), 2)
+        combined.append(entry)
+    return combined
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return a description of every stage that regressed or changed against ``baseline``."""
+    previous = {
+        (document["document"], entry["stage"]): entry
+        for document in baseline["documents"]
+        for entry in document["stages"]
+    }
+    problems = []
+    for document in results["documents"]:
+        for entry in document["stages"]:
+            before = previous.get((document["document"], entry["stage"]))
+            if before is None:
+                continue
+            name = f"{document['document']} {entry['stage']}"
+            for metric in TIME_METRICS + ("peak_mb",):
+                old, new = before[metric], entry[metric]
+                min_delta = MIN_MEMORY_DELTA_MB if metric == "peak_mb" else MIN_TIME_DELTA
+                if new > old * (1 + threshold) and new - old > min_delta:
+                    problems.append(f"{name}: {metric} {old} -> {new} (+{(new - old) / old if old else 1:.0%})")
+            for metric in COUNT_METRICS:
+                if entry[metric] != before[metric]:
+                    problems.append(f"{name}: {metric} {before[metric]} -> {entry[metric]}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", help="Directory of PDFs to use instead of the generated corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per document (times are the median)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake model seconds per call before output")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake model output speed (0 = instant)")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Calls the fake model serves at once (0 = any)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (it slows Python code down)")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "pipeline.json"))
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "pipeline-baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="Also store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed increase over the baseline")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    settings.llm_cache_enabled = False
+    get_llm_cache.cache_clear()
+    model = FakeChatModel(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        max_concurrency=args.max_concurrency,
+    )
+
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "tokens_per_second": args.tokens_per_second,
+            "max_concurrency": args.max_concurrency,
+            "memory": not args.no_memory,
+            "pdf_engine": settings.pdf_engine,
+            "extraction_workers": settings.extraction_workers,
+            "map_max_concurrency": settings.map_max_concurrency,
+            "chunk_max_tokens": settings.chunk_max_tokens,
+        },
+        "documents": [],
+    }
+
+    header = (
+        f"{'document':<24} {'stage':<9} {'wall s':>8} {'cpu s':>8} {'peak MB':>8} "
+        f"{'calls':>6} {'in tokens':>10} {'out tokens':>11}"
+    )
+    print(header)
+    print("-" * len(header))
+    paths = corpus_paths(args.pdf_dir)
+    # One untimed run first, so lazy imports and thread pools are not billed to the first document
+    run_quietly(paths[0], model, False)
+    for path in paths:
+        runs = []
+        for _ in range(max(1, args.repeat)):
+            document, stages = run_quietly(path, model, not args.no_memory)
+            runs.append(stages)
+        document["stages"] = median_stages(runs)
+        results["documents"].append(document)
+
+        for entry in document["stages"]:
+            print(
+                f"{document['document'][:24]:<24} {entry['stage']:<9} {entry['wall_seconds']:>8.3f} "
+                f"{entry['cpu_seconds']:>8.3f} {entry['peak_mb']:>8.1f} {entry['llm_calls']:>6} "
+                f"{entry['input_tokens']:>10} {entry['output_tokens']:>11}"
+            )
+        total_wall = sum(entry["wall_seconds"] for entry in document["stages"])
+        print(f"{document['document'][:24]:<24} {'total':<9} {total_wall:>8.3f}  ({document['strategy']})")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with (run with --save-baseline to store one)")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    problems = compare(results, baseline, args.threshold)
+    print(f"Compared with the baseline of {baseline['created']} (threshold +{args.threshold:.0%}):")
+    for problem in problems:
+        print(f"  REGRESSION {problem}")
+    if problems:
+        sys.exit(1)
+    print("  no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Measure the upload preflight estimator and simulate priority scheduling.
+
+For every document of the corpus, runs the preflight (page tree plus
+--samples sampled pages) and a full extraction and planning, and reports
+both times and the estimated vs actual tokens and LLM calls.
+
+Then simulates --workers LLM workers (one call per --call-seconds each)
+serving a backlog: one user uploads --backlog copies of the largest corpus
+document at once, while other users upload the smallest one every
+--interval seconds. LLM calls are served either in FIFO order (one queue, as
+before) or by the priority job_priority gives each document. Reports the
+median and p95 latency of the small documents and when the backlog is done.
+
+Usage:
+    python -m benchmarks.bench_preflight [--pdf-dir DIR] [--samples 8] [--workers 8] [--backlog 20]
+"""
+import argparse
+import contextlib
+import heapq
+import io
+import itertools
+import os
+import statistics
+import time
+
+from app.services.pdf_extractor import open_pdf_pages
+from app.services.preflight import job_priority, preflight_pdf
+from app.services.summarizer import plan_summary
+from benchmarks.corpus import corpus_paths
+
+
+def simulate(jobs: list[tuple], workers: int, call_seconds: float, prioritized: bool) -> dict[int, float]:
+    """
+    Serve the LLM calls of ``jobs`` with ``workers`` parallel slots.
+
+    Args:
+        jobs: ``(job_id, arrival, calls, priority)`` tuples
+        workers: Calls served at once
+        call_seconds: Duration of one call
+        prioritized: Serve calls by (priority, arrival) instead of arrival only
+
+    Returns:
+        Completion time of each job
+    """
+    order = itertools.count()
+    arrivals = sorted(jobs, key=lambda job: job[1])
+    queue: list[tuple] = []
+    remaining = {job_id: calls for job_id, _, calls, _ in jobs}
+    done: dict[int, float] = {}
+    free_at = [0.0] * workers
+    next_arrival = 0
+
+    while len(done) < len(jobs):
+        now = min(free_at)
+        if not queue:
+            now = max(now, arrivals[next_arrival][1])
+        while next_arrival < len(arrivals) and arrivals[next_arrival][1] <= now:
+            job_id, arrival, calls, priority = arrivals[next_arrival]
+            for _ in range(calls):
+                key = (priority, arrival) if prioritized else (arrival,)
+                heapq.heappush(queue, (*key, next(order), job_id))
+            next_arrival += 1
+
+        job_id = heapq.heappop(queue)[-1]
+        worker = free_at.index(min(free_at))
+        free_at[worker] = max(free_at[worker], now) + call_seconds
+        remaining[job_id] -= 1
+        if remaining[job_id] == 0:
+            done[job_id] = free_at[worker]
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", help="Directory of PDFs to use instead of the generated corpus")
+    parser.add_argument("--samples", type=int, default=8, help="Pages sampled by the preflight")
+    parser.add_argument("--workers", type=int, default=8, help="Simulated LLM calls served at once")
+    parser.add_argument("--call-seconds", type=float, default=5.0, help="Simulated duration of one LLM call")
+    parser.add_argument("--backlog", type=int, default=20, help="Large documents uploaded at once by one user")
+    parser.add_argument("--small", type=int, default=50, help="Small documents uploaded by other users")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between small uploads")
+    args = parser.parse_args()
+
+    header = (
+        f"{'document':<24} {'pages':>6} {'preflight ms':>13} {'full ms':>8} "
+        f"{'est tokens':>11} {'tokens':>8} {'error':>6} {'est calls':>10} {'calls':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    estimates = []
+    for path in corpus_paths(args.pdf_dir):
+        with contextlib.redirect_stdout(io.StringIO()):
+            estimate = preflight_pdf(path, args.samples)
+            started = time.perf_counter()
+            page_count, pages = open_pdf_pages(path, workers=1)
+            plan = plan_summary("\n\n".join(pages))
+            full_ms = (time.perf_counter() - started) * 1000
+        estimates.append(estimate)
+        error = (estimate.estimated_tokens - plan.input_tokens) / plan.input_tokens if plan.input_tokens else 0.0
+        print(
+            f"{os.path.basename(path)[:24]:<24} {page_count:>6} {estimate.seconds * 1000:>13.1f} {full_ms:>8.1f} "
+            f"{estimate.estimated_tokens:>11} {plan.input_tokens:>8} {error:>+6.1%} "
+            f"{estimate.plan.estimated_calls:>10} {plan.estimated_calls:>6}"
+        )
+
+    small = min(estimates, key=lambda estimate: estimate.plan.estimated_calls).plan.estimated_calls
+    large = max(estimates, key=lambda estimate: estimate.plan.estimated_calls).plan.estimated_calls
+    jobs = [(i, 0.0, large, job_priority(large, i)) for i in range(args.backlog)]
+    small_ids = range(args.backlog, args.backlog + args.small)
+    jobs += [(job_id, (n + 1) * args.interval, small, job_priority(small, 0)) for n, job_id in enumerate(small_ids)]
+    arrival = {job_id: at for job_id, at, _, _ in jobs}
+
+    print()
+    print(
+        f"Backlog of {args.backlog} x {large}-call documents, {args.small} x {small}-call documents "
+        f"every {args.interval}s, {args.workers} workers"
+    )
+    header = f"{'scheduling':<12} {'small p50 s':>12} {'small p95 s':>12} {'backlog done s':>15}"
+    print(header)
+    print("-" * len(header))
+    for name, prioritized in (("fifo", False), ("priority", True)):
+        done = simulate(jobs, args.workers, args.call_seconds, prioritized)
+        latencies = sorted(done[job_id] - arrival[job_id] for job_id in small_ids)
+        backlog_done = max(done[job_id] for job_id in range(args.backlog))
+        print(
+            f"{name:<12} {statistics.median(latencies):>12.1f} "
+            f"{latencies[int(0.95 * (len(latencies) - 1))]:>12.1f} {backlog_done:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
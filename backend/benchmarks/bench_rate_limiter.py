@@ -0,0 +1,103 @@
+"""
+Simulate workers sharing an LLM account quota, with and without the Redis rate limiter.
+
+A fake model accepts --tpm tokens per minute (a token bucket, like the API)
+and answers 429 beyond it; rejected calls back off like the OpenAI client
+(exponential, starting at --backoff seconds) and try again. --workers
+threads send --calls calls of --tokens tokens each, first calling the model
+directly, then through LLMRateLimiter. Reports the 429 responses, the time to
+finish all calls and the p50/p95 latency of one call.
+
+Needs a Redis server (--redis-url, default settings.redis_url).
+
+Usage:
+    python -m benchmarks.bench_rate_limiter [--workers 16] [--calls 64] [--tokens 2000] [--tpm 60000]
+"""
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import get_settings
+from app.services.rate_limiter import LLMRateLimiter
+
+
+class FakeModel:
+    """Token bucket holding one minute of ``tpm``; calls beyond it get a 429."""
+
+    def __init__(self, tpm: int, latency: float):
+        self.rate = tpm / 60
+        self.capacity = tpm
+        self.level = float(tpm)
+        self.updated = time.monotonic()
+        self.latency = latency
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def call(self, tokens: int) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.level < tokens:
+                self.rejected += 1
+                return False
+            self.level -= tokens
+        time.sleep(self.latency)
+        return True
+
+
+def run(args, limiter) -> dict:
+    model = FakeModel(args.tpm, args.latency)
+    # Start from an exhausted quota, as under sustained load
+    model.level = 0
+
+    def one_call(_) -> float:
+        started = time.perf_counter()
+        if limiter is not None:
+            limiter.acquire(args.tokens)
+        backoff = args.backoff
+        while not model.call(args.tokens):
+            time.sleep(backoff)
+            backoff *= 2
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as pool:
+        latencies = sorted(pool.map(one_call, range(args.calls)))
+    return {
+        "seconds": time.perf_counter() - started,
+        "rejected": model.rejected,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=64)
+    parser.add_argument("--tokens", type=int, default=2000, help="Tokens per call")
+    parser.add_argument("--tpm", type=int, default=60000, help="Tokens per minute the fake model accepts")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per accepted call")
+    parser.add_argument("--backoff", type=float, default=1.0, help="First retry delay after a 429")
+    parser.add_argument("--redis-url", default=get_settings().redis_url)
+    args = parser.parse_args()
+
+    header = f"{'mode':<14} {'seconds':>8} {'429s':>6} {'p50 s':>7} {'p95 s':>7}"
+    print(header)
+    print("-" * len(header))
+    for name, limited in (("no limiter", False), ("redis limiter", True)):
+        limiter = None
+        if limited:
+            limiter = LLMRateLimiter(args.redis_url, f"bench-{uuid.uuid4().hex[:8]}", 0, args.tpm)
+            # Match the fake model's exhausted starting state
+            limiter.acquire(args.tpm)
+        result = run(args, limiter)
+        print(f"{name:<14} {result['seconds']:>8.1f} {result['rejected']:>6} {result['p50']:>7.2f} {result['p95']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compare storing extracted text in the summaries table with compressed per-page storage.
+
+For every document of the corpus, extracts the pages, then stores the text
+both ways in a scratch SQLite database: the previous ``Summary.extracted_text``
+column (first 50k characters only) and the compressed ``document_pages``
+table. Reports the bytes stored, characters kept, compression throughput,
+and the time to read back the whole text and a --range-pages page range.
+
+Usage:
+    python -m benchmarks.bench_text_storage [--pdf-dir DIR] [--range-pages 10] [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import DocumentPage, PDFDocument, Summary, User
+from app.services.document_text import PageTextWriter, iter_stored_pages
+from app.services.pdf_extractor import open_numbered_pdf_pages
+from benchmarks.corpus import corpus_paths
+
+LEGACY_LIMIT = 50000
+
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", help="Directory of PDFs to use instead of the generated corpus")
+    parser.add_argument("--range-pages", type=int, default=10, help="Pages read by the range measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median is reported)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="bench-text-")
+    engine = create_engine(f"sqlite:///{os.path.join(directory, 'text.db')}")
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as db:
+        db.add(User(id="00000000-0000-0000-0000-000000000001", email="bench@example.com", hashed_password="x"))
+        db.commit()
+
+    header = (
+        f"{'document':<24} {'pages':>6} {'chars':>9} {'kept':>6} {'column B':>9} {'pages B':>9} "
+        f"{'ratio':>6} {'MB/s':>7} {'full ms':>8} {'range ms':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for document_id, path in enumerate(corpus_paths(args.pdf_dir), start=1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            page_count, pages = open_numbered_pdf_pages(path, workers=1)
+            pages = list(pages)
+        text = "\n\n".join(page for _, page in pages)
+
+        writer = PageTextWriter()
+        started = time.perf_counter()
+        for _ in writer.track(pages):
+            pass
+        compress_seconds = time.perf_counter() - started
+
+        with SessionLocal() as db:
+            db.add(PDFDocument(
+                id=document_id, user_id="00000000-0000-0000-0000-000000000001", filename=path,
+                original_filename=path, file_path=path, file_size=0, page_count=page_count,
+            ))
+            db.add(Summary(pdf_document_id=document_id, content="", extracted_text=text[:LEGACY_LIMIT]))
+            writer.save(db, document_id)
+            db.commit()
+            pages_bytes = db.scalar(
+                select(func.sum(func.length(DocumentPage.data))).where(DocumentPage.pdf_document_id == document_id)
+            )
+
+        full_ms = median_ms(lambda: list(iter_stored_pages(SessionLocal, document_id)), args.repeat)
+        middle = max(1, page_count // 2)
+        range_ms = median_ms(
+            lambda: list(iter_stored_pages(SessionLocal, document_id, middle, middle + args.range_pages - 1)),
+            args.repeat,
+        )
+
+        column_bytes = len(text[:LEGACY_LIMIT].encode("utf-8"))
+        kept = min(len(text), LEGACY_LIMIT) / len(text) if text else 1.0
+        print(
+            f"{os.path.basename(path)[:24]:<24} {page_count:>6} {len(text):>9} {kept:>6.0%} {column_bytes:>9} "
+            f"{pages_bytes:>9} {writer.raw_bytes / pages_bytes:>5.1f}x "
+            f"{writer.raw_bytes / compress_seconds / 1e6:>7.1f} {full_ms:>8.2f} {range_ms:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
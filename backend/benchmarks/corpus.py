@@ -0,0 +1,153 @@
+"""
+Sample PDF corpus for the benchmarks.
+
+Generates deterministic text-layer PDFs of varying page counts without any
+extra dependencies, so benchmark numbers are comparable between runs.
+"""
+import argparse
+import os
+import random
+from typing import Optional
+
+DEFAULT_PAGE_COUNTS = [2, 10, 50, 200]
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+LINES_PER_PAGE = 48
+CHARS_PER_LINE = 95
+
+_WORDS = (
+    "analysis revenue growth quarter market customer product strategy risk report "
+    "operations financial statement results increase decrease segment regional global "
+    "investment capital expenditure margin forecast guidance policy compliance audit "
+    "committee board review performance target objective initiative program project "
+    "research development technology platform service infrastructure security data "
+    "model system process management employee workforce training safety environment "
+    "sustainability energy emission supply chain inventory logistics partner contract "
+    "agreement obligation liability asset equity debt interest rate currency exchange "
+    "the of and to in for on with by from that this is are was were be as at an or"
+).split()
+
+_BOILERPLATE = (
+    "This document contains forward-looking statements that involve risks and "
+    "uncertainties. Actual results may differ materially from those projected. "
+    "The information herein is provided for informational purposes only and does "
+    "not constitute an offer or solicitation. All rights reserved."
+)
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 22))]
+    return " ".join(words).capitalize() + "."
+
+
+def generate_page_text(rng: random.Random, page_num: int) -> str:
+    """Generate one page of report-like text: a heading, paragraphs and a footer."""
+    lines = [f"Section {page_num}: {' '.join(rng.choice(_WORDS) for _ in range(4)).title()}", ""]
+    while len(lines) < LINES_PER_PAGE - 4:
+        paragraph = " ".join(_sentence(rng) for _ in range(rng.randint(3, 7)))
+        while paragraph and len(lines) < LINES_PER_PAGE - 4:
+            cut = paragraph.rfind(" ", 0, CHARS_PER_LINE) if len(paragraph) > CHARS_PER_LINE else len(paragraph)
+            lines.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        lines.append("")
+    if page_num % 10 == 0:
+        # Repeated boilerplate, as found in appendices and disclaimers
+        lines.append(_BOILERPLATE[:CHARS_PER_LINE])
+    lines.append(f"Page {page_num}")
+    return "\n".join(lines)
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path: str, pages: list[str]) -> None:
+    """Write a minimal PDF with one Helvetica text page per entry in ``pages``."""
+    objects: list[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b"")
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for text in pages:
+        stream_lines = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+        stream_lines += [f"({_escape(line)}) '" for line in text.split("\n")]
+        stream_lines.append("ET")
+        stream = "\n".join(stream_lines).encode("latin-1", "replace")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)
+        ))
+
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset,
+    )
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def build_corpus(
+    directory: str = DEFAULT_CORPUS_DIR,
+    page_counts: Optional[list[int]] = None,
+    seed: int = 42,
+) -> list[str]:
+    """
+    Generate (or reuse) the sample PDFs and return their paths.
+
+    Args:
+        directory: Where to write the PDFs
+        page_counts: Page count of each generated document
+        seed: Random seed, so the corpus is identical across runs
+
+    Returns:
+        List of PDF file paths, smallest first
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for page_count in sorted(page_counts or DEFAULT_PAGE_COUNTS):
+        path = os.path.join(directory, f"sample_{page_count:04d}p_s{seed}.pdf")
+        if not os.path.exists(path):
+            rng = random.Random(seed * 100003 + page_count)
+            write_text_pdf(path, [generate_page_text(rng, n) for n in range(1, page_count + 1)])
+        paths.append(path)
+    return paths
+
+
+def corpus_paths(pdf_dir: Optional[str] = None, page_counts: Optional[list[int]] = None) -> list[str]:
+    """Return the PDFs in ``pdf_dir`` if given, otherwise the generated corpus."""
+    if pdf_dir:
+        return sorted(
+            os.path.join(pdf_dir, name)
+            for name in os.listdir(pdf_dir)
+            if name.lower().endswith(".pdf")
+        )
+    return build_corpus(page_counts=page_counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the sample PDF corpus")
+    parser.add_argument("--dir", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--pages", type=int, nargs="+", default=DEFAULT_PAGE_COUNTS)
+    args = parser.parse_args()
+    for corpus_path in build_corpus(args.dir, args.pages):
+        print(corpus_path)
@@ -0,0 +1,111 @@
+"""
+Deterministic fake chat model for offline benchmarks.
+
+Stands in for ChatOpenAI anywhere the summarizer takes an ``llm``
+(summarize_text, map_reduce_summarize, simple_summarize, ...). Responses are
+built from the prompt itself, so the same input always gives the same
+summary, and their length follows the prompt like a real summary's would.
+Latency (time to first token), generation throughput and the number of
+concurrent requests the "API" serves are configurable; token usage is
+reported like OpenAI's and counted for the benchmark.
+"""
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from app.services.summarizer import count_tokens
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that summarizes by picking sentences from its prompt.
+
+    A call takes ``latency`` seconds plus its output tokens at
+    ``tokens_per_second`` (0 = instantly); at most ``max_concurrency`` calls
+    are served at once (0 = unlimited), the rest queue as on a saturated API.
+    The output is ``output_ratio`` of the prompt's tokens, between
+    ``min_output_tokens`` and ``max_output_tokens``.
+    """
+
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    max_concurrency: int = 0
+    output_ratio: float = 0.1
+    min_output_tokens: int = 16
+    max_output_tokens: int = 400
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _slots: Optional[threading.Semaphore] = PrivateAttr(default=None)
+    _calls: int = PrivateAttr(default=0)
+    _input_tokens: int = PrivateAttr(default=0)
+    _output_tokens: int = PrivateAttr(default=0)
+
+    def model_post_init(self, context: Any) -> None:
+        super().model_post_init(context)
+        if self.max_concurrency > 0:
+            self._slots = threading.Semaphore(self.max_concurrency)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": "fake", "output_ratio": self.output_ratio, "max_output_tokens": self.max_output_tokens}
+
+    def summarize(self, prompt: str) -> str:
+        """The deterministic response to ``prompt``."""
+        target = min(self.max_output_tokens, max(self.min_output_tokens, int(count_tokens(prompt) * self.output_ratio)))
+        sentences = [sentence.strip() for sentence in prompt.replace("\n", " ").split(". ") if sentence.strip()]
+        # Every n-th sentence, so the summary covers the whole prompt
+        stride = max(1, len(sentences) * 20 // max(1, target))
+        words: list[str] = []
+        for sentence in sentences[::stride]:
+            words.extend(sentence.split())
+            if len(words) * 4 >= target * 3:  # ~0.75 words per token
+                break
+        return " ".join(words[: max(1, target * 3 // 4)])
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        # The text to summarize sits between the instructions and the answer cue
+        human = "\n".join(str(message.content) for message in messages if message.type != "system")
+        parts = human.split("\n\n")
+        content = self.summarize("\n\n".join(parts[1:-1]) if len(parts) > 2 else human)
+        input_tokens = count_tokens(prompt)
+        output_tokens = count_tokens(content)
+
+        delay = self.latency + (output_tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0)
+        if self._slots is not None:
+            with self._slots:
+                time.sleep(delay)
+        elif delay > 0:
+            time.sleep(delay)
+
+        with self._lock:
+            self._calls += 1
+            self._input_tokens += input_tokens
+            self._output_tokens += output_tokens
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def usage(self) -> dict:
+        """Calls and tokens served so far."""
+        with self._lock:
+            return {"calls": self._calls, "input_tokens": self._input_tokens, "output_tokens": self._output_tokens}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._calls = self._input_tokens = self._output_tokens = 0
@@ -0,0 +1,50 @@
+import pytest
+
+from app.services import summarizer
+from app.services.summarizer import batch_summaries, fit_summaries
+
+
+@pytest.fixture(autouse=True)
+def char_tokens(monkeypatch):
+    """Count one token per character, so sizes are exact and work offline."""
+    monkeypatch.setattr(summarizer, "count_tokens", len)
+    monkeypatch.setattr(summarizer, "truncate_to_tokens", lambda text, max_tokens: text[:max_tokens])
+
+
+def joined_tokens(batch):
+    return len("\n\n".join(batch))
+
+
+def test_leftover_summary_is_not_merged_over_budget():
+    summaries = ["a" * 450, "b" * 450, "c" * 500]
+
+    batches = batch_summaries(summaries, 1000)
+
+    assert batches == [summaries[:2], summaries[2:]]
+    assert all(joined_tokens(batch) <= 1000 for batch in batches)
+
+
+def test_separators_count_towards_budget():
+    summaries = ["a" * 499, "b" * 499, "c" * 10]
+
+    batches = batch_summaries(summaries, 1000)
+
+    assert batches == [summaries[:2], summaries[2:]]
+    assert all(joined_tokens(batch) <= 1000 for batch in batches)
+
+
+def test_batches_keep_document_order():
+    summaries = [str(i) * 300 for i in range(7)]
+
+    batches = batch_summaries(summaries, 1000)
+
+    assert [summary for batch in batches for summary in batch] == summaries
+    assert all(joined_tokens(batch) <= 1000 for batch in batches)
+    assert all(len(batch) >= 2 for batch in batches[:-1])
+
+
+def test_fitted_summaries_fit_in_pairs():
+    summaries = fit_summaries(["a" * 900, "b" * 800], 1000)
+
+    assert joined_tokens(summaries) <= 1000
+    assert batch_summaries(summaries, 1000) == [summaries]
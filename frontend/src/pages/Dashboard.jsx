@@ -7,10 +7,38 @@ function Dashboard() {
   const [documents, setDocuments] = useState([]);
   const [loading, setLoading] = useState(true);
 
+  const [progress, setProgress] = useState({});
+
   useEffect(() => {
     fetchDocuments();
   }, []);
 
+  // Follow documents that are still being processed
+  const activeIds = documents
+    .filter((doc) => doc.status === 'pending' || doc.status === 'processing')
+    .map((doc) => doc.id)
+    .join(',');
+
+  useEffect(() => {
+    if (!activeIds) return undefined;
+
+    const stops = activeIds.split(',').map(Number).map((id) =>
+      pdfAPI.watchProgress(id, (event) => {
+        setProgress((current) => ({ ...current, [id]: event }));
+        if (event.stage === 'completed' || event.stage === 'failed') {
+          setDocuments((docs) =>
+            docs.map((doc) =>
+              doc.id === id
+                ? { ...doc, status: event.stage, has_summary: event.stage === 'completed' }
+                : doc
+            )
+          );
+        }
+      })
+    );
+    return () => stops.forEach((stop) => stop());
+  }, [activeIds]);
+
   const fetchDocuments = async () => {
     try {
       const data = await pdfAPI.getDocuments();
@@ -160,6 +188,12 @@ function Dashboard() {
                       </div>
                     </div>
                     <div className="flex items-center space-x-4">
+                      {progress[doc.id] &&
+                        (doc.status === 'pending' || doc.status === 'processing') && (
+                          <span className="text-xs text-gray-500">
+                            {progress[doc.id].stage} {progress[doc.id].percent}%
+                          </span>
+                        )}
                       {getStatusBadge(doc.status)}
                       {doc.has_summary && (
                         <Link
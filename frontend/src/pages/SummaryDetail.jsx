@@ -29,8 +29,19 @@ function SummaryDetail() {
 
     setResending(true);
     try {
-      await summaryAPI.resendEmail(document.summary.id);
-      toast.success('Summary email sent successfully!');
+      // The email is queued; follow its delivery status for a little while
+      let delivery = await summaryAPI.resendEmail(document.summary.id);
+      for (let i = 0; i < 30 && delivery.status === 'queued'; i++) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        delivery = await summaryAPI.getEmailDelivery(document.summary.id, delivery.id);
+      }
+      if (delivery.status === 'sent') {
+        toast.success('Summary email sent successfully!');
+      } else if (delivery.status === 'queued') {
+        toast.success('Summary email queued');
+      } else {
+        toast.error('Failed to send email');
+      }
     } catch (error) {
       toast.error('Failed to send email');
     } finally {
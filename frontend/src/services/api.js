@@ -88,6 +88,39 @@ export const pdfAPI = {
   deleteDocument: async (id) => {
     await api.delete(`/pdf/documents/${id}`);
   },
+
+  // Stream progress events (server-sent events) until the document completes or fails.
+  // fetch is used instead of EventSource, which cannot send the Authorization header.
+  watchProgress: (id, onEvent) => {
+    const controller = new AbortController();
+
+    const run = async () => {
+      const response = await fetch(`${API_URL}/pdf/documents/${id}/events`, {
+        headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+        signal: controller.signal,
+      });
+      if (!response.ok) return;
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const messages = buffer.split('\n\n');
+        buffer = messages.pop();
+        for (const message of messages) {
+          if (message.startsWith('data: ')) {
+            onEvent(JSON.parse(message.slice(6)));
+          }
+        }
+      }
+    };
+
+    run().catch(() => {});
+    return () => controller.abort();
+  },
 };
 
 // Summary API
@@ -106,6 +139,11 @@ export const summaryAPI = {
     const response = await api.post(`/summaries/${id}/resend-email`);
     return response.data;
   },
+
+  getEmailDelivery: async (summaryId, deliveryId) => {
+    const response = await api.get(`/summaries/${summaryId}/email-deliveries/${deliveryId}`);
+    return response.data;
+  },
 };
 
 export default api;